@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+批量查询去重
+批量地理编码前规范化 (city, country)，相同的查询只请求一次，再按原始行顺序展开结果
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from geocode_cache import normalize_query_text
+from geocode_results import ResultBatch, text_query_error
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def canonicalize(text: Optional[str]) -> Optional[str]:
+    """规范化Unicode（NFKC，全角转半角）和空白，保留大小写，用作实际发送的查询文本"""
+    if text is None:
+        return None
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def dedup_key(city: str, country: Optional[str]) -> str:
+    """去重键：在canonicalize基础上统一大小写"""
+    return f"{normalize_query_text(city)}|{normalize_query_text(country or '')}"
+
+
+class DedupPlan:
+    __slots__ = ('unique', 'row_to_unique')
+
+    def __init__(self, unique: List[tuple], row_to_unique: List[int]):
+        """
+        去重结果
+
+        Args:
+            unique: 唯一查询列表 [(city, country), ...]
+            row_to_unique: 每个原始行对应的唯一查询序号
+        """
+        self.unique = unique
+        self.row_to_unique = row_to_unique
+
+    @property
+    def rows(self) -> int:
+        return len(self.row_to_unique)
+
+    @property
+    def saved_requests(self) -> int:
+        """去重节省的上游请求数"""
+        return self.rows - len(self.unique)
+
+
+def dedupe_cities(cities: List[tuple]) -> DedupPlan:
+    """
+    规范化并去重城市列表
+
+    每组重复查询使用首次出现的写法（经canonicalize处理）作为实际查询。
+    无效行（城市名称为空或参数类型不正确）各自单独成为一个查询、不参与合并，
+    原样传给geocode_city构建失败结果。
+
+    Args:
+        cities: 城市列表，格式为 [(city, country), ...]
+    """
+    index: Dict[str, int] = {}
+    unique = []
+    row_to_unique = []
+
+    for city, country in cities:
+        if text_query_error(city, country) is not None:
+            row_to_unique.append(len(unique))
+            unique.append((city, country))
+            continue
+        key = dedup_key(city, country)
+        position = index.get(key)
+        if position is None:
+            position = index[key] = len(unique)
+            unique.append((canonicalize(city), canonicalize(country)))
+        row_to_unique.append(position)
+
+    return DedupPlan(unique, row_to_unique)
+
+
+def fan_out(plan: DedupPlan, cities: List[tuple], unique_results: List[Dict]) -> List[Dict]:
+    """
+    将唯一查询的结果按原始行顺序展开
+
+    每行返回结果的浅拷贝，input_city/input_country为该行的原始输入；
+    唯一结果为ResultBatch时返回共享同一批次aws_info的ResultBatch。
+    """
+    if isinstance(unique_results, ResultBatch):
+        results = unique_results.empty_copy()
+        for (city, country), position in zip(cities, plan.row_to_unique):
+            results.append(unique_results[position].with_input(city, country))
+        return results
+
+    results = []
+    for (city, country), position in zip(cities, plan.row_to_unique):
+        results.append(dict(unique_results[position], input_city=city, input_country=country))
+    return results
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+批量任务进度日志
+只追加的JSONL日志，每行记录一个已完成输入行的结果（含input_row），
+批量刷新并按时间间隔fsync；任务中断后可从日志恢复，跳过已完成的行
+"""
+
+import json
+import os
+import time
+from typing import Dict, Optional
+
+
+class ProgressJournal:
+    def __init__(self, path: str, fsync_interval: Optional[float] = 1.0, flush_every: int = 100):
+        """
+        初始化进度日志
+
+        结果按输入顺序写入，因此已完成的行总是输入的一个前缀，
+        恢复时只需统计完整记录的行数，无需把已完成行号全部载入内存。
+
+        Args:
+            path: 日志文件路径（同时也是结果输出文件）
+            fsync_interval: fsync间隔（秒），0表示每次刷新都fsync，None表示不fsync
+            flush_every: 每写入多少条记录刷新一次文件缓冲
+        """
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.flush_every = flush_every
+
+        self._file = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+        self.records = 0
+        self.fsyncs = 0
+
+    def recover(self) -> int:
+        """
+        检查已有日志，截断崩溃时写了一半的末尾记录
+
+        Returns:
+            已完成的行数（下一个要处理的input_row）
+        """
+        if not os.path.exists(self.path):
+            return 0
+
+        completed = 0
+        good_end = 0
+        position = 0
+        with open(self.path, 'rb+') as f:
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                newline = chunk.rfind(b'\n')
+                if newline >= 0:
+                    completed += chunk.count(b'\n')
+                    good_end = position + newline + 1
+                position += len(chunk)
+
+            if good_end < position:
+                f.truncate(good_end)
+
+            if completed:
+                last_row = self._read_last_row(f, good_end)
+                if last_row != completed - 1:
+                    raise ValueError(f"进度日志与输入不一致: 共 {completed} 条记录，最后一条的input_row为 {last_row}")
+
+        return completed
+
+    @staticmethod
+    def _read_last_row(f, end: int) -> Optional[int]:
+        """读取最后一条完整记录的input_row"""
+        start = max(0, end - (1 << 16))
+        while True:
+            f.seek(start)
+            tail = f.read(end - start)
+            lines = tail[:-1].rsplit(b'\n', 1)
+            if len(lines) == 2 or start == 0:
+                break
+            start = max(0, start - (1 << 16))
+        return json.loads(lines[-1]).get('input_row')
+
+    def open(self, resume: bool = False):
+        """打开日志: resume为True时追加写入，否则覆盖"""
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        self._last_sync = time.monotonic()
+
+    def append(self, result: Dict):
+        """追加一条已完成行的结果"""
+        self._file.write(json.dumps(result, ensure_ascii=False, default=str))
+        self._file.write('\n')
+        self.records += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.checkpoint()
+
+    def checkpoint(self, force_sync: bool = False):
+        """刷新缓冲，距上次fsync超过fsync_interval时fsync"""
+        self._file.flush()
+        self._pending = 0
+        if self.fsync_interval is None and not force_sync:
+            return
+        now = time.monotonic()
+        if force_sync or now - self._last_sync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_sync = now
+            self.fsyncs += 1
+
+    def close(self):
+        """刷新并fsync剩余记录，关闭日志"""
+        if self._file is None:
+            return
+        self.checkpoint(force_sync=self.fsync_interval is not None)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+流式批量地理编码
+逐行读取CSV/JSONL输入，限制在途请求数，按输入顺序增量写出JSONL结果
+内存占用与输入大小无关，输出文件同时作为进度日志，中断后可用 --resume 继续
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from itertools import dropwhile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+
+from batch_journal import ProgressJournal
+from rate_limiter import TokenBucket
+
+CITY_FIELDS = ('city', 'city_name', 'name', '城市')
+COUNTRY_FIELDS = ('country', 'country_name', '国家')
+
+
+def _pick(record: Dict, fields: tuple) -> Optional[str]:
+    """按候选字段名取值"""
+    for field in fields:
+        value = record.get(field)
+        if value:
+            return value
+    return None
+
+
+def read_cities(input_file: str) -> Iterator[Tuple[int, str, Optional[str]]]:
+    """
+    逐行读取城市输入文件
+
+    支持的格式:
+    - JSONL（.jsonl/.ndjson）: 每行 {"city": ..., "country": ...}
+    - CSV/TSV: 带表头（city/country列）或无表头（第1列城市，第2列国家）
+
+    Yields:
+        (行号, 城市, 国家)，行号从0开始，只计数据行
+    """
+    lower = input_file.lower()
+    with open(input_file, 'r', encoding='utf-8', newline='') as f:
+        if lower.endswith(('.jsonl', '.ndjson')):
+            row = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                yield row, _pick(record, CITY_FIELDS), _pick(record, COUNTRY_FIELDS)
+                row += 1
+            return
+
+        delimiter = '\t' if lower.endswith('.tsv') else ','
+        reader = csv.reader(f, delimiter=delimiter)
+        first = next(reader, None)
+        if first is None:
+            return
+
+        header = [column.strip().lower() for column in first]
+        city_column = next((header.index(name) for name in CITY_FIELDS if name in header), None)
+        if city_column is None:
+            # 无表头: 第一行就是数据
+            city_column = 0
+            country_column = 1
+            rows = _chain_first(first, reader)
+        else:
+            country_column = next((header.index(name) for name in COUNTRY_FIELDS if name in header), None)
+            rows = reader
+
+        row = 0
+        for values in rows:
+            if not values:
+                continue
+            city = values[city_column].strip() if len(values) > city_column else ''
+            country = None
+            if country_column is not None and len(values) > country_column:
+                country = values[country_column].strip() or None
+            yield row, city, country
+            row += 1
+
+
+def _chain_first(first: list, reader) -> Iterator[list]:
+    """把已读取的第一行放回数据行前面"""
+    yield first
+    yield from reader
+
+
+class StreamingBatchGeocoder:
+    def __init__(self, service, max_workers: int = 8, max_in_flight: int = None,
+                 requests_per_second: float = None, flush_every: int = 100,
+                 fsync_interval: Optional[float] = 1.0):
+        """
+        初始化流式批量地理编码器
+
+        Args:
+            service: 地理编码服务（AmazonLocationServicePOC或兼容对象）
+            max_workers: 并发线程数
+            max_in_flight: 最大在途请求数（默认为max_workers的4倍），决定内存上限
+            requests_per_second: 每秒最大请求数（可选）
+            flush_every: 每写出多少条结果刷新一次输出文件
+            fsync_interval: 输出文件fsync间隔（秒），None表示不fsync
+        """
+        self.service = service
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight or max_workers * 4
+        self.requests_per_second = requests_per_second
+        self.flush_every = flush_every
+        self.fsync_interval = fsync_interval
+
+    def _geocode(self, limiter: Optional[TokenBucket], row: int, city: str, country: Optional[str]) -> Dict:
+        """处理单行输入"""
+        if limiter is not None:
+            limiter.acquire()
+        result = self.service.geocode_city(city, country)
+        return dict(result, input_row=row)
+
+    def iter_results(self, rows: Iterator[Tuple[int, str, Optional[str]]]) -> Iterator[Dict]:
+        """
+        流式地理编码，按输入顺序产出结果
+
+        在途请求超过max_in_flight时等待最早提交的请求完成，
+        因此同一时刻最多只有max_in_flight个结果驻留在内存中。
+        """
+        limiter = TokenBucket(self.requests_per_second) if self.requests_per_second else None
+        window = deque()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for row, city, country in rows:
+                window.append(executor.submit(self._geocode, limiter, row, city, country))
+                if len(window) >= self.max_in_flight:
+                    yield window.popleft().result()
+
+            while window:
+                yield window.popleft().result()
+
+    def run(self, input_file: str, output_file: str, resume: bool = False) -> Dict:
+        """
+        从输入文件流式地理编码并写出JSONL
+
+        Args:
+            input_file: 输入文件路径
+            output_file: 输出JSONL文件路径（同时作为进度日志）
+            resume: 从已有输出文件继续，跳过已完成的行
+
+        Returns:
+            处理统计信息
+        """
+        start_time = time.time()
+        total = 0
+        success_count = 0
+
+        journal = ProgressJournal(output_file, fsync_interval=self.fsync_interval, flush_every=self.flush_every)
+        skipped = journal.recover() if resume else 0
+        rows = read_cities(input_file)
+        if skipped:
+            rows = dropwhile(lambda item: item[0] < skipped, rows)
+
+        journal.open(resume=resume)
+        with journal:
+            for result in self.iter_results(rows):
+                journal.append(result)
+                total += 1
+                if result['success']:
+                    success_count += 1
+
+        elapsed = time.time() - start_time
+        return {
+            'input_file': input_file,
+            'output_file': output_file,
+            'rows': total,
+            'skipped_rows': skipped,
+            'success': success_count,
+            'fsyncs': journal.fsyncs,
+            'elapsed_seconds': elapsed,
+            'rows_per_second': total / elapsed if elapsed > 0 else 0.0
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式批量地理编码 (CSV/JSONL输入, JSONL输出)")
+    parser.add_argument('input', help="输入文件 (.csv/.tsv/.jsonl)")
+    parser.add_argument('output', help="输出JSONL文件")
+    parser.add_argument('--profile', default="oversea1", help="AWS profile名称")
+    parser.add_argument('--region', default="us-west-2", help="AWS区域")
+    parser.add_argument('--workers', type=int, default=8, help="并发线程数")
+    parser.add_argument('--max-in-flight', type=int, default=None, help="最大在途请求数")
+    parser.add_argument('--rps', type=float, default=10.0, help="每秒最大请求数")
+    parser.add_argument('--flush-every', type=int, default=100, help="每多少条结果刷新一次输出")
+    parser.add_argument('--fsync-interval', type=float, default=1.0, help="输出文件fsync间隔（秒）")
+    parser.add_argument('--resume', action='store_true', help="从已有输出文件继续，跳过已完成的行")
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="地理编码日志级别（INFO输出每行的查询结果，WARNING只输出失败）")
+    parser.add_argument('--log-json', action='store_true', help="日志每条记录输出一行JSON")
+    parser.add_argument('--columnar', default=None,
+                        help="处理完成后另存为列式文件（目录为npy格式，.npz/.arrow/.parquet按扩展名）")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"✗ 输入文件不存在: {args.input}")
+        sys.exit(1)
+
+    from geocode_logging import configure_logging
+    from location_service_poc import AmazonLocationServicePOC
+
+    # 日志在后台线程输出到stderr，不阻塞工作线程
+    configure_logging(getattr(logging, args.log_level), stream=sys.stderr, structured=args.log_json)
+
+    service = AmazonLocationServicePOC(profile_name=args.profile, region_name=args.region)
+    pipeline = StreamingBatchGeocoder(
+        service,
+        max_workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        requests_per_second=args.rps,
+        flush_every=args.flush_every,
+        fsync_interval=args.fsync_interval
+    )
+    stats = pipeline.run(args.input, args.output, resume=args.resume)
+
+    if stats['skipped_rows']:
+        print(f"\n✓ 已从进度日志恢复，跳过已完成的 {stats['skipped_rows']} 行")
+
+    print(f"\n流式批量处理完成: 成功 {stats['success']}/{stats['rows']} 行")
+    print(f"耗时: {stats['elapsed_seconds']:.1f}秒 ({stats['rows_per_second']:.1f} 行/秒)")
+    print(f"结果已写入: {stats['output_file']}")
+
+    if args.columnar:
+        from columnar_export import export_jsonl
+
+        rows = export_jsonl(stats['output_file'], args.columnar)
+        print(f"列式结果已写入: {args.columnar} ({rows} 行)")
+
+
+if __name__ == "__main__":
+    main()
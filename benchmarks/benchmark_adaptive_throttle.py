@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+自适应限流基准测试
+模拟账户配额有限的Location端点，对比固定速率（过高/过低）与AIMD自适应限流的成功率和吞吐量
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_location_client import FakeLocationClient
+from location_service_poc import AmazonLocationServicePOC
+from rate_limiter import AdaptiveRateLimiter
+
+
+def run(cities: list, quota: float, latency: float, workers: int,
+        requests_per_second: float, adaptive: bool) -> dict:
+    """运行一次并发批量地理编码，返回统计"""
+    client = FakeLocationClient(latency=latency, quota=quota)
+    rate_limiter = AdaptiveRateLimiter(initial_rate=requests_per_second, max_rate=quota * 4) if adaptive else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AmazonLocationServicePOC(location_client=client, rate_limiter=rate_limiter)
+        start = time.perf_counter()
+        results = service.batch_geocode_concurrent(cities, max_workers=workers,
+                                                   requests_per_second=requests_per_second)
+        elapsed = time.perf_counter() - start
+
+    success = sum(1 for r in results if r['success'])
+    return {
+        'elapsed': elapsed,
+        'success': success,
+        'throughput': success / elapsed,
+        'throttled': client.throttled,
+        'final_rate': rate_limiter.rate if rate_limiter else requests_per_second
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自适应限流基准测试")
+    parser.add_argument('--requests', type=int, default=600, help="请求数量")
+    parser.add_argument('--quota', type=float, default=50.0, help="模拟账户配额（请求/秒）")
+    parser.add_argument('--latency', type=float, default=0.02, help="模拟延迟（秒）")
+    parser.add_argument('--workers', type=int, default=16, help="并发线程数")
+    args = parser.parse_args()
+
+    cities = [(f"City{i}", "中国") for i in range(args.requests)]
+
+    print("=" * 60)
+    print(f"自适应限流基准测试 (配额 {args.quota:.0f} 请求/秒, {args.requests} 个请求)")
+    print("=" * 60)
+
+    scenarios = [
+        ("固定速率(过高)", args.quota * 2, False),
+        ("固定速率(过低)", args.quota * 0.4, False),
+        ("AIMD自适应", args.quota * 2, True),
+    ]
+    for label, rate, adaptive in scenarios:
+        stats = run(cities, args.quota, args.latency, args.workers, rate, adaptive)
+        print(f"{label:<10} 成功 {stats['success']:>4}/{args.requests}, 耗时 {stats['elapsed']:6.2f}秒, "
+              f"有效吞吐 {stats['throughput']:6.1f}/秒, 被限流 {stats['throttled']:>4} 次, "
+              f"最终速率 {stats['final_rate']:5.1f}/秒")
+
+
+if __name__ == "__main__":
+    main()
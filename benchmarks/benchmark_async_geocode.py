@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+异步地理编码基准测试
+使用进程内异步模拟端点验证AsyncLocationServicePOC的结果结构，并测量吞吐量
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_location_client import AsyncFakeLocationClient, FakeLocationClient
+from location_service_async import AsyncLocationServicePOC
+from location_service_poc import AmazonLocationServicePOC
+
+
+def schema(value):
+    """提取结果字典的键结构（忽略具体取值）"""
+    if isinstance(value, dict):
+        return {key: schema(item) for key, item in value.items()}
+    return None
+
+
+async def run_benchmark(count: int, latency: float, concurrency: int):
+    """运行基准测试并打印结果"""
+    cities = [(f"City{i}", "Country") for i in range(count)]
+    client = AsyncFakeLocationClient(latency=latency, no_result_texts=["City1, Country"])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync_service = AmazonLocationServicePOC(location_client=FakeLocationClient(
+            no_result_texts=["City1, Country"]
+        ))
+        expected = [sync_service.geocode_city(*cities[0]), sync_service.geocode_city(*cities[1]),
+                    sync_service.reverse_geocode(40.19, 116.41)]
+
+        async with AsyncLocationServicePOC(location_client=client, max_concurrency=concurrency) as service:
+            actual = [await service.geocode_city(*cities[0]), await service.geocode_city(*cities[1]),
+                      await service.reverse_geocode(40.19, 116.41)]
+
+            start = time.perf_counter()
+            batch = await service.batch_geocode(cities)
+            batch_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            streamed = [item async for item in service.iter_geocode(iter(cities))]
+            stream_time = time.perf_counter() - start
+
+    same_schema = all(schema(a) == schema(e) for a, e in zip(actual, expected))
+    in_order = [r['input_city'] for r in batch] == [c for c, _ in cities]
+    all_streamed = sorted(index for index, _ in streamed) == list(range(count))
+
+    print("=" * 60)
+    print("异步地理编码基准测试 (进程内模拟端点)")
+    print("=" * 60)
+    print(f"城市数量: {count}, 模拟延迟: {latency * 1000:.0f}ms, 最大并发: {concurrency}")
+    print(f"结果结构与同步版本一致: {'是' if same_schema else '否'}")
+    print(f"batch_geocode: {batch_time:.2f}秒, {count / batch_time:.1f} 请求/秒, 顺序一致: {'是' if in_order else '否'}")
+    print(f"iter_geocode: {stream_time:.2f}秒, {count / stream_time:.1f} 请求/秒, 全部产出: {'是' if all_streamed else '否'}")
+    print(f"观测到的最大并发请求数: {client.max_in_flight}")
+    print(f"理论顺序耗时: {count * latency:.2f}秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="异步地理编码基准测试")
+    parser.add_argument('--count', type=int, default=500, help="城市数量")
+    parser.add_argument('--latency', type=float, default=0.05, help="模拟延迟（秒）")
+    parser.add_argument('--concurrency', type=int, default=50, help="最大并发数")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.count, args.latency, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
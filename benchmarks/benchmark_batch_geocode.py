@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+批量地理编码基准测试
+使用模拟客户端对比顺序批量(batch_geocode)与并发批量(batch_geocode_concurrent)的吞吐量
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_location_client import FakeLocationClient
+from location_service_poc import AmazonLocationServicePOC
+
+
+def make_cities(count: int) -> list:
+    """生成测试城市列表"""
+    return [(f"City{i}", "Country") for i in range(count)]
+
+
+def run_benchmark(count: int, latency: float, max_workers: int, requests_per_second: float):
+    """运行基准测试并打印结果"""
+    cities = make_cities(count)
+    client = FakeLocationClient(latency=latency)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AmazonLocationServicePOC(location_client=client)
+
+        start = time.perf_counter()
+        sequential = service.batch_geocode(cities, delay=0)
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent = service.batch_geocode_concurrent(
+            cities, max_workers=max_workers, requests_per_second=requests_per_second
+        )
+        concurrent_time = time.perf_counter() - start
+
+    in_order = [r['input_city'] for r in concurrent] == [c for c, _ in cities]
+
+    print("=" * 60)
+    print("批量地理编码基准测试 (模拟客户端)")
+    print("=" * 60)
+    print(f"城市数量: {count}")
+    print(f"模拟延迟: {latency * 1000:.0f}ms")
+    print(f"并发线程: {max_workers}, 速率限制: {requests_per_second} 请求/秒")
+    print(f"顺序批量: {sequential_time:.2f}秒, {count / sequential_time:.1f} 请求/秒")
+    print(f"并发批量: {concurrent_time:.2f}秒, {count / concurrent_time:.1f} 请求/秒")
+    print(f"加速比: {sequential_time / concurrent_time:.1f}x")
+    print(f"结果顺序一致: {'是' if in_order else '否'}")
+    print(f"成功数: 顺序 {sum(r['success'] for r in sequential)}, 并发 {sum(r['success'] for r in concurrent)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量地理编码基准测试")
+    parser.add_argument('--count', type=int, default=200, help="城市数量")
+    parser.add_argument('--latency', type=float, default=0.05, help="模拟延迟（秒）")
+    parser.add_argument('--workers', type=int, default=16, help="并发线程数")
+    parser.add_argument('--rps', type=float, default=200.0, help="每秒最大请求数")
+    args = parser.parse_args()
+
+    run_benchmark(args.count, args.latency, args.workers, args.rps)
+
+
+if __name__ == "__main__":
+    main()
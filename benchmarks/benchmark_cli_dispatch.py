@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+CLI版本分派方式基准测试
+在本地模拟端点上对比 LocationServiceCLIPOC 进程内分派（共享botocore客户端）与每次查询启动子进程的单次查询开销。
+子进程方式用“启动Python解释器+创建botocore客户端+发出同一请求”近似 aws CLI 的启动开销（aws CLI本身即是Python+botocore），
+因此测得的是子进程方式的下限
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_connection_pool import REGION, start_endpoint
+from client_factory import get_client
+from location_service_cli_poc import LocationServiceCLIPOC
+
+# 子进程中执行的等价CLI调用
+_CLI_EQUIVALENT = """
+import sys, json, botocore.session
+from botocore.config import Config
+client = botocore.session.get_session().create_client(
+    'location', region_name=sys.argv[2], endpoint_url=sys.argv[1], config=Config(inject_host_prefix=False))
+print(json.dumps(client.search_place_index_for_text(IndexName='CityGeocodingIndex', Text=sys.argv[3], MaxResults=1)))
+"""
+
+
+def time_inprocess(endpoint_url: str, queries: int) -> list:
+    """进程内分派的单次查询耗时（秒）"""
+    client = get_client('location', None, REGION, endpoint_url=endpoint_url, inject_host_prefix=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = LocationServiceCLIPOC(profile_name='benchmark', region_name=REGION, health_check=False,
+                                        location_client=client)
+        timings = []
+        for i in range(queries):
+            start = time.perf_counter()
+            result = service.geocode_city(f"City{i}", "中国")
+            timings.append(time.perf_counter() - start)
+            assert result['success'], result
+    return timings
+
+
+def time_subprocess(endpoint_url: str, queries: int) -> list:
+    """每次查询启动一个子进程的单次查询耗时（秒）"""
+    timings = []
+    for i in range(queries):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', _CLI_EQUIVALENT, endpoint_url, REGION, f"City{i}, 中国"],
+                       capture_output=True, text=True, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list):
+    print(f"{label:<10} p50 {statistics.median(timings) * 1000:8.1f}ms, "
+          f"平均 {statistics.mean(timings) * 1000:8.1f}ms, {len(timings) / sum(timings):7.1f} 查询/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI版本分派方式基准测试")
+    parser.add_argument('--queries', type=int, default=200, help="进程内分派的查询数量")
+    parser.add_argument('--subprocess-queries', type=int, default=10, help="子进程方式的查询数量")
+    parser.add_argument('--latency', type=float, default=0.0, help="端点处理延迟（秒）")
+    args = parser.parse_args()
+
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    process, port, _ = start_endpoint(args.latency, 0.0)
+    endpoint_url = f"http://127.0.0.1:{port}"
+
+    print("=" * 60)
+    print(f"CLI版本分派方式基准测试 (端点延迟 {args.latency * 1000:.0f}ms)")
+    print("=" * 60)
+
+    inprocess = time_inprocess(endpoint_url, args.queries)
+    spawned = time_subprocess(endpoint_url, args.subprocess_queries)
+    report("进程内分派", inprocess)
+    report("子进程", spawned)
+    print(f"单次查询开销降低 {statistics.median(spawned) / statistics.median(inprocess):.0f} 倍")
+
+    process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+CLI版本并行批量基准测试
+在PATH前部放置一个模拟的 aws 可执行文件（固定延迟后输出一条搜索结果），
+对比 LocationServiceCLIPOC（subprocess模式）逐条执行的 batch_geocode 与并行的 batch_geocode_parallel
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import stat
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from location_service_cli_poc import LocationServiceCLIPOC
+
+_FAKE_RESPONSE = {
+    'Summary': {'DataSource': 'Esri'},
+    'Results': [{
+        'Place': {'Label': 'Fake City', 'Geometry': {'Point': [116.4, 39.9]}, 'Country': 'CHN'},
+        'Relevance': 1.0
+    }]
+}
+
+
+def install_fake_aws(directory: str, latency: float):
+    """在directory中创建模拟的aws命令"""
+    path = os.path.join(directory, 'aws')
+    with open(path, 'w') as f:
+        f.write("#!/bin/sh\n")
+        f.write(f"sleep {latency}\n")
+        f.write(f"echo '{json.dumps(_FAKE_RESPONSE)}'\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def run(cities: list, parallel: bool, workers: int, rps: float) -> tuple:
+    """返回(耗时, 结果列表)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = LocationServiceCLIPOC(dispatch='subprocess', health_check=False)
+        start = time.perf_counter()
+        if parallel:
+            results = service.batch_geocode_parallel(cities, max_workers=workers, requests_per_second=rps)
+        else:
+            results = service.batch_geocode(cities, delay=0)
+        elapsed = time.perf_counter() - start
+    return elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI版本并行批量基准测试")
+    parser.add_argument('--cities', type=int, default=40, help="城市数量")
+    parser.add_argument('--latency', type=float, default=0.3, help="模拟aws命令耗时（秒，含进程启动和网络往返）")
+    parser.add_argument('--rps', type=float, default=50.0, help="并行模式的速率限制")
+    args = parser.parse_args()
+
+    cities = [(f"City{i}", "中国") for i in range(args.cities)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        install_fake_aws(directory, args.latency)
+        os.environ['PATH'] = directory + os.pathsep + os.environ.get('PATH', '')
+
+        print("=" * 60)
+        print(f"CLI版本并行批量基准测试 ({args.cities} 个城市, 单条命令 {args.latency * 1000:.0f}ms)")
+        print("=" * 60)
+
+        elapsed, baseline = run(cities, False, 1, args.rps)
+        print(f"逐条执行(无间隔)   耗时 {elapsed:6.2f}秒, {args.cities / elapsed:6.1f} 城市/秒")
+        for workers in (4, 8, 16):
+            elapsed, results = run(cities, True, workers, args.rps)
+            ordered = [r['input_city'] for r in results] == [city for city, _ in cities]
+            print(f"并行 {workers:>2} 个进程      耗时 {elapsed:6.2f}秒, {args.cities / elapsed:6.1f} 城市/秒, "
+                  f"成功 {sum(r['success'] for r in results)}/{args.cities}, 顺序{'一致' if ordered else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
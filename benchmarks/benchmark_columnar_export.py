@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+列式导出基准测试
+对相同的批量结果比较输出格式的文件大小、写入耗时，以及分析任务重新读取并计算
+平均纬度和各国家行数的耗时：缩进JSON（演示程序原来的输出）、JSONL、NumPy目录格式（内存映射）、
+.npz，安装pyarrow时另外比较Arrow IPC和Parquet
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columnar_export import ColumnarBuilder, export_columnar, load_columnar, pa
+from fake_location_client import KNOWN_PLACES, FakeLocationClient
+from geocode_results import ResultBatch, build_aws_info, build_geocode_error, build_geocode_result
+
+
+def make_results(rows: int) -> ResultBatch:
+    """生成批量结果（每20个查询中有一个无结果），保存为紧凑记录"""
+    client = FakeLocationClient(no_result_texts=[f"City{i}, 中国" for i in range(0, 1000, 20)])
+    texts = list(KNOWN_PLACES) + [f"City{i}, 中国" for i in range(1000)]
+    batch = ResultBatch('oversea1', 'us-west-2')
+    for i in range(rows):
+        text = texts[i % len(texts)]
+        city, country = text.split(', ')
+        response = client.search_place_index_for_text('CityGeocodingIndex', text)
+        if response['Results']:
+            result = build_geocode_result(city, country, text, response, 0.05,
+                                          build_aws_info('oversea1', 'us-west-2', 'CityGeocodingIndex'))
+        else:
+            result = build_geocode_error(city, country, '未找到匹配的城市',
+                                         build_aws_info('oversea1', 'us-west-2', 'CityGeocodingIndex', False))
+        batch.add(result)
+    return batch
+
+
+def size_of(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def analyze_dicts(results) -> tuple:
+    latitudes = [r['coordinates']['latitude'] for r in results if r['success']]
+    countries = Counter(r['address']['country'] for r in results if r['success'])
+    return sum(latitudes) / len(latitudes), countries
+
+
+def analyze_columnar(columnar) -> tuple:
+    success = np.asarray(columnar.column('success'))
+    latitude = float(np.nanmean(columnar.column('latitude')))
+    codes = np.asarray(columnar.codes('country'))[success]
+    counts = np.bincount(codes, minlength=len(columnar.dictionaries['country']))
+    return latitude, Counter(dict(zip(columnar.dictionaries['country'], counts.tolist())))
+
+
+def write_json(results, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'batch_results': results.to_dicts()}, f, ensure_ascii=False, indent=2, default=str)
+
+
+def load_json(path: str):
+    with open(path, encoding='utf-8') as f:
+        return analyze_dicts(json.load(f)['batch_results'])
+
+
+def write_jsonl(results, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in results:
+            f.write(json.dumps(record.to_dict(), ensure_ascii=False, default=str))
+            f.write('\n')
+
+
+def load_jsonl(path: str):
+    with open(path, encoding='utf-8') as f:
+        return analyze_dicts([json.loads(line) for line in f])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列式导出基准测试")
+    parser.add_argument('--rows', type=int, default=200000, help="结果行数")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("列式导出基准测试")
+    print("=" * 60)
+    print(f"结果行数: {args.rows}")
+
+    results = make_results(args.rows)
+    directory = tempfile.mkdtemp(prefix='columnar-bench-')
+
+    cases = [
+        ('JSON (indent=2)', 'results.json', write_json, load_json),
+        ('JSONL', 'results.jsonl', write_jsonl, load_jsonl),
+        ('NumPy目录 (mmap)', 'results_npy', export_columnar, lambda p: analyze_columnar(load_columnar(p))),
+        ('NumPy .npz', 'results.npz', export_columnar, lambda p: analyze_columnar(load_columnar(p)))
+    ]
+    if pa is not None:
+        cases.append(('Arrow IPC (mmap)', 'results.arrow', export_columnar,
+                      lambda p: analyze_columnar(load_columnar(p))))
+        cases.append(('Parquet', 'results.parquet', export_columnar, lambda p: analyze_columnar(load_columnar(p))))
+    else:
+        print("未安装pyarrow，跳过Arrow/Parquet")
+
+    try:
+        print(f"\n{'格式':<18} {'大小':>10} {'写入':>9} {'读取+分析':>10}")
+        expected = None
+        for name, filename, write, load in cases:
+            path = os.path.join(directory, filename)
+            start = time.perf_counter()
+            write(results, path)
+            write_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            latitude, countries = load(path)
+            load_seconds = time.perf_counter() - start
+
+            if expected is None:
+                expected = (latitude, countries)
+            consistent = abs(latitude - expected[0]) < 1e-9 and countries == expected[1]
+            print(f"{name:<18} {size_of(path) / 2**20:8.1f}MB {write_seconds:8.2f}s {load_seconds:9.3f}s"
+                  f"{'' if consistent else '  结果不一致!'}")
+
+        start = time.perf_counter()
+        ColumnarBuilder().extend(results)
+        print(f"\n按列累积: {(time.perf_counter() - start) / args.rows * 1e6:.2f}微秒/行")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
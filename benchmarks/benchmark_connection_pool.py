@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+连接池基准测试
+在本地HTTP模拟端点（独立进程）上用真实boto3客户端并发查询，对比默认客户端配置（连接池10）、
+客户端工厂的共享客户端（更大的连接池+keep-alive）和每次请求新建客户端的吞吐量与新建TCP连接数
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import boto3
+from botocore.config import Config
+
+from client_factory import get_client
+from fake_location_client import FakeLocationClient
+from location_service_poc import AmazonLocationServicePOC
+
+# 本地端点不校验签名，使用占位凭证
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+
+REGION = 'us-west-2'
+
+
+class _EndpointHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # 模拟新建连接的握手开销（TLS握手等）
+        with self.server.connections.get_lock():
+            self.server.connections.value += 1
+        if self.server.handshake > 0:
+            time.sleep(self.server.handshake)
+        super().setup()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+        if self.path.endswith('/list-indexes'):
+            # 健康检查（list-place-indexes）
+            response = {'Entries': [{'IndexName': 'CityGeocodingIndex', 'DataSource': 'Esri',
+                                     'CreateTime': '2024-01-01T00:00:00Z', 'UpdateTime': '2024-01-01T00:00:00Z',
+                                     'Description': ''}]}
+        elif self.path.endswith('/search/text'):
+            response = self.server.fake.search_place_index_for_text(IndexName=self._index_name(), **body)
+        else:
+            response = self.server.fake.search_place_index_for_position(IndexName=self._index_name(), **body)
+
+        payload = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _index_name(self) -> str:
+        return unquote(self.path.split('/')[4])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(latency: float, handshake: float, connections, port):
+    """端点进程：与客户端分开运行，避免两者争用同一个GIL"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _EndpointHandler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    server.fake = FakeLocationClient()
+    server.latency = latency
+    server.handshake = handshake
+    server.connections = connections
+    port.value = server.server_port
+    server.serve_forever()
+
+
+def start_endpoint(latency: float, handshake: float) -> tuple:
+    """在子进程中启动本地模拟Location端点，返回(进程, 端口, 连接计数)"""
+    connections = multiprocessing.Value('i', 0)
+    port = multiprocessing.Value('i', 0)
+    process = multiprocessing.Process(target=_serve, args=(latency, handshake, connections, port), daemon=True)
+    process.start()
+    while port.value == 0:
+        time.sleep(0.01)
+    return process, port.value, connections
+
+
+class _PerRequestClient:
+    """每次调用都新建会话和客户端（对照组）"""
+
+    def __init__(self, endpoint_url: str):
+        self.endpoint_url = endpoint_url
+
+    def search_place_index_for_text(self, **params):
+        client = boto3.Session().client('location', region_name=REGION, endpoint_url=self.endpoint_url,
+                                        config=Config(inject_host_prefix=False))
+        return client.search_place_index_for_text(**params)
+
+
+def run(connections, client, requests: int, workers: int) -> tuple:
+    """返回(耗时, 新建连接数)"""
+    cities = [(f"City{i}", "中国") for i in range(requests)]
+    connections.value = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AmazonLocationServicePOC(location_client=client)
+        start = time.perf_counter()
+        service.batch_geocode_concurrent(cities, max_workers=workers, requests_per_second=1e9)
+        elapsed = time.perf_counter() - start
+    return elapsed, connections.value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="连接池基准测试")
+    parser.add_argument('--requests', type=int, default=1000, help="请求数量")
+    parser.add_argument('--workers', type=int, default=32, help="并发线程数")
+    parser.add_argument('--latency', type=float, default=0.05, help="端点处理延迟（秒）")
+    parser.add_argument('--handshake', type=float, default=0.02, help="新建连接的模拟握手开销（秒）")
+    args = parser.parse_args()
+
+    # 连接池已满时urllib3会为每个被丢弃的连接打印警告
+    logging.getLogger('urllib3').setLevel(logging.ERROR)
+
+    process, port, connections = start_endpoint(args.latency, args.handshake)
+    endpoint_url = f"http://127.0.0.1:{port}"
+
+    print("=" * 60)
+    print(f"连接池基准测试 ({args.requests} 个请求, {args.workers} 线程, 握手 {args.handshake * 1000:.0f}ms)")
+    print("=" * 60)
+
+    scenarios = [
+        # 新建客户端本身很慢，只跑十分之一的请求
+        ("默认配置(池10)", args.requests, lambda: boto3.Session().client(
+            'location', region_name=REGION, endpoint_url=endpoint_url, config=Config(inject_host_prefix=False))),
+        ("客户端工厂", args.requests, lambda: get_client(
+            'location', None, REGION, endpoint_url=endpoint_url,
+            max_pool_connections=max(args.workers, 50), inject_host_prefix=False)),
+        ("每次新建客户端", max(1, args.requests // 10), lambda: _PerRequestClient(endpoint_url)),
+    ]
+    for label, requests, make_client in scenarios:
+        elapsed, opened = run(connections, make_client(), requests, args.workers)
+        print(f"{label:<12} {requests:>5} 请求, 耗时 {elapsed:6.2f}秒, {requests / elapsed:7.1f} 请求/秒, "
+              f"新建连接 {opened}")
+
+    process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+统一地理编码门面后端组合基准测试
+用确定性模拟后端代替Location Service，在“热门城市+长尾城市”的混合负载上对比不同后端链的吞吐量和各后端命中分布
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geocoder import CacheBackend, FakeBackend, Geocoder, OfflineBackend
+from offline_gazetteer import load_sample_gazetteer
+
+HOT_CITIES = [("北京", "中国"), ("上海", "中国"), ("New York", "United States"), ("London", "United Kingdom"),
+              ("Tokyo", "Japan"), ("Paris", "France")]
+
+
+def make_workload(requests: int, hot_ratio: float, seed: int) -> list:
+    """热门城市（离线地名库可以解析）与长尾城市（只有远程后端能解析）的混合负载"""
+    rng = random.Random(seed)
+    return [
+        rng.choice(HOT_CITIES) if rng.random() < hot_ratio else (f"Town{rng.randrange(requests // 4)}", "Nowhere")
+        for _ in range(requests)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统一地理编码门面后端组合基准测试")
+    parser.add_argument('--requests', type=int, default=2000, help="请求数量")
+    parser.add_argument('--hot-ratio', type=float, default=0.6, help="热门城市占比")
+    parser.add_argument('--latency', type=float, default=0.005, help="模拟远程后端延迟（秒）")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    workload = make_workload(args.requests, args.hot_ratio, args.seed)
+    gazetteer = load_sample_gazetteer()
+
+    chains = {
+        'fake': lambda: [FakeBackend(args.latency)],
+        'cache,fake': lambda: [CacheBackend(), FakeBackend(args.latency)],
+        'offline,fake': lambda: [OfflineBackend(gazetteer), FakeBackend(args.latency)],
+        'cache,offline,fake': lambda: [CacheBackend(), OfflineBackend(gazetteer), FakeBackend(args.latency)],
+    }
+
+    print("=" * 60)
+    print(f"后端组合基准测试 ({args.requests} 个请求, 热门占比 {args.hot_ratio:.0%}, "
+          f"远程延迟 {args.latency * 1000:.0f}ms)")
+    print("=" * 60)
+
+    for label, make_backends in chains.items():
+        geocoder = Geocoder(make_backends())
+        start = time.perf_counter()
+        results = geocoder.batch_geocode(workload)
+        elapsed = time.perf_counter() - start
+        hits = ', '.join(f"{name} {stats['hits']}" for name, stats in geocoder.stats().items())
+        success = sum(r['success'] for r in results)
+        print(f"{label:<20} {args.requests / elapsed:8.0f} 请求/秒, 成功 {success}/{args.requests}, 命中: {hits}")
+
+
+if __name__ == "__main__":
+    main()
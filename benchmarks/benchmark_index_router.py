@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+多索引路由基准测试
+每个Place Index对应一个模拟客户端：Esri索引间歇返回500错误，HERE索引较慢，Grab索引只覆盖东南亚。
+对比固定单索引、只做故障转移（不按统计调整）和按延迟/质量统计调整顺序的路由器的成功率、延迟和各索引请求数
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_location_client import FakeLocationClient
+from index_router import ESRI_INDEX, GRAB_INDEX, HERE_INDEX, IndexRouter
+from location_service_poc import AmazonLocationServicePOC
+
+# 模拟部署中三个索引都已创建（Grab可用），东南亚查询优先使用Grab
+INDEXES = [ESRI_INDEX, HERE_INDEX, GRAB_INDEX]
+
+CITIES = [("北京", "中国"), ("New York", "United States"), ("London", "United Kingdom"), ("Tokyo", "Japan"),
+          ("Singapore", "新加坡"), ("Bangkok", "Thailand"), ("Jakarta", "Indonesia"), ("Hanoi", "Vietnam")]
+
+
+class MultiIndexClient:
+    """按IndexName分派到不同模拟客户端"""
+
+    def __init__(self, clients: dict):
+        self.clients = clients
+
+    def search_place_index_for_text(self, IndexName: str, **params):
+        return self.clients[IndexName].search_place_index_for_text(IndexName=IndexName, **params)
+
+    def search_place_index_for_position(self, IndexName: str, **params):
+        return self.clients[IndexName].search_place_index_for_position(IndexName=IndexName, **params)
+
+
+def make_client(seed: int, latency: float, esri_failure_rate: float) -> MultiIndexClient:
+    random.seed(seed)
+    return MultiIndexClient({
+        ESRI_INDEX: FakeLocationClient(latency=latency, failure_rate=esri_failure_rate),
+        HERE_INDEX: FakeLocationClient(latency=latency * 3, data_source='Here'),
+        GRAB_INDEX: FakeLocationClient(latency=latency, data_source='Grab'),
+    })
+
+
+def run(label: str, client: MultiIndexClient, requests: int, router=None, place_index_name=ESRI_INDEX):
+    cities = [CITIES[i % len(CITIES)] for i in range(requests)]
+    latencies = []
+    success = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AmazonLocationServicePOC(location_client=client, index_router=router)
+        service.place_index_name = place_index_name
+        for city, country in cities:
+            start = time.perf_counter()
+            result = service.geocode_city(city, country)
+            latencies.append(time.perf_counter() - start)
+            success += result['success']
+
+    calls = ', '.join(f"{name.split('-')[-1]} {c.total_calls}" for name, c in client.clients.items())
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(f"{label:<14} 成功 {success}/{requests}, p50 {statistics.median(latencies) * 1000:6.1f}ms, "
+          f"p95 {p95 * 1000:6.1f}ms, 请求: {calls}")
+    if router is not None:
+        print(f"{'':<14} 故障转移 {router.failovers} 次")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多索引路由基准测试")
+    parser.add_argument('--requests', type=int, default=400, help="请求数量")
+    parser.add_argument('--latency', type=float, default=0.005, help="Esri/Grab模拟延迟（秒），HERE为3倍")
+    parser.add_argument('--esri-failure-rate', type=float, default=0.6, help="Esri索引的500错误比例")
+    parser.add_argument('--seed', type=int, default=7, help="随机种子")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"多索引路由基准测试 ({args.requests} 个请求, Esri错误率 {args.esri_failure_rate:.0%})")
+    print("=" * 60)
+
+    run("固定Esri索引", make_client(args.seed, args.latency, args.esri_failure_rate), args.requests)
+    run("仅故障转移", make_client(args.seed, args.latency, args.esri_failure_rate), args.requests,
+        IndexRouter(min_samples=10 ** 9, available_indexes=INDEXES))
+    run("统计反馈路由", make_client(args.seed, args.latency, args.esri_failure_rate), args.requests,
+        IndexRouter(available_indexes=INDEXES))
+
+
+if __name__ == "__main__":
+    main()
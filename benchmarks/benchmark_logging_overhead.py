@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+日志开销基准测试
+在零延迟模拟客户端上比较每请求输出方式的开销：旧版逐行print（模拟）、同步日志、
+队列日志（文本/JSON）、关闭请求记录和库默认的静默模式。
+输出写入模拟终端：每次写出换行时阻塞固定时间（终端渲染、管道背压），--write-latency 0时为空设备；
+队列模式分别给出请求线程耗时和包含后台线程输出完队列的总耗时
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geocode_logging
+from fake_location_client import FakeLocationClient
+from location_service_poc import AmazonLocationServicePOC
+
+
+class TerminalSink:
+    """模拟终端输出：行缓冲，每次写出换行时阻塞write_latency秒"""
+
+    def __init__(self, write_latency: float):
+        self.write_latency = write_latency
+
+    def write(self, text: str) -> int:
+        if self.write_latency and '\n' in text:
+            time.sleep(self.write_latency)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class PrintingLocationServicePOC(AmazonLocationServicePOC):
+    """按旧版方式每请求逐行print（用于对比）"""
+
+    def geocode_city(self, city_name, country=None, max_results=1):
+        print(f"\n--- 查询城市: {city_name} ---")
+        result = super().geocode_city(city_name, country, max_results)
+        if result['success']:
+            print(f"✓ 查询成功")
+            print(f"  坐标: ({result['coordinates']['latitude']:.6f}, {result['coordinates']['longitude']:.6f})")
+            print(f"  地址: {result['address']['label']}")
+            print(f"  相关性: {result['metadata']['relevance']:.2f}")
+            print(f"  响应时间: {result['metadata']['response_time_seconds']:.2f}秒")
+        else:
+            print(f"✗ 查询失败: {result['error']}")
+        return result
+
+
+def run(service_class, cities, threads: int) -> float:
+    """运行一轮查询，返回请求线程总耗时（秒）"""
+    service = service_class(location_client=FakeLocationClient())
+    start = time.perf_counter()
+    if threads == 1:
+        for city, country in cities:
+            service.geocode_city(city, country)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda item: service.geocode_city(*item), cities))
+    return time.perf_counter() - start
+
+
+def measure(name: str, cities, threads: int, sink, baseline: float = None, **logging_options) -> float:
+    """
+    按指定日志配置运行并打印结果
+
+    Args:
+        logging_options: configure_logging参数；为None时不配置（库默认静默），
+            包含'print'时使用旧版逐行print
+    """
+    service_class = AmazonLocationServicePOC
+    stdout = sys.stdout
+    if logging_options.pop('print', False):
+        service_class = PrintingLocationServicePOC
+        sys.stdout = sink
+    elif logging_options.pop('configure', True):
+        geocode_logging.configure_logging(stream=sink, **logging_options)
+
+    try:
+        elapsed = run(service_class, cities, threads)
+        start = time.perf_counter()
+        geocode_logging.shutdown_logging()
+        drained = time.perf_counter() - start
+    finally:
+        sys.stdout = stdout
+
+    per_request = elapsed / len(cities) * 1e6
+    line = f"{name:<22} {per_request:8.2f}微秒/次"
+    if baseline:
+        line += f" ({baseline / elapsed:5.1f}x)"
+    if drained > 0.001:
+        line += f"  含后台输出: {(elapsed + drained) / len(cities) * 1e6:.2f}微秒/次"
+    print(line)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日志开销基准测试")
+    parser.add_argument('--requests', type=int, default=20000, help="请求数量")
+    parser.add_argument('--threads', type=int, default=4, help="并发线程数")
+    parser.add_argument('--write-latency', type=float, default=0.00005, help="模拟终端每次写出的阻塞时间（秒）")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("日志开销基准测试")
+    print("=" * 60)
+    print(f"请求数量: {args.requests}, 并发线程: {args.threads}, 模拟写出阻塞: {args.write_latency * 1e6:.0f}微秒")
+
+    cities = [(f"City{i % 100}", "中国") for i in range(args.requests)]
+    sink = TerminalSink(args.write_latency)
+    baseline = measure("print (旧版)", cities, args.threads, sink, print=True)
+    measure("同步日志", cities, args.threads, sink, baseline, queued=False)
+    measure("队列日志", cities, args.threads, sink, baseline)
+    measure("队列日志 (JSON)", cities, args.threads, sink, baseline, structured=True)
+    measure("WARNING级别", cities, args.threads, sink, baseline, level=logging.WARNING)
+    measure("关闭请求记录", cities, args.threads, sink, baseline, request_records=False)
+    measure("默认静默", cities, args.threads, sink, baseline, configure=False)
+
+
+if __name__ == "__main__":
+    main()
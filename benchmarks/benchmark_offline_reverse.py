@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+离线反向地理编码基准测试
+在合成城市数据上测量KD树向量化批量查询的吞吐量，并与暴力搜索结果核对
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from offline_gazetteer import OfflineGazetteer
+from offline_reverse_geocoder import OfflineReverseGeocoder, _to_unit_vectors
+
+
+def make_gazetteer(count: int, rng) -> OfflineGazetteer:
+    """生成在球面上均匀分布的合成城市"""
+    gazetteer = OfflineGazetteer(data_source="Synthetic")
+    latitudes = np.degrees(np.arcsin(rng.uniform(-1, 1, count)))
+    longitudes = rng.uniform(-180, 180, count)
+    for i, (lat, lon) in enumerate(zip(latitudes.tolist(), longitudes.tolist())):
+        gazetteer.add_city(f"City{i}", lat, lon, 'XX', geoname_id=i)
+    return gazetteer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线反向地理编码基准测试")
+    parser.add_argument('--cities', type=int, default=26000, help="城市数量（cities15000约为26000）")
+    parser.add_argument('--points', type=int, default=1000000, help="查询点数量")
+    parser.add_argument('--leaf-size', type=int, default=128, help="KD树叶子大小")
+    parser.add_argument('--verify', type=int, default=2000, help="与暴力搜索核对的点数")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    gazetteer = make_gazetteer(args.cities, rng)
+
+    start = time.perf_counter()
+    geocoder = OfflineReverseGeocoder(gazetteer, leaf_size=args.leaf_size)
+    build_time = time.perf_counter() - start
+
+    latitudes = rng.uniform(-90, 90, args.points)
+    longitudes = rng.uniform(-180, 180, args.points)
+
+    start = time.perf_counter()
+    rows, _ = geocoder.query(latitudes, longitudes)
+    query_time = time.perf_counter() - start
+
+    cities = _to_unit_vectors(np.frombuffer(gazetteer.latitudes), np.frombuffer(gazetteer.longitudes))
+    sample = _to_unit_vectors(latitudes[:args.verify], longitudes[:args.verify])
+    expected = np.array([((cities - point) ** 2).sum(axis=1).argmin() for point in sample])
+    accuracy = (expected == rows[:args.verify]).mean()
+
+    print("=" * 60)
+    print("离线反向地理编码基准测试 (KD树, 单核)")
+    print("=" * 60)
+    print(f"城市数量: {args.cities}, 叶子节点: {geocoder.leaf_count}, 构建耗时: {build_time:.2f}秒")
+    print(f"查询点数: {args.points}, 耗时: {query_time:.2f}秒")
+    print(f"吞吐量: {args.points / query_time * 60 / 1e6:.1f} 百万点/分钟")
+    print(f"与暴力搜索一致: {accuracy:.2%} ({args.verify} 个点)")
+
+
+if __name__ == "__main__":
+    main()
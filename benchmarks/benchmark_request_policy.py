@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+请求策略基准测试
+在注入长尾延迟和随机服务端错误的模拟客户端上，对比无策略、超时+重试、对冲请求的
+p50/p95/p99延迟、成功率和额外的上游请求数
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_location_client import FakeLocationClient, make_latency
+from location_service_poc import AmazonLocationServicePOC
+from request_policy import RequestPolicy
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def run(requests: int, workers: int, latency, failure_rate: float, policy) -> dict:
+    """并发执行requests次地理编码，返回延迟分位数等统计"""
+    client = FakeLocationClient(latency=latency, failure_rate=failure_rate)
+    cities = [(f"City{i}", "中国") for i in range(requests)]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AmazonLocationServicePOC(location_client=client, request_policy=policy)
+
+        def timed(item):
+            start = time.perf_counter()
+            result = service.geocode_city(*item)
+            return time.perf_counter() - start, result['success']
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            samples = list(executor.map(timed, cities))
+
+    if policy is not None:
+        policy.close()
+
+    latencies = sorted(latency for latency, _ in samples)
+    return {
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'success': sum(1 for _, ok in samples if ok),
+        'upstream_calls': client.total_calls
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="请求策略基准测试")
+    parser.add_argument('--requests', type=int, default=2000, help="请求数量")
+    parser.add_argument('--workers', type=int, default=32, help="并发线程数")
+    parser.add_argument('--distribution', choices=['bimodal', 'lognormal'], default='bimodal', help="延迟分布")
+    parser.add_argument('--base-latency', type=float, default=0.02, help="典型延迟（秒）")
+    parser.add_argument('--tail-latency', type=float, default=1.0, help="长尾延迟（秒，bimodal）")
+    parser.add_argument('--tail-ratio', type=float, default=0.03, help="长尾请求比例（bimodal）")
+    parser.add_argument('--failure-rate', type=float, default=0.01, help="服务端错误比例")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    latency = make_latency(args.distribution, args.base_latency, args.tail_latency, args.tail_ratio)
+
+    print("=" * 60)
+    print(f"请求策略基准测试 ({args.distribution}, {args.requests} 个请求, 错误率 {args.failure_rate:.1%})")
+    print("=" * 60)
+
+    scenarios = [
+        ("无策略", lambda: None),
+        ("超时+重试", lambda: RequestPolicy(attempt_timeout=args.base_latency * 10, max_retries=2)),
+        ("对冲", lambda: RequestPolicy(hedge=True, max_retries=2)),
+        ("超时+重试+对冲", lambda: RequestPolicy(attempt_timeout=args.base_latency * 10, max_retries=2, hedge=True)),
+    ]
+    for label, make_policy in scenarios:
+        random.seed(args.seed)
+        stats = run(args.requests, args.workers, latency, args.failure_rate, make_policy())
+        extra = stats['upstream_calls'] / args.requests - 1
+        print(f"{label:<10} p50 {stats['p50'] * 1000:7.1f}ms  p95 {stats['p95'] * 1000:7.1f}ms  "
+              f"p99 {stats['p99'] * 1000:7.1f}ms  成功 {stats['success']}/{args.requests}  "
+              f"额外上游请求 {extra:+.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+结果内存基准测试
+对相同的批量结果比较两种表示的内存占用：每行一个嵌套字典（aws_info和时间戳每行一份）
+与ResultBatch紧凑记录（__slots__，aws_info每批一份），并测量构建和按需转换为字典的耗时。
+响应按行用json.loads解析，与botocore一样每行得到独立的字符串和浮点数对象；
+每种表示在独立的子进程中构建，按峰值RSS的增量计算内存（Linux）
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_location_client import FakeLocationClient
+from geocode_results import ResultBatch, build_aws_info, build_geocode_error, build_geocode_result
+
+PROFILE = 'oversea1'
+REGION = 'us-west-2'
+PLACE_INDEX = 'CityGeocodingIndex'
+
+
+def make_templates(count: int = 100):
+    """生成不同城市的响应JSON模板，每20个中有一个无结果"""
+    client = FakeLocationClient(no_result_texts=[f"City{i}, 中国" for i in range(0, count, 20)])
+    templates = []
+    for i in range(count):
+        text = f"City{i}, 中国"
+        templates.append((f"City{i}", text, json.dumps(client.search_place_index_for_text(PLACE_INDEX, text))))
+    return templates
+
+
+def iter_results(rows: int, templates):
+    """逐行生成与geocode_city相同结构的结果字典"""
+    for i in range(rows):
+        city, text, template = templates[i % len(templates)]
+        response = json.loads(template)
+        if response['Results']:
+            yield build_geocode_result(city, '中国', text, response, 0.05,
+                                       build_aws_info(PROFILE, REGION, PLACE_INDEX))
+        else:
+            yield build_geocode_error(city, '中国', '未找到匹配的城市',
+                                      build_aws_info(PROFILE, REGION, PLACE_INDEX, timestamp=False))
+
+
+def build_dicts(rows: int, templates):
+    return list(iter_results(rows, templates))
+
+
+def build_compact(rows: int, templates):
+    batch = ResultBatch(PROFILE, REGION)
+    for result in iter_results(rows, templates):
+        batch.add(result)
+    return batch
+
+
+def _run(build, rows: int, templates, output):
+    """子进程：构建结果并返回峰值RSS增量、构建耗时、转换耗时和前若干行的字典"""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    results = build(rows, templates)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    to_dict_seconds = 0.0
+    sample = results[:len(templates)]
+    if isinstance(results, ResultBatch):
+        start = time.perf_counter()
+        for record in results:
+            record.to_dict()
+        to_dict_seconds = time.perf_counter() - start
+        sample = [record.to_dict() for record in sample]
+    # ru_maxrss在Linux上以KB为单位
+    output.put(((peak - baseline) * 1024, elapsed, to_dict_seconds, sample))
+
+
+def measure(build, rows: int, templates):
+    """在子进程中构建，返回 (内存字节数, 构建耗时, 转换耗时, 样例结果)"""
+    context = multiprocessing.get_context('fork')
+    output = context.Queue()
+    process = context.Process(target=_run, args=(build, rows, templates, output))
+    process.start()
+    result = output.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="结果内存基准测试")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="结果行数")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("结果内存基准测试")
+    print("=" * 60)
+    print(f"结果行数: {args.rows}")
+
+    templates = make_templates()
+
+    dict_bytes, dict_seconds, _, dict_sample = measure(build_dicts, args.rows, templates)
+    compact_bytes, compact_seconds, to_dict_seconds, compact_sample = measure(build_compact, args.rows, templates)
+
+    # 时间戳为批次时间，其余字段应完全一致
+    def without_timestamp(result):
+        result = dict(result, aws_info=dict(result['aws_info']))
+        result['aws_info'].pop('timestamp', None)
+        return result
+    identical = all(without_timestamp(a) == without_timestamp(b) for a, b in zip(dict_sample, compact_sample))
+
+    print(f"\n{'表示':<16} {'内存':>10} {'每行':>10} {'构建耗时':>10}")
+    print(f"{'嵌套字典':<16} {dict_bytes / 2**20:8.1f}MB {dict_bytes / args.rows:8.0f}B {dict_seconds:9.2f}s")
+    print(f"{'ResultBatch':<16} {compact_bytes / 2**20:8.1f}MB {compact_bytes / args.rows:8.0f}B "
+          f"{compact_seconds:9.2f}s")
+    print(f"\n内存减少: {(1 - compact_bytes / dict_bytes) * 100:.1f}% ({dict_bytes / compact_bytes:.1f}x)")
+    print(f"按需转换为字典: {to_dict_seconds / args.rows * 1e6:.2f}微秒/行")
+    print(f"转换结果与原结构一致: {'是' if identical else '否'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+反向地理编码空间缓存基准测试
+在合成的聚集型GPS轨迹上，比较不同geohash精度和距离容差下的命中率与上游请求数
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_location_client import FakeLocationClient
+from location_service_poc import AmazonLocationServicePOC
+from spatial_cache import GeohashReverseCache
+
+
+def make_clustered_trace(count: int, clusters: int, spread_meters: float, seed: int = 42) -> list:
+    """
+    生成聚集型GPS轨迹
+
+    车辆在若干热点（仓库、站点）附近活动：每个点围绕随机选中的热点
+    按正态分布偏移spread_meters。
+    """
+    rng = random.Random(seed)
+    centers = [(rng.uniform(22.0, 41.0), rng.uniform(103.0, 122.0)) for _ in range(clusters)]
+
+    trace = []
+    for _ in range(count):
+        center_lat, center_lon = rng.choice(centers)
+        dlat = rng.gauss(0, spread_meters) / 111320.0
+        dlon = rng.gauss(0, spread_meters) / (111320.0 * math.cos(math.radians(center_lat)))
+        trace.append((center_lat + dlat, center_lon + dlon))
+    return trace
+
+
+def run_trace(trace: list, reverse_cache) -> tuple:
+    """用给定缓存跑完整条轨迹，返回(上游请求数, 耗时)"""
+    client = FakeLocationClient()
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AmazonLocationServicePOC(location_client=client, reverse_cache=reverse_cache)
+        start = time.perf_counter()
+        for lat, lon in trace:
+            service.reverse_geocode(lat, lon)
+        elapsed = time.perf_counter() - start
+    return client.total_calls, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="反向地理编码空间缓存基准测试")
+    parser.add_argument('--count', type=int, default=20000, help="轨迹点数量")
+    parser.add_argument('--clusters', type=int, default=50, help="热点数量")
+    parser.add_argument('--spread', type=float, default=300.0, help="热点周围的分布标准差（米）")
+    args = parser.parse_args()
+
+    trace = make_clustered_trace(args.count, args.clusters, args.spread)
+
+    print("=" * 72)
+    print("反向地理编码空间缓存基准测试 (合成聚集型GPS轨迹)")
+    print("=" * 72)
+    print(f"轨迹点: {args.count}, 热点: {args.clusters}, 分布标准差: {args.spread:.0f}米")
+    print(f"{'模式':<22}{'命中率':>10}{'上游请求':>12}{'网格数':>10}{'耗时(秒)':>12}")
+
+    calls, elapsed = run_trace(trace, None)
+    print(f"{'无缓存':<22}{0.0:>10.1%}{calls:>12}{'-':>10}{elapsed:>12.2f}")
+
+    for precision in (4, 5, 6, 7, 8):
+        cache = GeohashReverseCache(precision=precision)
+        calls, elapsed = run_trace(trace, cache)
+        stats = cache.stats()
+        print(f"{f'网格 precision={precision}':<22}{stats['hit_rate']:>10.1%}{calls:>12}{stats['cells']:>10}{elapsed:>12.2f}")
+
+    for precision, tolerance in ((7, 100.0), (7, 250.0), (6, 500.0)):
+        cache = GeohashReverseCache(precision=precision, tolerance_meters=tolerance)
+        calls, elapsed = run_trace(trace, cache)
+        stats = cache.stats()
+        label = f'p={precision} 容差{tolerance:.0f}米'
+        print(f"{label:<22}{stats['hit_rate']:>10.1%}{calls:>12}{stats['cells']:>10}{elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+请求合并基准测试
+模拟冷缓存时大量并发工作线程同时查询少量热门城市，比较启用请求合并前后的上游请求数
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_location_client import AsyncFakeLocationClient, FakeLocationClient
+from location_service_async import AsyncLocationServicePOC
+from location_service_poc import AmazonLocationServicePOC
+from single_flight import AsyncSingleFlight, SingleFlight
+
+HOT_CITIES = [("北京", "中国"), ("上海", "中国"), ("深圳", "中国"), ("New York", "United States")]
+
+
+def run_threads(requests: int, workers: int, latency: float, single_flight) -> tuple:
+    """线程版: 返回(上游请求数, 耗时)"""
+    client = FakeLocationClient(latency=latency)
+    cities = [HOT_CITIES[i % len(HOT_CITIES)] for i in range(requests)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AmazonLocationServicePOC(location_client=client, single_flight=single_flight)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda item: service.geocode_city(*item), cities))
+        elapsed = time.perf_counter() - start
+    return client.total_calls, elapsed
+
+
+async def run_async(requests: int, concurrency: int, latency: float, single_flight) -> tuple:
+    """asyncio版: 返回(上游请求数, 耗时)"""
+    client = AsyncFakeLocationClient(latency=latency)
+    cities = [HOT_CITIES[i % len(HOT_CITIES)] for i in range(requests)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with AsyncLocationServicePOC(location_client=client, max_concurrency=concurrency,
+                                           single_flight=single_flight) as service:
+            start = time.perf_counter()
+            await service.batch_geocode(cities)
+            elapsed = time.perf_counter() - start
+    return client.total_calls, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="请求合并基准测试")
+    parser.add_argument('--requests', type=int, default=400, help="请求数量")
+    parser.add_argument('--workers', type=int, default=32, help="并发数")
+    parser.add_argument('--latency', type=float, default=0.1, help="模拟延迟（秒）")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("请求合并基准测试 (冷缓存, 热门城市)")
+    print("=" * 60)
+    print(f"请求数: {args.requests}, 并发: {args.workers}, 模拟延迟: {args.latency * 1000:.0f}ms")
+
+    calls, elapsed = run_threads(args.requests, args.workers, args.latency, None)
+    print(f"线程 无合并:   上游请求 {calls:>5}, 耗时 {elapsed:.2f}秒")
+    flight = SingleFlight()
+    calls, elapsed = run_threads(args.requests, args.workers, args.latency, flight)
+    print(f"线程 请求合并: 上游请求 {calls:>5}, 耗时 {elapsed:.2f}秒, 合并 {flight.stats()['coalesced']} 次")
+
+    calls, elapsed = asyncio.run(run_async(args.requests, args.workers, args.latency, None))
+    print(f"异步 无合并:   上游请求 {calls:>5}, 耗时 {elapsed:.2f}秒")
+    flight = AsyncSingleFlight()
+    calls, elapsed = asyncio.run(run_async(args.requests, args.workers, args.latency, flight))
+    print(f"异步 请求合并: 上游请求 {calls:>5}, 耗时 {elapsed:.2f}秒, 合并 {flight.stats()['coalesced']} 次")
+
+
+if __name__ == "__main__":
+    main()
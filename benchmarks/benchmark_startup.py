@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+启动开销基准测试
+每次测量启动一个新的Python解释器（与短生命周期任务、无服务器冷启动相同），在本地模拟端点上分别测量
+导入服务模块、构造服务对象和第一次查询的耗时，以及从启动进程到拿到第一个结果的总耗时；
+对比默认模式（初始化时创建客户端，CLI版本另发一次健康检查请求）与快速启动模式，
+以及快速启动时第一次查询由离线地名库命中（整个进程不导入boto3）的情况。
+--save-baseline保存结果，--baseline与保存的结果比较，任一指标退化超过--tolerance时以非零状态退出
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_connection_pool import REGION, start_endpoint
+
+# 子进程中执行：测量各阶段耗时，最后一行输出JSON
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+module_name, class_name, endpoint_url, region, fast_start, offline = sys.argv[2:8]
+module = __import__(module_name)
+imported = time.perf_counter()
+boto3_after_import = 'boto3' in sys.modules
+options = {}
+if offline == '1':
+    from offline_gazetteer import load_sample_gazetteer
+    options['offline_resolver'] = load_sample_gazetteer()
+service = getattr(module, class_name)(
+    profile_name='benchmark', region_name=region, fast_start=fast_start == '1',
+    client_options={'endpoint_url': endpoint_url, 'inject_host_prefix': False}, **options)
+constructed = time.perf_counter()
+result = service.geocode_city('Beijing', 'China')
+finished = time.perf_counter()
+assert result['success'], result
+print(json.dumps({
+    'import': imported - start, 'construct': constructed - imported, 'first_request': finished - constructed,
+    'boto3_after_import': boto3_after_import, 'boto3_loaded': 'boto3' in sys.modules
+}))
+"""
+
+# (名称, 模块, 类, 快速启动, 离线地名库)
+SCENARIOS = [
+    ('boto3版 默认', 'location_service_poc', 'AmazonLocationServicePOC', False, False),
+    ('boto3版 快速启动', 'location_service_poc', 'AmazonLocationServicePOC', True, False),
+    ('boto3版 快速启动+离线', 'location_service_poc', 'AmazonLocationServicePOC', True, True),
+    ('CLI版 默认', 'location_service_cli_poc', 'LocationServiceCLIPOC', False, False),
+    ('CLI版 快速启动', 'location_service_cli_poc', 'LocationServiceCLIPOC', True, False)
+]
+
+METRICS = ('import', 'construct', 'first_request', 'total')
+
+
+def measure_once(module_name: str, class_name: str, fast_start: bool, offline: bool, endpoint_url: str) -> dict:
+    """在新解释器中测量一次，返回各阶段耗时（秒）"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env.pop('GEOCODER_FAST_START', None)
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-c', _CHILD, root, module_name, class_name, endpoint_url, REGION,
+         '1' if fast_start else '0', '1' if offline else '0'],
+        capture_output=True, text=True, env=env
+    )
+    total = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"子进程失败:\n{completed.stderr}")
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings['total'] = total
+    return timings
+
+
+def measure(module_name: str, class_name: str, fast_start: bool, offline: bool, endpoint_url: str,
+            repeat: int) -> dict:
+    """重复测量取中位数"""
+    runs = [measure_once(module_name, class_name, fast_start, offline, endpoint_url) for _ in range(repeat)]
+    result = {metric: statistics.median(run[metric] for run in runs) for metric in METRICS}
+    result['boto3_after_import'] = any(run['boto3_after_import'] for run in runs)
+    result['boto3_loaded'] = any(run['boto3_loaded'] for run in runs)
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list:
+    """
+    与基线比较
+
+    Args:
+        tolerance: 允许的相对退化（0.5即慢50%）
+        min_delta: 允许的绝对退化（秒），避免毫秒级指标的抖动误报
+
+    Returns:
+        退化描述列表
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric in METRICS:
+            current, previous = result[metric], expected[metric]
+            if current > previous * (1 + tolerance) and current - previous > min_delta:
+                regressions.append(f"{name} {metric}: {previous * 1000:.1f}ms -> {current * 1000:.1f}ms")
+        if result['boto3_after_import'] and not expected['boto3_after_import']:
+            regressions.append(f"{name}: 导入模块时加载了boto3")
+        if result['boto3_loaded'] and not expected['boto3_loaded']:
+            regressions.append(f"{name}: 进程中加载了boto3")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动开销基准测试")
+    parser.add_argument('--repeat', type=int, default=5, help="每个场景重复次数（取中位数）")
+    parser.add_argument('--latency', type=float, default=0.02, help="端点处理延迟（秒），模拟一次网络往返")
+    parser.add_argument('--save-baseline', metavar='PATH', help="把结果保存为基线JSON")
+    parser.add_argument('--baseline', metavar='PATH', help="与基线JSON比较，退化时以状态1退出")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="允许的相对退化")
+    parser.add_argument('--min-delta', type=float, default=0.05, help="允许的绝对退化（秒），小于该值的变化视为抖动")
+    args = parser.parse_args()
+
+    # 子进程按profile读取占位凭证（与实际任务一样解析profile），本地端点不校验签名
+    config_dir = tempfile.mkdtemp(prefix='startup-bench-')
+    credentials_file = os.path.join(config_dir, 'credentials')
+    with open(credentials_file, 'w') as f:
+        f.write("[benchmark]\naws_access_key_id = benchmark\naws_secret_access_key = benchmark\n")
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = credentials_file
+    os.environ['AWS_CONFIG_FILE'] = os.path.join(config_dir, 'config')
+    process, port, _ = start_endpoint(args.latency, 0.0)
+    endpoint_url = f"http://127.0.0.1:{port}"
+
+    print("=" * 60)
+    print(f"启动开销基准测试 (端点延迟 {args.latency * 1000:.0f}ms, 重复 {args.repeat} 次取中位数)")
+    print("=" * 60)
+
+    results = {}
+    try:
+        print(f"\n{'场景':<18} {'导入':>8} {'构造':>8} {'首次请求':>8} {'进程总计':>8}  boto3(导入后/结束时)")
+        for name, module_name, class_name, fast_start, offline in SCENARIOS:
+            result = results[name] = measure(module_name, class_name, fast_start, offline, endpoint_url,
+                                             args.repeat)
+            print(f"{name:<18} " + ' '.join(f"{result[metric] * 1000:7.1f}ms" for metric in METRICS)
+                  + f"  {'是' if result['boto3_after_import'] else '否'}/{'是' if result['boto3_loaded'] else '否'}")
+    finally:
+        process.terminate()
+        shutil.rmtree(config_dir)
+
+    for service in ('boto3版', 'CLI版'):
+        default, fast = results[f'{service} 默认'], results[f'{service} 快速启动']
+        print(f"\n{service} 构造耗时: {default['construct'] * 1000:.1f}ms -> {fast['construct'] * 1000:.1f}ms, "
+              f"到第一个结果: {default['total'] * 1000:.1f}ms -> {fast['total'] * 1000:.1f}ms")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"\n✗ 与基线相比出现退化 (容差 {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\n✓ 未超出基线容差 ({args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
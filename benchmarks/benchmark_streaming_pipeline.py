@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+流式批量处理基准测试
+生成不同行数的CSV输入，使用模拟客户端运行流式管道，验证峰值内存不随输入行数增长，
+并测量不同fsync间隔下进度日志的检查点开销
+"""
+
+import argparse
+import contextlib
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_pipeline import StreamingBatchGeocoder
+from fake_location_client import FakeLocationClient
+from location_service_poc import AmazonLocationServicePOC
+
+
+class _NullWriter:
+    """丢弃逐条打印的输出（StringIO或文件缓冲会让测得的内存随行数增长）"""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def write_input(path: str, rows: int):
+    """生成CSV输入文件（城市名互不相同）"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['city', 'country'])
+        for i in range(rows):
+            writer.writerow([f"City{i}", "中国"])
+
+
+def run(rows: int, workers: int, latency: float, workdir: str, fsync_interval=None) -> tuple:
+    """返回(耗时, 峰值内存字节, 输出行数)"""
+    input_path = os.path.join(workdir, f"input_{rows}.csv")
+    output_path = os.path.join(workdir, f"output_{rows}.jsonl")
+    write_input(input_path, rows)
+
+    with contextlib.redirect_stdout(_NullWriter()):
+        service = AmazonLocationServicePOC(location_client=FakeLocationClient(latency=latency))
+        pipeline = StreamingBatchGeocoder(service, max_workers=workers, fsync_interval=fsync_interval)
+        tracemalloc.start()
+        start = time.perf_counter()
+        stats = pipeline.run(input_path, output_path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return elapsed, peak, stats['rows']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式批量处理基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help="输入行数")
+    parser.add_argument('--workers', type=int, default=8, help="并发线程数")
+    parser.add_argument('--latency', type=float, default=0.0, help="模拟延迟（秒）")
+    parser.add_argument('--checkpoint-rows', type=int, default=20000, help="检查点开销测试的行数")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("流式批量处理基准测试")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.sizes:
+            elapsed, peak, written = run(rows, args.workers, args.latency, workdir)
+            print(f"{rows:>8} 行: 耗时 {elapsed:6.2f}秒, "
+                  f"{written / elapsed:8.0f} 行/秒, 峰值内存 {peak / 1024:8.1f} KB")
+
+        print("\n检查点开销 (fsync间隔):")
+        baseline = None
+        for label, interval in [("不fsync", None), ("每1秒", 1.0), ("每次刷新", 0)]:
+            elapsed, _, written = run(args.checkpoint_rows, args.workers, args.latency, workdir, interval)
+            baseline = baseline or elapsed
+            print(f"  {label:<8} 耗时 {elapsed:6.2f}秒, {written / elapsed:8.0f} 行/秒, "
+                  f"开销 {(elapsed / baseline - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
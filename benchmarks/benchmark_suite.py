@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+离线基准测试套件
+不需要AWS账号：boto3版本分别使用模拟客户端（FakeLocationClient）和由模拟客户端应答的真实botocore客户端
+（make_stubbed_client，与Stubber一样不发出HTTP请求），CLI版本使用后者进程内分派，asyncio版本使用模拟客户端；
+覆盖geocode_city、reverse_geocode和各批量方法，上游延迟按可配置的分布模拟。
+每个场景在独立的子进程中重复运行并取中位数，报告吞吐量、每次调用的p50/p95/p99延迟、每项CPU时间和峰值内存增量（Linux）。
+--save-baseline保存机器可读的基线，--baseline比较，任一指标退化超过容差时以状态1退出
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_location_client import LATENCY_DISTRIBUTIONS, FakeLocationClient, make_latency, make_stubbed_client
+from location_service_async import AsyncLocationServicePOC
+from location_service_cli_poc import LocationServiceCLIPOC
+from location_service_poc import AmazonLocationServicePOC
+
+BASELINE_VERSION = 1
+
+# 指标: (较大更好, 忽略的绝对变化)，绝对变化小于该值时视为抖动
+METRICS = {
+    'throughput': (True, 0.0),
+    'p50': (False, 0.001),
+    'p95': (False, 0.001),
+    'p99': (False, 0.001),
+    'cpu_per_item': (False, 0.00002),
+    'peak_memory': (False, 2 * 2**20),
+    'success_rate': (True, 0.0)
+}
+
+
+def make_items(count: int) -> tuple:
+    """生成正向查询 (城市, 国家) 和反向查询坐标"""
+    cities = [(f"City{i}", "中国") for i in range(count)]
+    rng = random.Random(0)
+    positions = [(rng.uniform(20.0, 45.0), rng.uniform(100.0, 125.0)) for _ in range(count)]
+    return cities, positions
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _fake(options) -> FakeLocationClient:
+    latency = make_latency(options.distribution, options.base_latency, options.tail_latency, options.tail_ratio)
+    return FakeLocationClient(latency=latency, failure_rate=options.failure_rate)
+
+
+def _boto3_service(options, stubbed: bool) -> AmazonLocationServicePOC:
+    client = make_stubbed_client(_fake(options)) if stubbed else _fake(options)
+    return AmazonLocationServicePOC(location_client=client)
+
+
+def _cli_service(options) -> LocationServiceCLIPOC:
+    return LocationServiceCLIPOC(location_client=make_stubbed_client(_fake(options)), health_check=False)
+
+
+class _AsyncRunner:
+    """在同一个事件循环中同步调用asyncio版本（服务的信号量绑定到第一次使用它的事件循环）"""
+
+    def __init__(self, options):
+        self.loop = asyncio.new_event_loop()
+        self.service = AsyncLocationServicePOC(location_client=_fake(options), max_concurrency=options.workers)
+
+    def batch_geocode(self, cities):
+        return self.loop.run_until_complete(self.service.batch_geocode(cities))
+
+
+def single(method_name: str, kind: str):
+    """逐项调用geocode_city或reverse_geocode，每次调用计一个延迟样本"""
+    def run(service, cities, positions, options):
+        method = getattr(service, method_name)
+        items = cities if kind == 'text' else positions
+        for item in items:
+            start = time.perf_counter()
+            result = method(*item)
+            yield time.perf_counter() - start, [result]
+    return run
+
+
+def batch(method_name: str, **kwargs):
+    """按batch_size分批调用批量方法，每批计一个延迟样本"""
+    def run(service, cities, positions, options):
+        method = getattr(service, method_name)
+        extra = {name: value(options) if callable(value) else value for name, value in kwargs.items()}
+        for chunk in _chunks(cities, options.batch_size):
+            start = time.perf_counter()
+            results = method(chunk, **extra)
+            yield time.perf_counter() - start, results
+    return run
+
+
+def _workers(options) -> int:
+    return options.workers
+
+
+# (名称, 创建服务, 运行)
+SCENARIOS = [
+    ('boto3/fake geocode_city', lambda o: _boto3_service(o, False), single('geocode_city', 'text')),
+    ('boto3/fake reverse_geocode', lambda o: _boto3_service(o, False), single('reverse_geocode', 'position')),
+    ('boto3/fake batch_geocode', lambda o: _boto3_service(o, False), batch('batch_geocode', delay=0)),
+    ('boto3/fake batch_concurrent', lambda o: _boto3_service(o, False),
+     batch('batch_geocode_concurrent', max_workers=_workers, requests_per_second=1e9)),
+    ('boto3/stub geocode_city', lambda o: _boto3_service(o, True), single('geocode_city', 'text')),
+    ('boto3/stub reverse_geocode', lambda o: _boto3_service(o, True), single('reverse_geocode', 'position')),
+    ('boto3/stub batch_geocode', lambda o: _boto3_service(o, True), batch('batch_geocode', delay=0)),
+    ('boto3/stub batch_concurrent', lambda o: _boto3_service(o, True),
+     batch('batch_geocode_concurrent', max_workers=_workers, requests_per_second=1e9)),
+    ('cli/stub geocode_city', _cli_service, single('geocode_city', 'text')),
+    ('cli/stub reverse_geocode', _cli_service, single('reverse_geocode', 'position')),
+    ('cli/stub batch_geocode', _cli_service, batch('batch_geocode', delay=0)),
+    ('cli/stub batch_parallel', _cli_service,
+     batch('batch_geocode_parallel', max_workers=_workers, requests_per_second=1e9)),
+    ('async/fake batch_geocode', _AsyncRunner, batch('batch_geocode'))
+]
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def _run_scenario(make_service, run, options, output):
+    """子进程：预热后运行场景，返回各项指标"""
+    cities, positions = make_items(options.items)
+    service = make_service(options)
+    # 预热：首次调用的客户端初始化、模块导入和缓存填充不计入结果
+    for _ in run(service, *make_items(options.warmup), options):
+        pass
+
+    random.seed(options.seed)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    latencies, items, successes = [], 0, 0
+    for latency, results in run(service, cities, positions, options):
+        latencies.append(latency)
+        items += len(results)
+        successes += sum(1 for result in results if result['success'])
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    latencies.sort()
+    # ru_maxrss在Linux上以KB为单位
+    output.put({
+        'items': items,
+        'throughput': items / elapsed,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'cpu_per_item': cpu / items,
+        'peak_memory': (peak_rss - baseline_rss) * 1024,
+        'success_rate': successes / items
+    })
+
+
+def measure(make_service, run, options) -> dict:
+    """在fork出的子进程中运行场景（各场景的峰值内存互不影响），重复options.repeat次，各指标取中位数"""
+    context = multiprocessing.get_context('fork')
+    runs = []
+    for _ in range(options.repeat):
+        output = context.Queue()
+        process = context.Process(target=_run_scenario, args=(make_service, run, options, output))
+        process.start()
+        runs.append(output.get())
+        process.join()
+    return {metric: statistics.median(result[metric] for result in runs) for metric in runs[0]}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    与基线比较
+
+    Args:
+        results: 本次结果 {场景: 指标}
+        baseline: 基线中的场景结果
+        tolerance: 允许的相对退化（0.3即吞吐量下降或延迟、CPU、内存增加30%）
+
+    Returns:
+        退化描述列表
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric, (higher_is_better, noise) in METRICS.items():
+            current, previous = result[metric], expected[metric]
+            if higher_is_better:
+                regressed = current < previous * (1 - tolerance) and previous - current > noise
+            else:
+                regressed = current > previous * (1 + tolerance) and current - previous > noise
+            if regressed:
+                regressions.append(f"{name} {metric}: {format_metric(metric, previous)} -> "
+                                   f"{format_metric(metric, current)}")
+    return regressions
+
+
+def format_metric(metric: str, value: float) -> str:
+    if metric == 'throughput':
+        return f"{value:.1f}/秒"
+    if metric in ('p50', 'p95', 'p99'):
+        return f"{value * 1000:.2f}ms"
+    if metric == 'cpu_per_item':
+        return f"{value * 1e6:.0f}µs"
+    if metric == 'peak_memory':
+        return f"{value / 2**20:.1f}MB"
+    return f"{value:.1%}"
+
+
+def run_options(options) -> dict:
+    """影响结果的参数，保存在基线中用于检查比较是否有意义"""
+    return {name: getattr(options, name) for name in (
+        'items', 'batch_size', 'workers', 'warmup', 'repeat', 'distribution', 'base_latency', 'tail_latency',
+        'tail_ratio', 'failure_rate', 'seed'
+    )}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线基准测试套件")
+    parser.add_argument('--items', type=int, default=500, help="每个场景的查询数量")
+    parser.add_argument('--batch-size', type=int, default=25, help="批量场景每次调用的查询数量")
+    parser.add_argument('--workers', type=int, default=8, help="并发批量的线程数/asyncio最大并发")
+    parser.add_argument('--warmup', type=int, default=20, help="每个场景预热的查询数量")
+    parser.add_argument('--repeat', type=int, default=3, help="每个场景重复运行次数（各指标取中位数）")
+    parser.add_argument('--distribution', choices=LATENCY_DISTRIBUTIONS, default='lognormal', help="上游延迟分布")
+    parser.add_argument('--base-latency', type=float, default=0.002, help="典型上游延迟（秒）")
+    parser.add_argument('--tail-latency', type=float, default=0.05, help="长尾延迟（秒，bimodal）")
+    parser.add_argument('--tail-ratio', type=float, default=0.01, help="长尾请求比例（bimodal）")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="服务端错误比例")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    parser.add_argument('--only', metavar='TEXT', help="只运行名称包含该文本的场景，例如 cli/ 或 batch")
+    parser.add_argument('--save-baseline', metavar='PATH', help="把结果保存为基线JSON")
+    parser.add_argument('--baseline', metavar='PATH', help="与基线JSON比较，退化时以状态1退出")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="允许的相对退化（基线应在同一台机器上保存）")
+    options = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not options.only or options.only in s[0]]
+    if not scenarios:
+        parser.error(f"没有名称包含 {options.only!r} 的场景")
+
+    print("=" * 60)
+    print("离线基准测试套件")
+    print("=" * 60)
+    print(f"查询数量: {options.items}, 批量大小: {options.batch_size}, 并发: {options.workers}, 重复: {options.repeat}, "
+          f"延迟分布: {options.distribution} (典型 {options.base_latency * 1000:.1f}ms), "
+          f"错误率: {options.failure_rate:.1%}")
+
+    results = {}
+    print(f"\n{'场景':<30} {'吞吐量':>10} {'p50':>9} {'p95':>9} {'p99':>9} {'CPU/项':>8} {'峰值内存':>8} {'成功率':>7}")
+    for name, make_service, run in scenarios:
+        result = results[name] = measure(make_service, run, options)
+        print(f"{name:<30} {result['throughput']:8.1f}/秒 {result['p50'] * 1000:7.2f}ms "
+              f"{result['p95'] * 1000:7.2f}ms {result['p99'] * 1000:7.2f}ms {result['cpu_per_item'] * 1e6:6.0f}µs "
+              f"{result['peak_memory'] / 2**20:6.1f}MB {result['success_rate']:7.1%}")
+    print("\n单项场景的延迟为每次调用，批量场景的延迟为每批（batch-size个查询）")
+
+    if options.save_baseline:
+        with open(options.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': BASELINE_VERSION,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'options': run_options(options),
+                'scenarios': results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存: {options.save_baseline}")
+
+    if options.baseline:
+        with open(options.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('version') != BASELINE_VERSION:
+            sys.exit(f"基线格式版本不匹配: {baseline.get('version')}，需要 {BASELINE_VERSION}")
+        if baseline['options'] != run_options(options):
+            print("\n⚠ 基线的运行参数与本次不同，比较结果可能没有意义")
+        regressions = compare(results, baseline['scenarios'], options.tolerance)
+        if regressions:
+            print(f"\n✗ 与基线相比出现退化 (容差 {options.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\n✓ 未超出基线容差 ({options.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+熔断器
+上游（Location Service）故障时快速失败，不再让每个请求都等到超时：
+最近请求的错误率超过阈值时打开熔断器，冷却后放行少量探测请求（半开），
+探测成功则恢复，失败则继续熔断
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict
+
+from request_policy import is_transient_error
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开，请求未发往上游"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_rate_threshold: float = 0.5, window_size: int = 20, min_calls: int = 10,
+                 open_duration: float = 30.0, half_open_max_calls: int = 3,
+                 is_failure: Callable[[BaseException], bool] = is_transient_error):
+        """
+        初始化熔断器
+
+        Args:
+            failure_rate_threshold: 打开熔断器的错误率阈值（0~1）
+            window_size: 统计错误率的最近请求数
+            min_calls: 窗口内至少有这么多请求才判断错误率
+            open_duration: 打开后多久进入半开状态（秒）
+            half_open_max_calls: 半开状态放行的探测请求数，全部成功后关闭熔断器
+            is_failure: 判断异常是否计为上游故障（默认超时、连接错误和5xx；参数错误等不计入）
+        """
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("failure_rate_threshold必须在0和1之间")
+
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_duration = open_duration
+        self.half_open_max_calls = half_open_max_calls
+        self.is_failure = is_failure
+
+        self._state = CLOSED
+        self._outcomes = deque(maxlen=window_size)  # True表示失败
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """当前状态（open状态冷却结束后在下一次请求时转为half_open）"""
+        return self._state
+
+    def allow(self) -> bool:
+        """判断是否放行请求；放行时调用方必须随后调用record_success或record_failure"""
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_duration:
+                    self.rejected += 1
+                    return False
+                self._state = HALF_OPEN
+                self._probes = 0
+                self._probe_successes = 0
+
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+
+            return True
+
+    def record_success(self):
+        """记录一次成功调用"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_max_calls:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    self._failures = 0
+                return
+            self._record(False)
+
+    def record_failure(self):
+        """记录一次上游故障"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._record(True)
+            if (len(self._outcomes) >= self.min_calls and
+                    self._failures / len(self._outcomes) >= self.failure_rate_threshold):
+                self._open()
+
+    def _record(self, failed: bool):
+        """记录结果到滑动窗口（调用方持有锁）"""
+        if len(self._outcomes) == self._outcomes.maxlen and self._outcomes[0]:
+            self._failures -= 1
+        self._outcomes.append(failed)
+        if failed:
+            self._failures += 1
+
+    def _release_probe(self):
+        """调用被取消（未得到结果）时归还半开探测名额"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _open(self):
+        """打开熔断器（调用方持有锁）"""
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._failures = 0
+        self.opened += 1
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        经熔断器调用fn
+
+        Raises:
+            CircuitOpenError: 熔断器打开时立即抛出，不调用fn
+        """
+        if not self.allow():
+            raise CircuitOpenError("熔断器已打开，上游暂不可用")
+        try:
+            result = fn()
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            self._release_probe()
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """call的asyncio版本，fn为返回协程的函数"""
+        if not self.allow():
+            raise CircuitOpenError("熔断器已打开，上游暂不可用")
+        try:
+            result = await fn()
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            self._release_probe()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict:
+        """返回熔断器统计信息"""
+        with self._lock:
+            return {
+                'state': self._state,
+                'failure_rate': self._failures / len(self._outcomes) if self._outcomes else 0.0,
+                'opened': self.opened,
+                'rejected': self.rejected
+            }
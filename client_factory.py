@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+共享AWS客户端工厂
+同一进程内按 (服务, profile, 区域, 连接参数) 复用boto3会话和客户端，
+统一配置连接池大小、连接/读取超时和TCP keep-alive；
+fork出的子进程（multiprocessing工作进程）首次使用时自动重新创建，不会共享父进程的连接。
+boto3在第一次创建会话时才导入，只导入本模块不产生导入开销
+"""
+
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+from fast_start import LazyModule
+
+if TYPE_CHECKING:
+    from boto3 import Session
+    from botocore.config import Config
+
+boto3 = LazyModule('boto3')
+botocore_config = LazyModule('botocore.config')
+
+# 默认连接参数：连接池足够容纳并发批量查询的线程数，长连接保持keep-alive
+DEFAULT_CLIENT_OPTIONS = {
+    'max_pool_connections': 50,
+    'connect_timeout': 5,
+    'read_timeout': 15,
+    'tcp_keepalive': True
+}
+
+_lock = threading.Lock()
+_pid = os.getpid()
+_sessions: Dict[Optional[str], 'Session'] = {}
+_clients: Dict[tuple, object] = {}
+
+
+def _reset_after_fork():
+    """子进程中丢弃从父进程继承的会话、客户端和锁"""
+    global _lock, _pid
+    _lock = threading.Lock()
+    _pid = os.getpid()
+    _sessions.clear()
+    _clients.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def make_client_config(max_pool_connections: int = None, connect_timeout: float = None,
+                       read_timeout: float = None, tcp_keepalive: bool = None,
+                       retries: Dict = None, **kwargs) -> 'Config':
+    """
+    构建botocore客户端配置，未指定的参数使用DEFAULT_CLIENT_OPTIONS
+
+    Args:
+        max_pool_connections: 连接池最大连接数（应不小于并发线程数）
+        connect_timeout: 建立连接超时（秒）
+        read_timeout: 读取响应超时（秒）
+        tcp_keepalive: 是否启用TCP keep-alive
+        retries: botocore重试配置，例如 {'mode': 'standard', 'max_attempts': 3}
+        **kwargs: 其他botocore Config参数
+    """
+    options = dict(DEFAULT_CLIENT_OPTIONS)
+    for name, value in (('max_pool_connections', max_pool_connections), ('connect_timeout', connect_timeout),
+                        ('read_timeout', read_timeout), ('tcp_keepalive', tcp_keepalive)):
+        if value is not None:
+            options[name] = value
+    if retries is not None:
+        options['retries'] = retries
+    options.update(kwargs)
+    return botocore_config.Config(**options)
+
+
+def _freeze(value):
+    """把配置参数转为可哈希的缓存键"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def get_session(profile_name: str = None) -> 'Session':
+    """获取当前进程共享的boto3会话（boto3会话不是线程安全的，只在锁内创建客户端）"""
+    with _lock:
+        return _get_session_locked(profile_name)
+
+
+def _get_session_locked(profile_name: Optional[str]) -> 'Session':
+    if os.getpid() != _pid:
+        _reset_after_fork()
+    session = _sessions.get(profile_name)
+    if session is None:
+        session = _sessions[profile_name] = boto3.Session(profile_name=profile_name)
+    return session
+
+
+def get_client(service_name: str = 'location', profile_name: str = None, region_name: str = None,
+               endpoint_url: str = None, **options):
+    """
+    获取共享客户端，相同参数在同一进程内返回同一个客户端（boto3客户端是线程安全的）
+
+    Args:
+        service_name: AWS服务名称
+        profile_name: AWS profile名称
+        region_name: AWS区域
+        endpoint_url: 自定义端点（可选，例如本地模拟端点）
+        **options: 连接参数，见make_client_config
+
+    Returns:
+        boto3客户端
+    """
+    key = (service_name, profile_name, region_name, endpoint_url, _freeze(options))
+    client = _clients.get(key)
+    if client is not None and os.getpid() == _pid:
+        return client
+
+    with _lock:
+        session = _get_session_locked(profile_name)
+        client = _clients.get(key)
+        if client is None:
+            client = session.client(service_name, region_name=region_name, endpoint_url=endpoint_url,
+                                    config=make_client_config(**options))
+            _clients[key] = client
+        return client
+
+
+def clear_clients():
+    """丢弃所有缓存的会话和客户端（例如切换凭证后）"""
+    with _lock:
+        _sessions.clear()
+        _clients.clear()
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+批量结果列式导出
+把正向地理编码批量结果（结果字典或ResultBatch紧凑记录）按列保存：
+坐标、相关性和响应时间为定宽float64列，字符串列（国家、区域、城市、地址等）按字典编码为int32代码，
+缺失值的代码为-1、缺失的数值为NaN。
+默认写入NumPy结构化数组（目录格式的.npy可以内存映射，单文件.npz便于传输），
+安装pyarrow时可写入Arrow IPC（.arrow，可内存映射）和Parquet（.parquet）
+"""
+
+import argparse
+import json
+import os
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy为可选依赖，只有列式导出需要
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow为可选依赖，只有Arrow/Parquet格式需要
+    pa = None
+    pq = None
+
+from geocode_results import GeocodeRecord
+
+# 数值列（float64，缺失为NaN）
+FLOAT_COLUMNS = ('latitude', 'longitude', 'relevance', 'response_time')
+# 字典编码的字符串列（int32代码，缺失为-1）
+STRING_COLUMNS = ('input_city', 'input_country', 'label', 'country', 'region', 'sub_region', 'municipality',
+                  'postal_code', 'place_id', 'data_source', 'place_index', 'error')
+
+# 目录格式中的文件名
+RECORDS_FILE = 'results.npy'
+DICTIONARIES_FILE = 'dictionaries.npz'
+
+FORMATS = ('npy', 'npz', 'arrow', 'parquet')
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("列式导出需要NumPy: pip install numpy")
+
+
+def _require_pyarrow(format_name: str):
+    if pa is None:
+        raise ImportError(f"{format_name}格式需要pyarrow: pip install pyarrow")
+
+
+def result_dtype():
+    """结构化数组的字段：数值列在前保证对齐，其后为字符串列代码和success"""
+    _require_numpy()
+    return np.dtype([(name, '<f8') for name in FLOAT_COLUMNS] +
+                    [(name, '<i4') for name in STRING_COLUMNS] +
+                    [('success', '?')])
+
+
+def infer_format(path: str) -> str:
+    """按扩展名推断格式，没有已知扩展名时为npy目录格式"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npz':
+        return 'npz'
+    if extension in ('.arrow', '.feather'):
+        return 'arrow'
+    if extension == '.parquet':
+        return 'parquet'
+    return 'npy'
+
+
+class _DictionaryEncoder:
+    __slots__ = ('index', 'values', 'codes')
+
+    def __init__(self):
+        """字典编码器：每个不同的字符串分配一个代码，None编码为-1"""
+        self.index: Dict[str, int] = {}
+        self.values: List[str] = []
+        self.codes = array('i')
+
+    def add(self, value: Optional[str]):
+        if value is None:
+            self.codes.append(-1)
+            return
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+
+def _result_row(result) -> tuple:
+    """
+    从结果字典或GeocodeRecord中取出一行
+
+    Returns:
+        (success, 数值列元组, 字符串列元组)，顺序与FLOAT_COLUMNS / STRING_COLUMNS一致
+    """
+    if isinstance(result, GeocodeRecord):
+        # 紧凑记录直接读属性，不转换为字典
+        return (result.success,
+                (result.latitude, result.longitude, result.relevance, result.response_time),
+                (result.input_city, result.input_country, result.label, result.country, result.region,
+                 result.sub_region, result.municipality, result.postal_code, result.place_id,
+                 result.data_source, result.aws_info.place_index, result.error))
+
+    place_index = (result.get('aws_info') or {}).get('place_index')
+    if not result['success']:
+        return (False, (None, None, None, None),
+                (result.get('input_city'), result.get('input_country'), None, None, None, None, None, None, None,
+                 None, place_index, result.get('error')))
+
+    coordinates = result['coordinates']
+    address = result['address']
+    metadata = result['metadata']
+    return (True,
+            (coordinates['latitude'], coordinates['longitude'], metadata.get('relevance'),
+             metadata.get('response_time_seconds')),
+            (result.get('input_city'), result.get('input_country'), address.get('label'), address.get('country'),
+             address.get('region'), address.get('sub_region'), address.get('municipality'),
+             address.get('postal_code'), metadata.get('place_id'), metadata.get('data_source'), place_index,
+             None))
+
+
+class ColumnarBuilder:
+    def __init__(self):
+        """
+        逐行追加结果并按列累积
+
+        数值列保存在array('d')中，字符串列逐行字典编码，不保留每行的结果对象，
+        可以边读取（例如流式管道的JSONL输出）边构建
+        """
+        self.success = array('b')
+        self.floats = {name: array('d') for name in FLOAT_COLUMNS}
+        self.strings = {name: _DictionaryEncoder() for name in STRING_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.success)
+
+    def add(self, result):
+        """追加一个正向地理编码结果（结果字典或GeocodeRecord）"""
+        success, numbers, strings = _result_row(result)
+        self.success.append(bool(success))
+        nan = float('nan')
+        for name, value in zip(FLOAT_COLUMNS, numbers):
+            self.floats[name].append(nan if value is None else value)
+        for name, value in zip(STRING_COLUMNS, strings):
+            self.strings[name].add(value)
+
+    def extend(self, results: Iterable):
+        for result in results:
+            self.add(result)
+        return self
+
+    def to_numpy(self):
+        """
+        Returns:
+            (结构化数组, {列名: 字典值列表})
+        """
+        records = np.empty(len(self), dtype=result_dtype())
+        records['success'] = np.frombuffer(self.success, dtype=np.int8)
+        for name, values in self.floats.items():
+            records[name] = np.frombuffer(values, dtype=np.float64)
+        for name, encoder in self.strings.items():
+            records[name] = np.frombuffer(encoder.codes, dtype=np.int32)
+        return records, {name: encoder.values for name, encoder in self.strings.items()}
+
+    def to_arrow(self):
+        """转换为pyarrow.Table（字符串列为dictionary<int32, string>类型）"""
+        _require_pyarrow('Arrow')
+        records, dictionaries = self.to_numpy()
+        columns = {name: pa.array(records[name]) for name in FLOAT_COLUMNS}
+        for name in STRING_COLUMNS:
+            codes = records[name]
+            indices = pa.array(codes, type=pa.int32(), mask=codes < 0)
+            columns[name] = pa.DictionaryArray.from_arrays(indices, pa.array(dictionaries[name], type=pa.string()))
+        columns['success'] = pa.array(records['success'])
+        return pa.table(columns)
+
+
+def _encode_strings(values: List[str]) -> tuple:
+    """字典值编码为UTF-8字节和偏移量（与Arrow字符串数组相同的布局，避免定宽Unicode数组的空间浪费）"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_strings(data, offsets) -> List[str]:
+    raw = bytes(data)
+    return [raw[start:end].decode('utf-8') for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def _dictionary_arrays(dictionaries: Dict[str, List[str]]) -> Dict:
+    arrays = {}
+    for name, values in dictionaries.items():
+        arrays[f"{name}.data"], arrays[f"{name}.offsets"] = _encode_strings(values)
+    return arrays
+
+
+def export_columnar(results: Iterable, path: str, format: str = None) -> str:
+    """
+    把批量结果导出为列式文件
+
+    Args:
+        results: 结果字典或GeocodeRecord的可迭代对象（例如batch_geocode返回值、ResultBatch）
+        path: 输出路径
+        format: npy（目录：results.npy + dictionaries.npz，可内存映射）、npz（单文件）、
+            arrow（Arrow IPC文件）或parquet，默认按扩展名推断
+
+    Returns:
+        写入的路径
+    """
+    _require_numpy()
+    format = format or infer_format(path)
+    if format not in FORMATS:
+        raise ValueError(f"format必须是 {FORMATS} 之一")
+
+    builder = results if isinstance(results, ColumnarBuilder) else ColumnarBuilder().extend(results)
+
+    if format == 'arrow':
+        table = builder.to_arrow()
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        return path
+    if format == 'parquet':
+        _require_pyarrow('Parquet')
+        pq.write_table(builder.to_arrow(), path)
+        return path
+
+    records, dictionaries = builder.to_numpy()
+    if format == 'npz':
+        # np.savez会自动补上.npz扩展名
+        path = path if path.endswith('.npz') else path + '.npz'
+        np.savez(path, results=records, **_dictionary_arrays(dictionaries))
+        return path
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, RECORDS_FILE), records)
+    np.savez(os.path.join(path, DICTIONARIES_FILE), **_dictionary_arrays(dictionaries))
+    return path
+
+
+class ColumnarResults:
+    def __init__(self, columns: Dict, dictionaries: Dict[str, List[str]]):
+        """
+        列式结果
+
+        Args:
+            columns: 列名 -> NumPy数组（数值列为float64，字符串列为int32字典代码，success为bool）
+            dictionaries: 字符串列名 -> 字典值列表
+        """
+        self.columns = columns
+        self.dictionaries = dictionaries
+
+    def __len__(self) -> int:
+        return len(self.columns['success'])
+
+    def codes(self, name: str):
+        """字符串列的字典代码（-1为缺失）"""
+        return self.columns[name]
+
+    def column(self, name: str):
+        """
+        返回一列；字符串列解码为对象数组（缺失为None），数值列直接返回（内存映射时不复制）
+        """
+        if name not in self.dictionaries:
+            return self.columns[name]
+        codes = np.asarray(self.columns[name])
+        values = np.empty(len(self.dictionaries[name]) + 1, dtype=object)
+        values[:-1] = self.dictionaries[name]
+        values[-1] = None
+        # 代码-1正好索引到末尾的None
+        return values[codes]
+
+
+def load_columnar(path: str, mmap: bool = True) -> ColumnarResults:
+    """
+    读取export_columnar写入的文件
+
+    Args:
+        path: npy目录、.npz、.arrow或.parquet文件
+        mmap: 是否内存映射数值列（npy目录和Arrow IPC格式支持；.npz为压缩包，总是整体读取）
+    """
+    _require_numpy()
+    if os.path.isdir(path):
+        records = np.load(os.path.join(path, RECORDS_FILE), mmap_mode='r' if mmap else None)
+        with np.load(os.path.join(path, DICTIONARIES_FILE)) as archive:
+            dictionaries = _load_dictionaries(archive)
+        return ColumnarResults({name: records[name] for name in records.dtype.names}, dictionaries)
+
+    format = infer_format(path)
+    if format == 'npz':
+        with np.load(path) as archive:
+            records = archive['results']
+            dictionaries = _load_dictionaries(archive)
+        return ColumnarResults({name: records[name] for name in records.dtype.names}, dictionaries)
+
+    if format == 'arrow':
+        _require_pyarrow('Arrow')
+        source = pa.memory_map(path) if mmap else pa.OSFile(path)
+        table = pa.ipc.open_file(source).read_all()
+    elif format == 'parquet':
+        _require_pyarrow('Parquet')
+        table = pq.read_table(path, memory_map=mmap)
+    else:
+        raise ValueError(f"无法识别的列式结果路径: {path}")
+    return _from_arrow(table)
+
+
+def _load_dictionaries(archive) -> Dict[str, List[str]]:
+    return {name: _decode_strings(archive[f"{name}.data"], archive[f"{name}.offsets"]) for name in STRING_COLUMNS}
+
+
+def _from_arrow(table) -> ColumnarResults:
+    """pyarrow.Table转换为ColumnarResults（数值列单块且无空值时不复制）"""
+    table = table.unify_dictionaries()
+    columns = {}
+    dictionaries = {}
+    for name in FLOAT_COLUMNS:
+        columns[name] = table.column(name).to_numpy()
+    for name in STRING_COLUMNS:
+        column = table.column(name).combine_chunks()
+        columns[name] = column.indices.fill_null(-1).to_numpy()
+        dictionaries[name] = column.dictionary.to_pylist()
+    columns['success'] = table.column('success').to_numpy()
+    return ColumnarResults(columns, dictionaries)
+
+
+def export_jsonl(input_file: str, path: str, format: str = None) -> int:
+    """
+    逐行读取JSONL结果（batch_pipeline的输出）并导出为列式文件
+
+    Returns:
+        导出的行数
+    """
+    builder = ColumnarBuilder()
+    with open(input_file, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                builder.add(json.loads(line))
+    export_columnar(builder, path, format)
+    return len(builder)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把JSONL批量结果（batch_pipeline输出）转换为列式文件")
+    parser.add_argument('input', help="输入JSONL文件")
+    parser.add_argument('output', help="输出路径（目录为npy格式，.npz/.arrow/.parquet按扩展名）")
+    parser.add_argument('--format', choices=FORMATS, default=None, help="输出格式，默认按扩展名推断")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"✗ 输入文件不存在: {args.input}")
+        sys.exit(1)
+
+    rows = export_jsonl(args.input, args.output, args.format)
+    print(f"✓ 已导出 {rows} 行到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
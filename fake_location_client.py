@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Amazon Location Service 模拟客户端
+不依赖AWS账号，返回与boto3 location客户端相同结构的响应，用于基准测试和离线验证；
+make_stubbed_client把模拟客户端接到真实的botocore客户端上，请求经过botocore完整的调用路径但不发出HTTP请求
+"""
+
+import asyncio
+import random
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Union
+
+from botocore import xform_name
+from botocore.exceptions import ClientError
+
+from rate_limiter import TokenBucket
+
+# make_latency支持的延迟分布
+LATENCY_DISTRIBUTIONS = ('constant', 'uniform', 'lognormal', 'bimodal')
+
+# 常用城市的固定结果: 查询文本 -> (经度, 纬度, 国家, 地区, 城市)
+KNOWN_PLACES = {
+    '北京, 中国': (116.407526, 39.904030, 'CHN', '北京市', '北京市'),
+    '上海, 中国': (121.473701, 31.230416, 'CHN', '上海市', '上海市'),
+    '深圳, 中国': (114.057868, 22.543099, 'CHN', '广东省', '深圳市'),
+    '广州, 中国': (113.264385, 23.129112, 'CHN', '广东省', '广州市'),
+    '杭州, 中国': (120.155070, 30.274085, 'CHN', '浙江省', '杭州市'),
+    '成都, 中国': (104.066541, 30.572269, 'CHN', '四川省', '成都市'),
+    'New York, United States': (-74.006015, 40.712728, 'USA', 'New York', 'New York'),
+    'London, United Kingdom': (-0.127647, 51.507322, 'GBR', 'England', 'London'),
+    'Tokyo, Japan': (139.759455, 35.682839, 'JPN', 'Tokyo', 'Tokyo'),
+}
+
+
+def make_latency(distribution: str, base: float, tail: float = 1.0, tail_ratio: float = 0.01) -> Callable[[], float]:
+    """
+    构建模拟延迟分布（使用random模块的全局随机数生成器，random.seed可复现）
+
+    Args:
+        distribution: constant（固定base）、uniform（0.5~1.5倍base均匀分布）、
+            lognormal（中位数为base的对数正态分布）、bimodal（大部分请求约为base，tail_ratio比例的请求慢到tail）
+        base: 典型延迟（秒）
+        tail: 长尾延迟（秒，bimodal）
+        tail_ratio: 长尾请求比例（bimodal）
+
+    Returns:
+        每次调用返回一个延迟（秒）的函数，可直接作为FakeLocationClient的latency参数
+    """
+    if distribution == 'constant':
+        return lambda: base
+    if distribution == 'uniform':
+        return lambda: random.uniform(0.5, 1.5) * base
+    if distribution == 'lognormal':
+        return lambda: random.lognormvariate(0, 0.6) * base
+    if distribution == 'bimodal':
+        return lambda: tail if random.random() < tail_ratio else random.uniform(0.8, 1.2) * base
+    raise ValueError(f"distribution必须是 {LATENCY_DISTRIBUTIONS} 之一")
+
+
+class FakeLocationClient:
+    def __init__(self, latency: Union[float, Callable[[], float]] = 0.0,
+                 data_source: str = "Esri", no_result_texts: List[str] = None, quota: float = None,
+                 failure_rate: float = 0.0):
+        """
+        初始化模拟客户端
+
+        Args:
+            latency: 每次调用的模拟延迟（秒），或返回延迟的可调用对象
+            data_source: 响应中返回的数据源名称
+            no_result_texts: 返回空结果的查询文本列表
+            quota: 模拟的账户配额（每秒请求数，可选），超出时抛出ThrottlingException
+            failure_rate: 随机返回InternalServerException（HTTP 500）的比例
+        """
+        self.latency = latency
+        self.data_source = data_source
+        self.no_result_texts = set(no_result_texts or [])
+        self.call_counts: Dict[str, int] = {}
+        self.failure_rate = failure_rate
+        self.throttled = 0
+        self.failures = 0
+        self._quota = TokenBucket(quota) if quota else None
+        self._lock = threading.Lock()
+
+    def _check_quota(self, operation: str):
+        """超出模拟配额时抛出与boto3相同的限流错误"""
+        if self._quota is None or self._quota.try_acquire():
+            return
+        with self._lock:
+            self.throttled += 1
+        raise ClientError(
+            {'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}},
+            operation
+        )
+
+    def _check_failure(self, operation: str):
+        """按failure_rate随机抛出服务端错误"""
+        if not self.failure_rate or random.random() >= self.failure_rate:
+            return
+        with self._lock:
+            self.failures += 1
+        raise ClientError(
+            {'Error': {'Code': 'InternalServerException', 'Message': 'Internal server error'},
+             'ResponseMetadata': {'HTTPStatusCode': 500}},
+            operation
+        )
+
+    def _simulate_call(self, operation: str):
+        """记录调用次数、检查配额并模拟网络延迟和服务端错误"""
+        with self._lock:
+            self.call_counts[operation] = self.call_counts.get(operation, 0) + 1
+        self._check_quota(operation)
+
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay > 0:
+            time.sleep(delay)
+        self._check_failure(operation)
+
+    @property
+    def total_calls(self) -> int:
+        """所有操作的调用总次数"""
+        with self._lock:
+            return sum(self.call_counts.values())
+
+    @staticmethod
+    def _place_for_text(text: str) -> tuple:
+        """为查询文本生成确定性的地点数据"""
+        if text in KNOWN_PLACES:
+            return KNOWN_PLACES[text]
+
+        checksum = zlib.crc32(text.encode('utf-8'))
+        longitude = (checksum % 360000) / 1000.0 - 180.0
+        latitude = ((checksum // 360000) % 170000) / 1000.0 - 85.0
+        city = text.split(',')[0].strip()
+        return (longitude, latitude, 'XXX', city, city)
+
+    def search_place_index_for_text(self, IndexName: str, Text: str,
+                                    MaxResults: int = 1, Language: str = None, **kwargs) -> Dict:
+        """模拟正向地理编码"""
+        self._simulate_call('search_place_index_for_text')
+
+        summary = {'Text': Text, 'MaxResults': MaxResults, 'DataSource': self.data_source}
+        if Text in self.no_result_texts:
+            return {'Summary': summary, 'Results': []}
+
+        longitude, latitude, country, region, municipality = self._place_for_text(Text)
+        return {
+            'Summary': summary,
+            'Results': [{
+                'Place': {
+                    'Label': f"{municipality}, {region}, {country}",
+                    'Geometry': {'Point': [longitude, latitude]},
+                    'Country': country,
+                    'Region': region,
+                    'SubRegion': None,
+                    'Municipality': municipality,
+                    'PostalCode': None
+                },
+                'Relevance': 1.0,
+                'PlaceId': f"fake-{zlib.crc32(Text.encode('utf-8')):08x}"
+            }]
+        }
+
+    def search_place_index_for_position(self, IndexName: str, Position: List[float],
+                                        MaxResults: int = 1, Language: str = None, **kwargs) -> Dict:
+        """模拟反向地理编码"""
+        self._simulate_call('search_place_index_for_position')
+
+        longitude, latitude = Position
+        summary = {'Position': Position, 'MaxResults': MaxResults, 'DataSource': self.data_source}
+
+        # 取最近的已知城市作为结果
+        nearest = min(
+            KNOWN_PLACES.values(),
+            key=lambda p: (p[0] - longitude) ** 2 + (p[1] - latitude) ** 2
+        )
+        place_lon, place_lat, country, region, municipality = nearest
+        distance = (((place_lon - longitude) ** 2 + (place_lat - latitude) ** 2) ** 0.5) * 111000.0
+
+        return {
+            'Summary': summary,
+            'Results': [{
+                'Place': {
+                    'Label': f"{municipality}, {region}, {country}",
+                    'Geometry': {'Point': [place_lon, place_lat]},
+                    'Country': country,
+                    'Region': region,
+                    'SubRegion': None,
+                    'Municipality': municipality,
+                    'Neighborhood': None,
+                    'PostalCode': None
+                },
+                'Relevance': 1.0,
+                'Distance': distance,
+                'PlaceId': f"fake-{municipality}"
+            }]
+        }
+
+    def describe_place_index(self, IndexName: str, **kwargs) -> Dict:
+        """模拟Place Index描述信息"""
+        self._simulate_call('describe_place_index')
+        return {
+            'IndexName': IndexName,
+            'IndexArn': f"arn:aws:geo:us-west-2:000000000000:place-index/{IndexName}",
+            'Status': 'Active',
+            'DataSource': self.data_source,
+            'Description': '模拟Place Index',
+            'PricingPlan': 'RequestBasedUsage',
+            'Tags': {}
+        }
+
+    def list_place_indexes(self, MaxResults: int = 100, **kwargs) -> Dict:
+        """模拟Place Index列表（CLI版本的健康检查）"""
+        self._simulate_call('list_place_indexes')
+        return {
+            'Entries': [{
+                'IndexName': 'CityGeocodingIndex',
+                'DataSource': self.data_source,
+                'Description': '模拟Place Index',
+                'CreateTime': '2024-01-01T00:00:00Z',
+                'UpdateTime': '2024-01-01T00:00:00Z'
+            }][:MaxResults]
+        }
+
+
+class AsyncFakeLocationClient:
+    def __init__(self, latency: Union[float, Callable[[], float]] = 0.0,
+                 data_source: str = "Esri", no_result_texts: List[str] = None, quota: float = None,
+                 failure_rate: float = 0.0):
+        """
+        初始化异步模拟客户端（进程内的模拟Location端点，方法均为协程）
+
+        Args:
+            latency: 每次调用的模拟延迟（秒），或返回延迟的可调用对象
+            data_source: 响应中返回的数据源名称
+            no_result_texts: 返回空结果的查询文本列表
+            quota: 模拟的账户配额（每秒请求数，可选），超出时抛出ThrottlingException
+            failure_rate: 随机返回InternalServerException（HTTP 500）的比例
+        """
+        self.latency = latency
+        self._client = FakeLocationClient(data_source=data_source, no_result_texts=no_result_texts,
+                                          quota=quota, failure_rate=failure_rate)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def call_counts(self) -> Dict[str, int]:
+        """各操作的调用次数"""
+        return self._client.call_counts
+
+    @property
+    def total_calls(self) -> int:
+        """所有操作的调用总次数"""
+        return self._client.total_calls
+
+    @property
+    def throttled(self) -> int:
+        """被模拟配额拒绝的调用次数"""
+        return self._client.throttled
+
+    async def _call(self, method: Callable, **kwargs) -> Dict:
+        """模拟异步网络延迟并记录并发数"""
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self.latency() if callable(self.latency) else self.latency
+            await asyncio.sleep(delay)
+            return method(**kwargs)
+        finally:
+            self.in_flight -= 1
+
+    async def search_place_index_for_text(self, **kwargs) -> Dict:
+        """模拟异步正向地理编码"""
+        return await self._call(self._client.search_place_index_for_text, **kwargs)
+
+    async def search_place_index_for_position(self, **kwargs) -> Dict:
+        """模拟异步反向地理编码"""
+        return await self._call(self._client.search_place_index_for_position, **kwargs)
+
+    async def describe_place_index(self, **kwargs) -> Dict:
+        """模拟异步Place Index描述信息"""
+        return await self._call(self._client.describe_place_index, **kwargs)
+
+
+def make_stubbed_client(fake_client: FakeLocationClient = None, region_name: str = 'us-west-2'):
+    """
+    创建由模拟客户端应答的真实botocore location客户端
+
+    与botocore.stub.Stubber相同，在before-call事件中直接返回响应、不发出HTTP请求，参数校验、
+    序列化、端点解析和事件处理仍走botocore的完整路径（CLI版本的进程内分派也依赖客户端的服务模型）。
+    Stubber按顺序返回预先排队的固定响应，无法用于并发批量；这里每个请求按参数由模拟客户端生成响应，
+    模拟客户端抛出的错误转换为HTTP错误响应，由botocore抛出对应的建模异常
+
+    Args:
+        fake_client: 应答请求的模拟客户端（默认无延迟的FakeLocationClient）
+        region_name: AWS区域
+
+    Returns:
+        botocore location客户端
+    """
+    import botocore.session
+    from botocore.awsrequest import AWSResponse
+    from botocore.config import Config
+
+    fake_client = fake_client or FakeLocationClient()
+    client = botocore.session.get_session().create_client(
+        'location', region_name=region_name, aws_access_key_id='stub', aws_secret_access_key='stub',
+        config=Config(inject_host_prefix=False, retries={'mode': 'standard', 'max_attempts': 1})
+    )
+
+    def capture_params(params, context, **kwargs):
+        context['stub_params'] = params
+
+    def respond(model, context, **kwargs):
+        method = getattr(fake_client, xform_name(model.name), None)
+        if method is None:
+            raise NotImplementedError(f"模拟客户端不支持 {model.name}")
+        try:
+            return AWSResponse(None, 200, {}, None), method(**context['stub_params'])
+        except ClientError as e:
+            status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 400)
+            return AWSResponse(None, status, {}, None), e.response
+
+    client.meta.events.register('before-parameter-build.location.*', capture_params)
+    client.meta.events.register('before-call.location.*', respond)
+    return client
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+快速启动支持
+短生命周期任务和无服务器调用每次启动都要付出导入boto3/botocore（约200毫秒）和创建客户端的开销。
+LazyModule把模块导入推迟到第一次访问属性时；快速启动模式下服务不在初始化时创建客户端、
+不做网络健康检查，这些工作推迟到第一次请求
+"""
+
+import importlib
+import os
+import sys
+from typing import Optional
+
+# 未显式传入fast_start时，从该环境变量读取默认值（1/true/yes/on为开启）
+FAST_START_ENV = 'GEOCODER_FAST_START'
+
+
+class LazyModule:
+    """
+    延迟导入的模块代理
+
+    第一次访问属性时才导入模块，之后直接转发；导入由importlib的模块锁保证线程安全。
+    可用于except子句（例如 except botocore_exceptions.ClientError），
+    该表达式只在异常实际到达时求值，而此时抛出异常的模块早已导入
+    """
+
+    __slots__ = ('_name', '_module')
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute: str):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attribute)
+
+    @property
+    def loaded(self) -> bool:
+        """模块是否已经导入（由本代理或其他代码导入）"""
+        return self._module is not None or self._name in sys.modules
+
+    def __repr__(self) -> str:
+        return f"<LazyModule {self._name!r} ({'已导入' if self.loaded else '未导入'})>"
+
+
+def fast_start_enabled(fast_start: Optional[bool] = None) -> bool:
+    """
+    解析是否使用快速启动模式
+
+    Args:
+        fast_start: 显式设置；为None时读取环境变量GEOCODER_FAST_START
+
+    Returns:
+        是否快速启动
+    """
+    if fast_start is not None:
+        return fast_start
+    return os.environ.get(FAST_START_ENV, '').strip().lower() in ('1', 'true', 'yes', 'on')
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+地理编码结果缓存
+放在geocode_city / reverse_geocode之前，减少重复的计费请求
+- LRUTTLCache: 进程内LRU+TTL缓存
+- SQLiteCache: 持久化缓存（SQLite WAL模式），可被多个进程共享
+
+缓存后端约定的接口:
+    get(key) -> Optional[Dict]           命中返回结果字典，未命中或已过期返回None
+    set(key, value, negative=False)      写入结果，negative=True表示“未找到”结果
+    stats() -> Dict                      返回命中/未命中/淘汰等计数
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+_WHITESPACE = re.compile(r'\s+')
+_COMMA = re.compile(r'\s*,\s*')
+
+
+def normalize_query_text(text: str) -> str:
+    """
+    规范化查询文本
+
+    Unicode NFKC（全角转半角）、统一大小写、合并连续空白和逗号两侧空白，
+    使 "Beijing,  China" 与 "ＢＥＩＪＩＮＧ , china" 得到相同的结果。
+    """
+    text = unicodedata.normalize('NFKC', text)
+    text = _COMMA.sub(', ', _WHITESPACE.sub(' ', text))
+    return text.strip().casefold()
+
+
+def make_text_key(query_text: str, language: str = None, max_results: int = 1) -> str:
+    """根据规范化查询文本、语言和最大结果数构建正向地理编码缓存键"""
+    return f"text|{language or ''}|{max_results}|{normalize_query_text(query_text)}"
+
+
+def make_position_key(latitude: float, longitude: float, language: str = None, precision: int = 6) -> str:
+    """根据坐标（按precision位小数取整）和语言构建反向地理编码缓存键"""
+    return f"position|{language or ''}|{latitude:.{precision}f},{longitude:.{precision}f}"
+
+
+class LRUTTLCache:
+    def __init__(self, max_size: int = 10000, ttl: float = 86400.0, negative_ttl: float = 300.0):
+        """
+        初始化LRU+TTL缓存
+
+        Args:
+            max_size: 最大条目数，超出时淘汰最久未使用的条目
+            ttl: 成功结果的有效期（秒）
+            negative_ttl: “未找到”结果的有效期（秒），为0时不缓存
+        """
+        if max_size <= 0:
+            raise ValueError("max_size必须大于0")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # key -> (过期时间, 结果)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        """获取缓存结果（过期条目保留到被覆盖或淘汰，可通过get_stale读取）"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= now:
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key: str) -> Optional[Dict]:
+        """获取缓存结果，忽略有效期（上游不可用时作为降级结果）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def set(self, key: str, value: Dict, negative: bool = False, ttl: float = None):
+        """写入缓存结果，ttl为空时按结果类型使用默认有效期"""
+        if ttl is None:
+            ttl = self.negative_ttl if negative else self.ttl
+        if ttl <= 0:
+            return
+
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> bool:
+        """删除指定缓存条目"""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        """清空缓存（保留计数）"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """返回缓存统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class SQLiteCache:
+    def __init__(self, path: str = "geocode_cache.sqlite3", ttl: float = 30 * 86400.0,
+                 negative_ttl: float = 3600.0, memory_size: int = 10000, busy_timeout: float = 30.0):
+        """
+        初始化持久化缓存（SQLite WAL模式）
+
+        多个进程可以同时读写同一个缓存文件：WAL模式下读不阻塞写，
+        写冲突由busy_timeout等待解决。每个线程、每个进程（包括fork之后）
+        各自使用独立的数据库连接。
+
+        命中的结果会放入进程内LRU缓存，热数据查询不需要访问SQLite和解析JSON。
+
+        Args:
+            path: 缓存文件路径
+            ttl: 成功结果的有效期（秒）
+            negative_ttl: “未找到”结果的有效期（秒），为0时不缓存
+            memory_size: 进程内LRU缓存的条目数，为0时不使用
+            busy_timeout: 等待其他进程释放写锁的最长时间（秒）
+        """
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.busy_timeout = busy_timeout
+        self.memory = LRUTTLCache(max_size=memory_size, ttl=ttl, negative_ttl=negative_ttl) if memory_size else None
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " negative INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_geocode_cache_created ON geocode_cache (created_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接，fork后在子进程中重新连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _encode(value: Dict) -> str:
+        """紧凑JSON编码"""
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+    def get_raw(self, key: str) -> Optional[str]:
+        """获取缓存结果的原始JSON文本（不解析），可直接写入JSONL输出"""
+        row = self._connection().execute(
+            "SELECT value FROM geocode_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, key: str) -> Optional[Dict]:
+        """获取缓存结果，先查进程内缓存，再查SQLite"""
+        if self.memory is not None:
+            value = self.memory.get(key)
+            if value is not None:
+                with self._stats_lock:
+                    self.hits += 1
+                return value
+
+        row = self._connection().execute(
+            "SELECT value, negative, expires_at FROM geocode_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+
+        with self._stats_lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        raw, negative, expires_at = row
+        value = json.loads(raw)
+        if self.memory is not None:
+            self.memory.set(key, value, negative=bool(negative), ttl=expires_at - time.time())
+        return value
+
+    def get_stale(self, key: str) -> Optional[Dict]:
+        """获取缓存结果，忽略有效期（上游不可用时作为降级结果）"""
+        row = self._connection().execute(
+            "SELECT value FROM geocode_cache WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Dict, negative: bool = False):
+        """写入缓存结果"""
+        ttl = self.negative_ttl if negative else self.ttl
+        if ttl <= 0:
+            return
+
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO geocode_cache (key, value, negative, created_at, expires_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, self._encode(value), int(negative), now, now + ttl)
+        )
+        if self.memory is not None:
+            self.memory.set(key, value, negative=negative)
+        with self._stats_lock:
+            self.writes += 1
+
+    def warm_up(self, entries: Iterable[Tuple[str, Dict, bool]]) -> int:
+        """
+        批量预热缓存（单个事务写入）
+
+        Args:
+            entries: (缓存键, 结果, 是否为“未找到”结果) 迭代器
+
+        Returns:
+            写入的条目数
+        """
+        now = time.time()
+        rows = []
+        for key, value, negative in entries:
+            ttl = self.negative_ttl if negative else self.ttl
+            if ttl > 0:
+                rows.append((key, self._encode(value), int(negative), now, now + ttl))
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO geocode_cache (key, value, negative, created_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._stats_lock:
+            self.writes += len(rows)
+        return len(rows)
+
+    def export(self) -> Iterator[Tuple[str, Dict, bool]]:
+        """导出所有未过期条目，格式与warm_up的输入一致"""
+        cursor = self._connection().execute(
+            "SELECT key, value, negative FROM geocode_cache WHERE expires_at > ? ORDER BY created_at",
+            (time.time(),)
+        )
+        for key, raw, negative in cursor:
+            yield key, json.loads(raw), bool(negative)
+
+    def export_jsonl(self, output_file: str) -> int:
+        """导出未过期条目到JSONL文件，返回导出条目数"""
+        count = 0
+        cursor = self._connection().execute(
+            "SELECT key, value, negative FROM geocode_cache WHERE expires_at > ? ORDER BY created_at",
+            (time.time(),)
+        )
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for key, raw, negative in cursor:
+                # value已是JSON文本，直接拼接，避免解析后再编码
+                f.write(f'{{"key":{json.dumps(key, ensure_ascii=False)},"negative":{"true" if negative else "false"},"value":{raw}}}\n')
+                count += 1
+        return count
+
+    def import_jsonl(self, input_file: str) -> int:
+        """从export_jsonl导出的文件预热缓存，返回写入条目数"""
+        def entries():
+            with open(input_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        yield item['key'], item['value'], item['negative']
+
+        return self.warm_up(entries())
+
+    def compact(self, max_entries: int = None) -> Dict:
+        """
+        压缩缓存文件
+
+        删除过期条目；指定max_entries时按写入时间删除最旧的条目直到不超过上限，
+        最后执行VACUUM回收磁盘空间。
+
+        Returns:
+            删除的条目数和剩余条目数
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute("DELETE FROM geocode_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            evicted = 0
+            if max_entries is not None:
+                evicted = conn.execute(
+                    "DELETE FROM geocode_cache WHERE key IN ("
+                    " SELECT key FROM geocode_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (max_entries,)
+                ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if self.memory is not None:
+            self.memory.clear()
+
+        return {'expired': expired, 'evicted': evicted, 'remaining': len(self)}
+
+    def __len__(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM geocode_cache WHERE expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+
+    def close(self):
+        """关闭当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def stats(self) -> Dict:
+        """返回缓存统计信息"""
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'path': self.path,
+                'size': len(self),
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+        if self.memory is not None:
+            stats['memory'] = self.memory.stats()
+        return stats
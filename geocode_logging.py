@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+地理编码日志
+库默认静默：geocoder记录器只挂NullHandler，不向终端输出任何内容。
+configure_logging启用输出时，请求线程只把日志记录放入队列，消息格式化和终端I/O
+在后台监听线程中完成；每个请求产生一条geocoder.requests记录，携带结构化字段
+（操作、结果、查询、坐标、耗时、错误），请求记录可以整体关闭
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sys
+from typing import Dict, Optional
+
+logger = logging.getLogger('geocoder')
+logger.addHandler(logging.NullHandler())
+
+# 每个请求一条记录；关闭后isEnabledFor直接返回False，请求路径上不创建任何记录
+request_logger = logging.getLogger('geocoder.requests')
+
+# 结果为这些值时按WARNING级别记录
+WARNING_OUTCOMES = frozenset(['error', 'degraded'])
+
+_handler: Optional[logging.Handler] = None
+_listener: Optional['logging.handlers.QueueListener'] = None
+_atexit_registered = False
+
+
+class RequestEvent:
+    """
+    单个请求的日志事件
+
+    只保存引用，文本消息和结构化字段在输出时才生成（队列模式下在监听线程中生成）
+    """
+
+    __slots__ = ('operation', 'outcome', 'result', 'seconds')
+
+    def __init__(self, operation: str, outcome: str, result: Dict, seconds: Optional[float]):
+        self.operation = operation
+        self.outcome = outcome
+        self.result = result
+        self.seconds = seconds
+
+    def fields(self) -> Dict:
+        """结构化字段"""
+        result = self.result
+        fields = {'operation': self.operation, 'outcome': self.outcome}
+        if 'input_coordinates' in result:
+            fields['latitude'] = result['input_coordinates']['latitude']
+            fields['longitude'] = result['input_coordinates']['longitude']
+        else:
+            fields['city'] = result.get('input_city')
+            fields['country'] = result.get('input_country')
+        if self.seconds is not None:
+            fields['seconds'] = round(self.seconds, 6)
+        if result.get('success'):
+            if 'coordinates' in result:
+                fields['result_latitude'] = result['coordinates']['latitude']
+                fields['result_longitude'] = result['coordinates']['longitude']
+            fields['label'] = result['address']['label']
+            fields['relevance'] = result['metadata']['relevance']
+        else:
+            fields['error'] = result.get('error')
+        if result.get('degraded'):
+            fields['degraded_source'] = result.get('degraded_source')
+        place_index = (result.get('aws_info') or {}).get('place_index')
+        if place_index:
+            fields['place_index'] = place_index
+        return fields
+
+    def __str__(self) -> str:
+        result = self.result
+        if self.operation == 'position':
+            return self._format_position(result)
+        return self._format_text(result)
+
+    def _format_text(self, result: Dict) -> str:
+        lines = [f"\n--- 查询城市: {result.get('input_city')} ---"]
+        if self.outcome == 'cache_hit':
+            lines.append("✓ 缓存命中")
+        elif result.get('degraded'):
+            lines.append(f"✗ 上游不可用，使用降级结果 ({result.get('degraded_source') or result.get('error')})")
+        elif result['success']:
+            lines.append("✓ 查询成功")
+            lines.append(f"  坐标: ({result['coordinates']['latitude']:.6f}, {result['coordinates']['longitude']:.6f})")
+            lines.append(f"  地址: {result['address']['label']}")
+            self._append_metadata(lines, result)
+        elif self.outcome == 'no_result':
+            lines.append("✗ 未找到匹配结果")
+        else:
+            lines.append(f"✗ 查询失败: {result.get('error')}")
+        return '\n'.join(lines)
+
+    def _format_position(self, result: Dict) -> str:
+        coordinates = result['input_coordinates']
+        lines = [f"\n--- 反向地理编码: ({coordinates['latitude']}, {coordinates['longitude']}) ---"]
+        if self.outcome == 'cache_hit':
+            lines.append("✓ 缓存命中")
+        elif result.get('degraded'):
+            lines.append(f"✗ 上游不可用，使用降级结果 ({result.get('degraded_source') or result.get('error')})")
+        elif result['success']:
+            lines.append("✓ 反向地理编码成功")
+            lines.append(f"  地址: {result['address']['label']}")
+            self._append_metadata(lines, result)
+        elif self.outcome == 'no_result':
+            lines.append("✗ 未找到地址信息")
+        else:
+            lines.append(f"✗ 反向地理编码失败: {result.get('error')}")
+        return '\n'.join(lines)
+
+    def _append_metadata(self, lines: list, result: Dict):
+        if result['metadata']['relevance'] is not None:
+            lines.append(f"  相关性: {result['metadata']['relevance']:.2f}")
+        if self.seconds is not None:
+            lines.append(f"  响应时间: {self.seconds:.2f}秒")
+
+
+def log_request(operation: str, outcome: str, result: Dict, seconds: Optional[float] = None):
+    """
+    记录一个请求（对应级别未启用时立即返回，不创建记录）
+
+    Args:
+        operation: 操作（text、position）
+        outcome: 结果（success、no_result、cache_hit、offline_hit、degraded、error）
+        result: 返回给调用方的结果字典
+        seconds: 上游请求耗时（秒），缓存/离线命中时为None
+    """
+    level = logging.WARNING if outcome in WARNING_OUTCOMES else logging.INFO
+    if request_logger.isEnabledFor(level):
+        event = RequestEvent(operation, outcome, result, seconds)
+        request_logger.log(level, '%s', event, extra={'geocode': event})
+
+
+def set_request_logging(enabled: bool):
+    """整体开启或关闭每请求记录（不影响生命周期和批量汇总日志）"""
+    request_logger.disabled = not enabled
+
+
+class JSONFormatter(logging.Formatter):
+    """每条记录输出一行JSON，请求记录展开为结构化字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name
+        }
+        event = getattr(record, 'geocode', None)
+        if event is not None:
+            data.update(event.fields())
+        else:
+            data['message'] = record.getMessage().strip()
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(logging.Handler):
+    """
+    只入队不格式化的队列处理器
+
+    标准QueueHandler在调用线程中格式化消息；这里把记录原样放入队列，
+    由监听线程的处理器格式化，请求路径上只剩创建记录和一次入队。
+    不继承logging.handlers.QueueHandler，导入本模块时不加载logging.handlers（及socket等）
+    """
+
+    def __init__(self, log_queue):
+        super().__init__()
+        self.queue = log_queue
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+
+def configure_logging(level: int = logging.INFO, stream=None, structured: bool = False,
+                      request_records: bool = True, queued: bool = True):
+    """
+    启用地理编码日志输出
+
+    Args:
+        level: 日志级别（lifecycle和请求记录为INFO，失败和降级为WARNING）
+        stream: 输出流，默认sys.stdout
+        structured: 是否每条记录输出一行JSON（否则输出可读文本）
+        request_records: 是否输出每请求记录，False时请求路径上完全不产生日志
+        queued: 是否通过队列在后台线程输出；交互式演示中与print混合输出时使用False保证顺序
+
+    Returns:
+        队列模式下返回已启动的QueueListener，否则返回None；shutdown_logging会停止它并刷新剩余记录
+    """
+    global _handler, _listener, _atexit_registered
+    shutdown_logging()
+
+    target = logging.StreamHandler(stream or sys.stdout)
+    target.setFormatter(JSONFormatter() if structured else logging.Formatter('%(message)s'))
+
+    if queued:
+        from logging.handlers import QueueListener
+        log_queue = queue.SimpleQueue()
+        _handler = _DeferredQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, target)
+        _listener.start()
+        if not _atexit_registered:
+            atexit.register(shutdown_logging)
+            _atexit_registered = True
+    else:
+        _handler = target
+
+    logger.addHandler(_handler)
+    logger.setLevel(level)
+    # 已配置输出时不再传给根记录器，避免应用的根处理器重复输出
+    logger.propagate = False
+    set_request_logging(request_records)
+    return _listener
+
+
+def shutdown_logging():
+    """停止后台输出线程（先输出队列中剩余的记录），恢复默认的静默状态"""
+    global _handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logger.removeHandler(_handler)
+        _handler.flush()
+        _handler = None
+    logger.setLevel(logging.NOTSET)
+    logger.propagate = True
+    set_request_logging(True)
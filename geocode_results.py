@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+地理编码结果构建
+boto3、AWS CLI、asyncio版本和统一地理编码门面共用的结果结构，
+输入为Location Service格式的响应（search_place_index_for_text / search_place_index_for_position）。
+大批量结果可以用ResultBatch保存为紧凑的__slots__记录：同一批次的aws_info只保存一份，
+需要时再用to_dict转换为相同结构的字典
+"""
+
+import sys
+import time
+from abc import abstractmethod
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional
+
+# 输入校验失败时指标中记录的错误码
+VALIDATION_ERROR_CODE = 'ValidationException'
+
+# 离线地名库/离线反向地理编码命中时结果aws_info.place_index的取值（结果不是来自AWS Place Index）
+OFFLINE_PLACE_INDEX = 'offline'
+
+# (秒, 时间戳字符串)：同一秒内的结果共用一个时间戳字符串
+_timestamp_cache = (None, None)
+
+
+def _timestamp() -> str:
+    """当前UTC时间戳字符串"""
+    global _timestamp_cache
+    second = int(time.time())
+    cached_second, text = _timestamp_cache
+    if cached_second != second:
+        text = time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(second))
+        _timestamp_cache = (second, text)
+    return text
+
+
+def build_aws_info(profile_name: Optional[str], region_name: Optional[str], place_index_name: Optional[str],
+                   timestamp: bool = True) -> Dict:
+    """构建结果中的aws_info字段（失败结果不带时间戳）"""
+    aws_info = {
+        'profile': profile_name,
+        'region': region_name,
+        'place_index': place_index_name
+    }
+    if timestamp:
+        aws_info['timestamp'] = _timestamp()
+    return aws_info
+
+
+def text_query_error(city_name, country) -> Optional[str]:
+    """检查正向地理编码输入，城市名称为空或参数类型不正确时返回错误信息，否则返回None"""
+    if not isinstance(city_name, str) or not city_name.strip():
+        return '城市名称不能为空'
+    if country is not None and not isinstance(country, str):
+        return '国家名称必须是字符串'
+    return None
+
+
+def build_query_text(city_name: str, country: Optional[str] = None) -> str:
+    """构建查询文本"""
+    if country:
+        return f"{city_name}, {country}"
+    return city_name
+
+
+def build_geocode_result(city_name: str, country: Optional[str], query_text: str, response: Dict,
+                         response_time: float, aws_info: Dict) -> Dict:
+    """
+    根据正向地理编码响应构建成功结果
+
+    Args:
+        city_name: 输入城市名
+        country: 输入国家
+        query_text: 实际查询文本
+        response: 至少包含一条Results的响应
+        response_time: 响应时间（秒）
+        aws_info: build_aws_info构建的来源信息
+    """
+    result = response['Results'][0]
+    place = result['Place']
+    return {
+        'success': True,
+        'input_city': city_name,
+        'input_country': country,
+        'query_text': query_text,
+        'coordinates': {
+            'latitude': place['Geometry']['Point'][1],  # Location Service返回[lon, lat]
+            'longitude': place['Geometry']['Point'][0]
+        },
+        'address': {
+            'label': place.get('Label'),
+            'country': place.get('Country'),
+            'region': place.get('Region'),
+            'sub_region': place.get('SubRegion'),
+            'municipality': place.get('Municipality'),
+            'postal_code': place.get('PostalCode')
+        },
+        'metadata': {
+            'relevance': result.get('Relevance'),
+            'place_id': result.get('PlaceId'),
+            'data_source': response.get('Summary', {}).get('DataSource'),
+            'response_time_seconds': response_time
+        },
+        'aws_info': aws_info
+    }
+
+
+def build_geocode_error(city_name: str, country: Optional[str], error: str, aws_info: Dict) -> Dict:
+    """构建地理编码失败结果"""
+    return {
+        'success': False,
+        'input_city': city_name,
+        'input_country': country,
+        'error': error,
+        'aws_info': aws_info
+    }
+
+
+def build_reverse_result(latitude: float, longitude: float, response: Dict, response_time: float,
+                         aws_info: Dict) -> Dict:
+    """
+    根据反向地理编码响应构建成功结果
+
+    Args:
+        latitude: 输入纬度
+        longitude: 输入经度
+        response: 至少包含一条Results的响应
+        response_time: 响应时间（秒）
+        aws_info: build_aws_info构建的来源信息
+    """
+    result = response['Results'][0]
+    place = result['Place']
+    return {
+        'success': True,
+        'input_coordinates': {
+            'latitude': latitude,
+            'longitude': longitude
+        },
+        'address': {
+            'label': place.get('Label'),
+            'country': place.get('Country'),
+            'region': place.get('Region'),
+            'sub_region': place.get('SubRegion'),
+            'municipality': place.get('Municipality'),
+            'neighborhood': place.get('Neighborhood'),
+            'postal_code': place.get('PostalCode')
+        },
+        'metadata': {
+            'relevance': result.get('Relevance'),
+            'distance': result.get('Distance'),
+            'place_id': result.get('PlaceId'),
+            'response_time_seconds': response_time
+        },
+        'aws_info': aws_info
+    }
+
+
+def build_reverse_error(latitude: float, longitude: float, error: str, aws_info: Dict) -> Dict:
+    """构建反向地理编码失败结果"""
+    return {
+        'success': False,
+        'input_coordinates': {'latitude': latitude, 'longitude': longitude},
+        'error': error,
+        'aws_info': aws_info
+    }
+
+
+def _intern(value):
+    """取值较少的字段（国家、区域、数据源等）驻留为共享字符串"""
+    return sys.intern(value) if type(value) is str else value
+
+
+class AwsInfo:
+    __slots__ = ('profile', 'region', 'place_index', 'timestamp')
+
+    def __init__(self, profile: Optional[str], region: Optional[str], place_index: Optional[str],
+                 timestamp: Optional[str] = None):
+        """
+        批次共享的来源信息
+
+        Args:
+            profile: AWS profile名称
+            region: AWS区域
+            place_index: Place Index名称
+            timestamp: 批次时间戳，成功结果转换为字典时使用
+        """
+        self.profile = profile
+        self.region = region
+        self.place_index = place_index
+        self.timestamp = timestamp
+
+    def to_dict(self, timestamp: bool = True) -> Dict:
+        """转换为build_aws_info相同结构的字典（失败结果不带时间戳）"""
+        aws_info = {'profile': self.profile, 'region': self.region, 'place_index': self.place_index}
+        if timestamp and self.timestamp is not None:
+            aws_info['timestamp'] = self.timestamp
+        return aws_info
+
+
+class _CompactResult(Mapping):
+    """
+    紧凑结果记录的基类
+
+    只读映射接口按to_dict的结构取值（result['success']等顶层标量字段直接读取属性），
+    便于替代字典结果；需要JSON序列化或修改时调用to_dict
+    """
+
+    __slots__ = ()
+    _SCALAR_KEYS = frozenset()
+
+    @abstractmethod
+    def to_dict(self) -> Dict:
+        """转换为结果字典"""
+
+    def __getitem__(self, key):
+        if key in self._SCALAR_KEYS:
+            value = getattr(self, key)
+            if value is None and key == 'error' and self.success:
+                raise KeyError(key)
+            return value
+        return self.to_dict()[key]
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def _finish(self, result: Dict) -> Dict:
+        if self.degraded:
+            result['degraded'] = True
+            if self.degraded_source is not None:
+                result['degraded_source'] = self.degraded_source
+        return result
+
+
+class GeocodeRecord(_CompactResult):
+    __slots__ = ('success', 'input_city', 'input_country', 'query_text', 'latitude', 'longitude', 'label',
+                 'country', 'region', 'sub_region', 'municipality', 'postal_code', 'relevance', 'place_id',
+                 'data_source', 'response_time', 'backend', 'error', 'degraded', 'degraded_source', 'aws_info')
+    _SCALAR_KEYS = frozenset(['success', 'input_city', 'input_country', 'error'])
+
+    @classmethod
+    def from_dict(cls, result: Dict, aws_info: AwsInfo) -> 'GeocodeRecord':
+        """
+        从正向地理编码结果字典创建记录
+
+        Args:
+            result: build_geocode_result / build_geocode_error 构建的结果
+            aws_info: 批次共享的来源信息（代替结果中的aws_info）
+        """
+        record = cls.__new__(cls)
+        record.success = result['success']
+        record.input_city = result['input_city']
+        record.input_country = _intern(result['input_country'])
+        record.query_text = result.get('query_text')
+        if record.success:
+            coordinates = result['coordinates']
+            address = result['address']
+            metadata = result['metadata']
+            record.latitude = coordinates['latitude']
+            record.longitude = coordinates['longitude']
+            record.label = address['label']
+            record.country = _intern(address['country'])
+            record.region = _intern(address['region'])
+            record.sub_region = _intern(address['sub_region'])
+            record.municipality = _intern(address['municipality'])
+            record.postal_code = address['postal_code']
+            record.relevance = metadata['relevance']
+            record.place_id = metadata['place_id']
+            record.data_source = _intern(metadata['data_source'])
+            record.response_time = metadata['response_time_seconds']
+            record.backend = metadata.get('backend')
+            record.error = None
+        else:
+            record.latitude = record.longitude = record.label = record.country = record.region = None
+            record.sub_region = record.municipality = record.postal_code = record.relevance = None
+            record.place_id = record.data_source = record.response_time = record.backend = None
+            record.error = result['error']
+        record.degraded = result.get('degraded', False)
+        record.degraded_source = result.get('degraded_source')
+        record.aws_info = aws_info
+        return record
+
+    def with_input(self, city_name: str, country: Optional[str]) -> 'GeocodeRecord':
+        """返回输入字段替换后的副本（去重后按原始行展开时使用）"""
+        record = GeocodeRecord.__new__(GeocodeRecord)
+        for name in GeocodeRecord.__slots__:
+            setattr(record, name, getattr(self, name))
+        record.input_city = city_name
+        record.input_country = _intern(country)
+        return record
+
+    def to_dict(self) -> Dict:
+        """转换为build_geocode_result / build_geocode_error相同结构的字典"""
+        if not self.success:
+            return self._finish({
+                'success': False,
+                'input_city': self.input_city,
+                'input_country': self.input_country,
+                'error': self.error,
+                'aws_info': self.aws_info.to_dict(timestamp=False)
+            })
+        metadata = {
+            'relevance': self.relevance,
+            'place_id': self.place_id,
+            'data_source': self.data_source,
+            'response_time_seconds': self.response_time
+        }
+        if self.backend is not None:
+            metadata['backend'] = self.backend
+        return self._finish({
+            'success': True,
+            'input_city': self.input_city,
+            'input_country': self.input_country,
+            'query_text': self.query_text,
+            'coordinates': {'latitude': self.latitude, 'longitude': self.longitude},
+            'address': {
+                'label': self.label,
+                'country': self.country,
+                'region': self.region,
+                'sub_region': self.sub_region,
+                'municipality': self.municipality,
+                'postal_code': self.postal_code
+            },
+            'metadata': metadata,
+            'aws_info': self.aws_info.to_dict()
+        })
+
+
+class ReverseRecord(_CompactResult):
+    __slots__ = ('success', 'latitude', 'longitude', 'label', 'country', 'region', 'sub_region', 'municipality',
+                 'neighborhood', 'postal_code', 'relevance', 'distance', 'place_id', 'response_time', 'backend',
+                 'error', 'degraded', 'degraded_source', 'aws_info')
+    _SCALAR_KEYS = frozenset(['success', 'error'])
+
+    @classmethod
+    def from_dict(cls, result: Dict, aws_info: AwsInfo) -> 'ReverseRecord':
+        """
+        从反向地理编码结果字典创建记录（latitude/longitude为输入坐标）
+
+        Args:
+            result: build_reverse_result / build_reverse_error 构建的结果
+            aws_info: 批次共享的来源信息（代替结果中的aws_info）
+        """
+        record = cls.__new__(cls)
+        record.success = result['success']
+        record.latitude = result['input_coordinates']['latitude']
+        record.longitude = result['input_coordinates']['longitude']
+        if record.success:
+            address = result['address']
+            metadata = result['metadata']
+            record.label = address['label']
+            record.country = _intern(address['country'])
+            record.region = _intern(address['region'])
+            record.sub_region = _intern(address['sub_region'])
+            record.municipality = _intern(address['municipality'])
+            record.neighborhood = address['neighborhood']
+            record.postal_code = address['postal_code']
+            record.relevance = metadata['relevance']
+            record.distance = metadata['distance']
+            record.place_id = metadata['place_id']
+            record.response_time = metadata['response_time_seconds']
+            record.backend = metadata.get('backend')
+            record.error = None
+        else:
+            record.label = record.country = record.region = record.sub_region = record.municipality = None
+            record.neighborhood = record.postal_code = record.relevance = record.distance = None
+            record.place_id = record.response_time = record.backend = None
+            record.error = result['error']
+        record.degraded = result.get('degraded', False)
+        record.degraded_source = result.get('degraded_source')
+        record.aws_info = aws_info
+        return record
+
+    def to_dict(self) -> Dict:
+        """转换为build_reverse_result / build_reverse_error相同结构的字典"""
+        input_coordinates = {'latitude': self.latitude, 'longitude': self.longitude}
+        if not self.success:
+            return self._finish({
+                'success': False,
+                'input_coordinates': input_coordinates,
+                'error': self.error,
+                'aws_info': self.aws_info.to_dict(timestamp=False)
+            })
+        metadata = {
+            'relevance': self.relevance,
+            'distance': self.distance,
+            'place_id': self.place_id,
+            'response_time_seconds': self.response_time
+        }
+        if self.backend is not None:
+            metadata['backend'] = self.backend
+        return self._finish({
+            'success': True,
+            'input_coordinates': input_coordinates,
+            'address': {
+                'label': self.label,
+                'country': self.country,
+                'region': self.region,
+                'sub_region': self.sub_region,
+                'municipality': self.municipality,
+                'neighborhood': self.neighborhood,
+                'postal_code': self.postal_code
+            },
+            'metadata': metadata,
+            'aws_info': self.aws_info.to_dict()
+        })
+
+
+class ResultBatch(list):
+    def __init__(self, profile_name: Optional[str] = None, region_name: Optional[str] = None,
+                 results: Iterable[Dict] = ()):
+        """
+        紧凑结果列表
+
+        每个结果转换为GeocodeRecord/ReverseRecord，profile、区域、Place Index和批次时间戳
+        在批次内只保存一份（按Place Index共享AwsInfo）；成功结果的时间戳统一为批次创建时间
+
+        Args:
+            profile_name: AWS profile名称
+            region_name: AWS区域
+            results: 初始结果字典（可选）
+        """
+        super().__init__()
+        self.profile_name = profile_name
+        self.region_name = region_name
+        self.timestamp = _timestamp()
+        self._aws_infos: Dict[Optional[str], AwsInfo] = {}
+        self.extend(self.compact(result) for result in results)
+
+    def empty_copy(self) -> 'ResultBatch':
+        """返回与本批次共享来源信息和时间戳的空批次"""
+        batch = ResultBatch(self.profile_name, self.region_name)
+        batch.timestamp = self.timestamp
+        batch._aws_infos = self._aws_infos
+        return batch
+
+    def _aws_info(self, place_index_name: Optional[str]) -> AwsInfo:
+        aws_info = self._aws_infos.get(place_index_name)
+        if aws_info is None:
+            aws_info = self._aws_infos.setdefault(
+                place_index_name, AwsInfo(self.profile_name, self.region_name, place_index_name, self.timestamp)
+            )
+        return aws_info
+
+    def compact(self, result: Dict) -> _CompactResult:
+        """把结果字典转换为共享本批次aws_info的紧凑记录（不加入列表，可在工作线程中调用）"""
+        if isinstance(result, _CompactResult):
+            return result
+        place_index_name = result.get('aws_info', {}).get('place_index')
+        record_class = ReverseRecord if 'input_coordinates' in result else GeocodeRecord
+        return record_class.from_dict(result, self._aws_info(place_index_name))
+
+    def add(self, result: Dict) -> _CompactResult:
+        """转换并追加一个结果"""
+        record = self.compact(result)
+        self.append(record)
+        return record
+
+    def to_dicts(self) -> List[Dict]:
+        """全部转换为结果字典"""
+        return [record.to_dict() for record in self]
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+统一地理编码门面
+按顺序查询一组可插拔的后端（缓存 -> 离线地名库 -> boto3 -> AWS CLI），第一个返回结果的后端胜出，
+后面后端的结果回写到前面支持写入的后端（例如缓存）；结果结构由geocode_results统一构建，
+与具体后端无关。后端组合可以通过 GEOCODER_BACKENDS 环境变量配置，部署时选择最快的组合而无需改代码
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from geocode_cache import LRUTTLCache, make_position_key, make_text_key
+from geocode_results import (OFFLINE_PLACE_INDEX, ResultBatch, build_aws_info, build_geocode_error,
+                             build_geocode_result, build_query_text, build_reverse_error, build_reverse_result,
+                             text_query_error)
+
+DEFAULT_BACKENDS = 'cache,offline,boto3'
+DEFAULT_PLACE_INDEX = 'CityGeocodingIndex'
+
+
+class GeocoderBackend:
+    """
+    后端协议：search_text / search_position 返回Location Service格式的响应，
+    未命中时返回None或空Results（由下一个后端继续处理），请求失败时抛出异常。
+    结果aws_info.place_index依次取响应中的IndexName、后端的place_index_name和后端名称
+    """
+
+    name = 'backend'
+    place_index_name = None
+
+    def search_text(self, city_name: str, country: Optional[str], query_text: str,
+                    max_results: int = 1) -> Optional[Dict]:
+        """正向地理编码"""
+        return None
+
+    def search_position(self, latitude: float, longitude: float) -> Optional[Dict]:
+        """反向地理编码"""
+        return None
+
+    def store_text(self, query_text: str, max_results: int, response: Dict):
+        """后面的后端命中时回写结果（可选）"""
+
+    def store_position(self, latitude: float, longitude: float, response: Dict):
+        """后面的后端命中时回写结果（可选）"""
+
+
+def _strip_metadata(response: Dict) -> Dict:
+    """去掉boto3响应中的ResponseMetadata，只保留可缓存的部分"""
+    return {k: v for k, v in response.items() if k != 'ResponseMetadata'}
+
+
+class CacheBackend(GeocoderBackend):
+    name = 'cache'
+
+    def __init__(self, cache=None, language: str = 'zh-CN'):
+        """
+        Args:
+            cache: 缓存（geocode_cache.LRUTTLCache或SQLiteCache），缓存的是原始响应（IndexName为最初命中的来源），
+                键带有 "response|" 前缀，可以与AmazonLocationServicePOC的结果缓存共用
+            language: 参与缓存键的语言
+        """
+        self.cache = cache if cache is not None else LRUTTLCache()
+        self.language = language
+
+    def search_text(self, city_name, country, query_text, max_results=1):
+        return self.cache.get(f"response|{make_text_key(query_text, self.language, max_results)}")
+
+    def search_position(self, latitude, longitude):
+        return self.cache.get(f"response|{make_position_key(latitude, longitude, self.language)}")
+
+    def store_text(self, query_text, max_results, response):
+        self.cache.set(f"response|{make_text_key(query_text, self.language, max_results)}", _strip_metadata(response))
+
+    def store_position(self, latitude, longitude, response):
+        self.cache.set(f"response|{make_position_key(latitude, longitude, self.language)}", _strip_metadata(response))
+
+
+class OfflineBackend(GeocoderBackend):
+    name = 'offline'
+    place_index_name = OFFLINE_PLACE_INDEX
+
+    def __init__(self, gazetteer=None, reverse_geocoder=None):
+        """
+        Args:
+            gazetteer: 离线地名库（offline_gazetteer.OfflineGazetteer），默认加载示例数据
+            reverse_geocoder: 离线反向地理编码器（offline_reverse_geocoder.OfflineReverseGeocoder，可选）
+        """
+        if gazetteer is None:
+            from offline_gazetteer import load_sample_gazetteer
+            gazetteer = load_sample_gazetteer()
+        self.gazetteer = gazetteer
+        self.reverse_geocoder = reverse_geocoder
+
+    def search_text(self, city_name, country, query_text, max_results=1):
+        return self.gazetteer.search(city_name, country, max_results)
+
+    def search_position(self, latitude, longitude):
+        if self.reverse_geocoder is None:
+            return None
+        return self.reverse_geocoder.search_position(latitude, longitude)
+
+
+class LocationClientBackend(GeocoderBackend):
+    name = 'boto3'
+
+    def __init__(self, location_client=None, place_index_name: str = DEFAULT_PLACE_INDEX, language: str = 'zh-CN',
+                 profile_name: str = None, region_name: str = None):
+        """
+        Args:
+            location_client: location客户端，默认在第一次请求时获取client_factory的共享客户端
+                （前面的后端命中时不导入boto3）
+            place_index_name: Place Index名称
+            language: 结果语言
+            profile_name: AWS profile名称（未提供location_client时使用）
+            region_name: AWS区域（未提供location_client时使用）
+        """
+        self._location_client = location_client
+        self.profile_name = profile_name
+        self.region_name = region_name
+        self.place_index_name = place_index_name
+        self.language = language
+
+    @property
+    def location_client(self):
+        client = self._location_client
+        if client is None:
+            from client_factory import get_client
+            client = self._location_client = get_client('location', self.profile_name, self.region_name)
+        return client
+
+    def search_text(self, city_name, country, query_text, max_results=1):
+        return self.location_client.search_place_index_for_text(
+            IndexName=self.place_index_name, Text=query_text, MaxResults=max_results, Language=self.language
+        )
+
+    def search_position(self, latitude, longitude):
+        return self.location_client.search_place_index_for_position(
+            IndexName=self.place_index_name, Position=[longitude, latitude], MaxResults=1, Language=self.language
+        )
+
+
+class CLIBackend(GeocoderBackend):
+    name = 'cli'
+
+    def __init__(self, cli_service, language: str = 'zh-CN'):
+        """
+        Args:
+            cli_service: location_service_cli_poc.LocationServiceCLIPOC
+            language: 结果语言
+        """
+        self.cli_service = cli_service
+        self.place_index_name = cli_service.place_index_name
+        self.language = language
+
+    def _run(self, operation: str, parameters: Dict) -> Dict:
+        result = self.cli_service._run_aws_command('location', operation, parameters)
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        return result['data']
+
+    def search_text(self, city_name, country, query_text, max_results=1):
+        return self._run('search-place-index-for-text', {
+            'index-name': self.place_index_name,
+            'text': query_text,
+            'max-results': str(max_results),
+            'language': self.language
+        })
+
+    def search_position(self, latitude, longitude):
+        return self._run('search-place-index-for-position', {
+            'index-name': self.place_index_name,
+            'position': f'{longitude},{latitude}',
+            'max-results': '1',
+            'language': self.language
+        })
+
+
+class FakeBackend(LocationClientBackend):
+    name = 'fake'
+
+    def __init__(self, latency: float = 0.0, no_result_texts: List[str] = None,
+                 place_index_name: str = DEFAULT_PLACE_INDEX):
+        """
+        确定性的模拟后端（基于fake_location_client.FakeLocationClient），相同查询总是返回相同坐标，用于基准测试
+
+        Args:
+            latency: 每次调用的模拟延迟（秒）
+            no_result_texts: 返回空结果的查询文本列表
+            place_index_name: Place Index名称
+        """
+        from fake_location_client import FakeLocationClient
+        super().__init__(FakeLocationClient(latency=latency, no_result_texts=no_result_texts), place_index_name)
+
+
+class Geocoder:
+    def __init__(self, backends: Sequence[GeocoderBackend], profile_name: str = None, region_name: str = None,
+                 place_index_name: str = DEFAULT_PLACE_INDEX):
+        """
+        初始化统一地理编码门面
+
+        Args:
+            backends: 按查询顺序排列的后端
+            profile_name: 结果aws_info中的profile
+            region_name: 结果aws_info中的区域
+            place_index_name: 后端未指定Place Index时aws_info中使用的名称
+        """
+        if not backends:
+            raise ValueError("至少需要一个后端")
+
+        self.backends = list(backends)
+        self.profile_name = profile_name
+        self.region_name = region_name
+        self.place_index_name = place_index_name
+        self._stats = {backend.name: {'calls': 0, 'hits': 0, 'misses': 0, 'errors': 0, 'seconds': 0.0}
+                       for backend in self.backends}
+        self._lock = threading.Lock()
+
+    def _aws_info(self, place_index_name: Optional[str] = None, timestamp: bool = True) -> Dict:
+        return build_aws_info(self.profile_name, self.region_name, place_index_name or self.place_index_name,
+                              timestamp)
+
+    def _record(self, backend: GeocoderBackend, outcome: str, elapsed: float):
+        with self._lock:
+            stats = self._stats[backend.name]
+            stats['calls'] += 1
+            stats[outcome] += 1
+            stats['seconds'] += elapsed
+
+    def _resolve(self, search, store) -> tuple:
+        """
+        按顺序查询后端
+
+        Returns:
+            (命中的后端, 响应, 耗时, 错误列表)，全部未命中时后端和响应为None；
+            响应的IndexName为结果的实际来源（回写缓存时一并保存）
+        """
+        errors = []
+        for index, backend in enumerate(self.backends):
+            start = time.perf_counter()
+            try:
+                response = search(backend)
+            except Exception as e:
+                self._record(backend, 'errors', time.perf_counter() - start)
+                errors.append(f"{backend.name}: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+
+            if response and response.get('Results'):
+                self._record(backend, 'hits', elapsed)
+                if not response.get('IndexName'):
+                    response = dict(response, IndexName=backend.place_index_name or backend.name)
+                for earlier in self.backends[:index]:
+                    store(earlier, response)
+                return backend, response, elapsed, errors
+            self._record(backend, 'misses', elapsed)
+
+        return None, None, 0.0, errors
+
+    def geocode(self, city_name: str, country: str = None, max_results: int = 1) -> Dict:
+        """
+        地理编码
+
+        Returns:
+            与AmazonLocationServicePOC.geocode_city相同结构的结果，metadata.backend为命中的后端
+        """
+        error = text_query_error(city_name, country)
+        if error is not None:
+            # 与AmazonLocationServicePOC.geocode_city相同的输入校验，不查询任何后端
+            return build_geocode_error(city_name, country, error, self._aws_info(timestamp=False))
+
+        query_text = build_query_text(city_name, country)
+        backend, response, elapsed, errors = self._resolve(
+            lambda b: b.search_text(city_name, country, query_text, max_results),
+            lambda b, r: b.store_text(query_text, max_results, r)
+        )
+        if backend is None:
+            error = '; '.join(errors) if errors else '未找到匹配的城市'
+            return build_geocode_error(city_name, country, error, self._aws_info(timestamp=False))
+
+        result = build_geocode_result(city_name, country, query_text, response, elapsed,
+                                      self._aws_info(response['IndexName']))
+        result['metadata']['backend'] = backend.name
+        return result
+
+    def reverse_geocode(self, latitude: float, longitude: float) -> Dict:
+        """
+        反向地理编码
+
+        Returns:
+            与AmazonLocationServicePOC.reverse_geocode相同结构的结果，metadata.backend为命中的后端
+        """
+        backend, response, elapsed, errors = self._resolve(
+            lambda b: b.search_position(latitude, longitude),
+            lambda b, r: b.store_position(latitude, longitude, r)
+        )
+        if backend is None:
+            error = '; '.join(errors) if errors else '未找到地址信息'
+            return build_reverse_error(latitude, longitude, error, self._aws_info(timestamp=False))
+
+        result = build_reverse_result(latitude, longitude, response, elapsed, self._aws_info(response['IndexName']))
+        result['metadata']['backend'] = backend.name
+        return result
+
+    def batch_geocode(self, cities: List[tuple], max_workers: int = 1, compact: bool = False) -> List[Dict]:
+        """
+        批量地理编码
+
+        Args:
+            cities: 城市列表，格式为 [(city, country), ...]
+            max_workers: 并发线程数（后端为远程服务时大于1）
+            compact: 是否逐条转换为紧凑记录，返回ResultBatch（aws_info每批只保存一份）
+
+        Returns:
+            结果列表（与输入顺序一致）
+        """
+        if not compact:
+            geocode_one = lambda item: self.geocode(*item)
+            results = []
+        else:
+            results = ResultBatch(self.profile_name, self.region_name)
+            geocode_one = lambda item: results.compact(self.geocode(*item))
+
+        if max_workers <= 1:
+            results.extend(map(geocode_one, cities))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results.extend(executor.map(geocode_one, cities))
+        return results
+
+    def stats(self) -> Dict:
+        """返回每个后端的调用、命中、未命中、错误次数和平均耗时"""
+        with self._lock:
+            return {
+                name: dict(stats, avg_seconds=stats['seconds'] / stats['calls'] if stats['calls'] else 0.0)
+                for name, stats in self._stats.items()
+            }
+
+
+def make_geocoder(backend_names: str = None, profile_name: str = "oversea1", region_name: str = "us-west-2",
+                  cache=None, gazetteer=None, reverse_geocoder=None, location_client=None,
+                  cli_service=None) -> Geocoder:
+    """
+    按名称组合后端创建地理编码门面
+
+    Args:
+        backend_names: 逗号分隔的后端名称（cache, offline, boto3, cli, fake），
+            默认读取 GEOCODER_BACKENDS 环境变量，未设置时为 "cache,offline,boto3"
+        profile_name: AWS profile名称
+        region_name: AWS区域
+        cache: cache后端使用的缓存（可选）
+        gazetteer: offline后端使用的离线地名库（可选）
+        reverse_geocoder: offline后端使用的离线反向地理编码器（可选）
+        location_client: boto3后端使用的location客户端（可选）
+        cli_service: cli后端使用的LocationServiceCLIPOC（可选，默认进程内分派且不做健康检查）
+    """
+    if backend_names is None:
+        backend_names = os.environ.get('GEOCODER_BACKENDS', DEFAULT_BACKENDS)
+
+    backends = []
+    for name in (n.strip() for n in backend_names.split(',')):
+        if name == 'cache':
+            backends.append(CacheBackend(cache))
+        elif name == 'offline':
+            backends.append(OfflineBackend(gazetteer, reverse_geocoder))
+        elif name == 'boto3':
+            backends.append(LocationClientBackend(location_client, profile_name=profile_name,
+                                                  region_name=region_name))
+        elif name == 'cli':
+            if cli_service is None:
+                from location_service_cli_poc import LocationServiceCLIPOC
+                cli_service = LocationServiceCLIPOC(profile_name, region_name, health_check=False)
+            backends.append(CLIBackend(cli_service))
+        elif name == 'fake':
+            backends.append(FakeBackend())
+        elif name:
+            raise ValueError(f"未知的后端: {name}")
+
+    return Geocoder(backends, profile_name, region_name)
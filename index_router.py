@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+多Place Index路由
+按查询的国家或坐标所在范围选择Place Index（例如东南亚优先使用Grab数据源），
+请求失败或无结果时依次故障转移到备用索引；每个索引的延迟和命中质量
+（成功时的相关性，无结果或出错计0）以指数滑动平均记录，质量或延迟不达标的索引自动排到候选列表末尾
+"""
+
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from offline_gazetteer import normalize_country
+
+ESRI_INDEX = 'CityGeocodingIndex-Esri'
+HERE_INDEX = 'CityGeocodingIndex-HERE'
+GRAB_INDEX = 'CityGeocodingIndex-Grab'
+
+# Grab数据覆盖的东南亚国家（ISO2）和范围 (最小经度, 最小纬度, 最大经度, 最大纬度)
+SOUTHEAST_ASIA_COUNTRIES = frozenset(['SG', 'MY', 'TH', 'VN', 'ID', 'PH', 'MM', 'KH', 'LA', 'BN', 'TL'])
+SOUTHEAST_ASIA_BBOX = (92.0, -11.0, 141.0, 28.5)
+
+# Grab数据源只能在这些区域创建Place Index
+GRAB_REGIONS = frozenset(['ap-southeast-1'])
+
+# 东南亚路由：Grab优先（只在Grab索引可用时加入默认路由表）
+SOUTHEAST_ASIA_ROUTE = {
+    'name': 'southeast_asia',
+    'countries': SOUTHEAST_ASIA_COUNTRIES,
+    'bbox': SOUTHEAST_ASIA_BBOX,
+    'indexes': [GRAB_INDEX, HERE_INDEX, ESRI_INDEX]
+}
+DEFAULT_INDEXES = [ESRI_INDEX, HERE_INDEX]
+
+
+def default_routes(region_name: str = None, available_indexes: Iterable[str] = None) -> List[Dict]:
+    """
+    默认路由表（按顺序匹配，第一个匹配的路由给出候选索引顺序；都不匹配时使用默认顺序）
+
+    Grab索引不可用时东南亚查询也使用默认顺序（Esri→HERE），不为每个查询先付出一次失败请求
+
+    Args:
+        region_name: 客户端区域，位于GRAB_REGIONS时认为Grab索引可用
+        available_indexes: 已创建的索引名称（可选，例如list_place_indexes的结果），提供时按是否包含Grab索引判断
+    """
+    if available_indexes is not None:
+        grab_available = GRAB_INDEX in set(available_indexes)
+    else:
+        grab_available = region_name in GRAB_REGIONS
+    return [SOUTHEAST_ASIA_ROUTE] if grab_available else []
+
+
+class IndexRouter:
+    def __init__(self, routes: Sequence[Dict] = None, default_indexes: Sequence[str] = None,
+                 failover_on_empty: bool = True, smoothing: float = 0.2, min_samples: int = 5,
+                 min_quality: float = 0.5, max_latency: Optional[float] = None, probe_every: int = 20,
+                 circuit_breaker_factory: Callable[[], CircuitBreaker] = None, region_name: str = None,
+                 available_indexes: Iterable[str] = None):
+        """
+        初始化索引路由器
+
+        Args:
+            routes: 路由表，每项为 {'name', 'countries': ISO2集合, 'bbox': (最小经度, 最小纬度, 最大经度, 最大纬度),
+                'indexes': 候选索引顺序}，默认为default_routes(region_name, available_indexes)
+            default_indexes: 没有路由匹配时的候选索引顺序，默认DEFAULT_INDEXES
+            failover_on_empty: 无结果时是否继续查询下一个索引
+            smoothing: 延迟和质量指数滑动平均的权重
+            min_samples: 样本数达到后才根据统计调整顺序
+            min_quality: 质量滑动平均低于该值的索引排到末尾
+            max_latency: 延迟滑动平均超过该值（秒）的索引排到末尾，None表示不按延迟调整
+            probe_every: 每隔多少次路由按配置顺序路由一次，让被降级的索引有机会恢复
+            circuit_breaker_factory: 为每个索引创建独立熔断器的函数（可选，例如 lambda: CircuitBreaker()），
+                某个索引熔断时直接跳到下一个候选索引
+            region_name: 客户端区域（未提供routes时使用），只有Grab可用的区域才把Grab排在东南亚查询的首位
+            available_indexes: 已创建的索引名称（可选，未提供routes时使用），包含Grab索引时东南亚查询优先使用Grab
+        """
+        self.routes = list(routes if routes is not None else default_routes(region_name, available_indexes))
+        self.default_indexes = list(default_indexes or DEFAULT_INDEXES)
+        self.failover_on_empty = failover_on_empty
+        self.smoothing = smoothing
+        self.min_samples = min_samples
+        self.min_quality = min_quality
+        self.max_latency = max_latency
+        self.probe_every = probe_every
+        self.circuit_breaker_factory = circuit_breaker_factory
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._routed = 0
+        self._lock = threading.Lock()
+        self.failovers = 0
+
+    @staticmethod
+    def _in_bbox(bbox, latitude: float, longitude: float) -> bool:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        return min_lon <= longitude <= max_lon and min_lat <= latitude <= max_lat
+
+    def _match(self, country: Optional[str], position: Optional[tuple]) -> List[str]:
+        """按路由表匹配候选索引顺序（配置顺序）"""
+        country_code = normalize_country(country) if country else None
+        for route in self.routes:
+            if country_code and country_code in route.get('countries', ()):
+                return list(route['indexes'])
+            if position is not None and route.get('bbox') and self._in_bbox(route['bbox'], *position):
+                return list(route['indexes'])
+        return list(self.default_indexes)
+
+    def _degraded(self, index_name: str) -> bool:
+        """索引的近期质量或延迟是否不达标（调用方持有锁）"""
+        stats = self._stats.get(index_name)
+        if stats is None or stats['calls'] < self.min_samples:
+            return False
+        if stats['quality'] < self.min_quality:
+            return True
+        return self.max_latency is not None and stats['latency'] > self.max_latency
+
+    def route(self, country: str = None, position: tuple = None) -> List[str]:
+        """
+        返回查询的候选索引顺序
+
+        Args:
+            country: 国家名称或代码（正向地理编码）
+            position: (纬度, 经度)（反向地理编码）
+        """
+        candidates = self._match(country, position)
+        with self._lock:
+            self._routed += 1
+            if self.probe_every and self._routed % self.probe_every == 0:
+                return candidates
+            # 稳定排序：达标的索引保持配置顺序，不达标的排到末尾
+            return sorted(candidates, key=self._degraded)
+
+    def record(self, index_name: str, latency: float, relevance: Optional[float] = None, error: bool = False):
+        """
+        记录一次索引请求
+
+        Args:
+            index_name: 索引名称
+            latency: 请求耗时（秒）
+            relevance: 有结果时为第一条结果的相关性，无结果时为None
+            error: 请求是否失败
+        """
+        quality = 0.0 if error or relevance is None else relevance
+        with self._lock:
+            stats = self._stats.get(index_name)
+            if stats is None:
+                stats = self._stats[index_name] = {
+                    'calls': 0, 'hits': 0, 'empty': 0, 'errors': 0, 'latency': latency, 'quality': quality
+                }
+            stats['calls'] += 1
+            if error:
+                stats['errors'] += 1
+            elif relevance is None:
+                stats['empty'] += 1
+            else:
+                stats['hits'] += 1
+            stats['latency'] += self.smoothing * (latency - stats['latency'])
+            stats['quality'] += self.smoothing * (quality - stats['quality'])
+
+    @staticmethod
+    def _relevance(response: Dict) -> Optional[float]:
+        results = response.get('Results')
+        if not results:
+            return None
+        relevance = results[0].get('Relevance')
+        return 1.0 if relevance is None else relevance
+
+    def _breaker(self, index_name: str) -> Optional[CircuitBreaker]:
+        """返回索引的熔断器，未配置circuit_breaker_factory时返回None"""
+        if self.circuit_breaker_factory is None:
+            return None
+        with self._lock:
+            breaker = self._breakers.get(index_name)
+            if breaker is None:
+                breaker = self._breakers[index_name] = self.circuit_breaker_factory()
+            return breaker
+
+    @staticmethod
+    def _check_candidates(candidates: Sequence[str]):
+        if not candidates:
+            raise ValueError("没有候选索引，请检查路由表和default_indexes")
+
+    def call(self, candidates: Sequence[str], fn: Callable[[str], Dict]) -> Dict:
+        """
+        依次用候选索引调用fn，返回第一个有结果的响应（响应中IndexName为实际使用的索引）
+
+        Args:
+            candidates: route返回的候选索引
+            fn: 接收索引名称、返回Location Service响应的函数
+
+        Returns:
+            有结果的响应；都无结果时返回最后一个空响应；都失败时抛出最后一个异常
+            （所有候选索引都已熔断时为CircuitOpenError）
+
+        Raises:
+            ValueError: 候选索引为空
+        """
+        self._check_candidates(candidates)
+        last_error = None
+        empty = None
+        for attempt, index_name in enumerate(candidates):
+            if attempt:
+                with self._lock:
+                    self.failovers += 1
+            breaker = self._breaker(index_name)
+            start = time.perf_counter()
+            try:
+                response = breaker.call(lambda: fn(index_name)) if breaker else fn(index_name)
+            except CircuitOpenError as e:
+                # 请求未发出，不计入索引统计，直接尝试下一个索引
+                last_error = e
+                continue
+            except Exception as e:
+                self.record(index_name, time.perf_counter() - start, error=True)
+                last_error = e
+                continue
+            relevance = self._relevance(response)
+            self.record(index_name, time.perf_counter() - start, relevance)
+            response = dict(response, IndexName=index_name)
+            if relevance is not None or not self.failover_on_empty:
+                return response
+            empty = empty or response
+
+        if empty is not None:
+            return empty
+        raise last_error
+
+    async def call_async(self, candidates: Sequence[str], fn: Callable[[str], Awaitable[Dict]]) -> Dict:
+        """call的asyncio版本，fn接收索引名称并返回协程"""
+        self._check_candidates(candidates)
+        last_error = None
+        empty = None
+        for attempt, index_name in enumerate(candidates):
+            if attempt:
+                with self._lock:
+                    self.failovers += 1
+            breaker = self._breaker(index_name)
+            start = time.perf_counter()
+            try:
+                if breaker is not None:
+                    response = await breaker.call_async(lambda: fn(index_name))
+                else:
+                    response = await fn(index_name)
+            except CircuitOpenError as e:
+                last_error = e
+                continue
+            except Exception as e:
+                self.record(index_name, time.perf_counter() - start, error=True)
+                last_error = e
+                continue
+            relevance = self._relevance(response)
+            self.record(index_name, time.perf_counter() - start, relevance)
+            response = dict(response, IndexName=index_name)
+            if relevance is not None or not self.failover_on_empty:
+                return response
+            empty = empty or response
+
+        if empty is not None:
+            return empty
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        """返回每个索引的调用次数、命中/无结果/错误次数、延迟和质量滑动平均、熔断器状态，以及故障转移次数"""
+        with self._lock:
+            indexes = {name: dict(stats) for name, stats in self._stats.items()}
+            breakers = dict(self._breakers)
+            failovers = self.failovers
+        for name, breaker in breakers.items():
+            indexes.setdefault(name, {})['circuit'] = breaker.stats()
+        return {'indexes': indexes, 'failovers': failovers}
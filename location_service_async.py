@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Amazon Location Service POC - asyncio版本
+提供可await的地理编码接口，便于嵌入asyncio数据处理任务
+结果字典结构与AmazonLocationServicePOC完全一致
+"""
+
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from batch_dedup import fan_out
+from circuit_breaker import CircuitOpenError
+from client_factory import DEFAULT_CLIENT_OPTIONS
+from geocode_logging import configure_logging, logger
+from geocode_results import build_query_text
+
+from location_service_poc import AmazonLocationServicePOC, botocore_exceptions
+from rate_limiter import TokenBucket
+
+
+class AsyncLocationServicePOC:
+    def __init__(self, profile_name="oversea1", region_name="us-west-2",
+                 location_client=None, max_concurrency: int = 10, cache=None, reverse_cache=None,
+                 offline_resolver=None, offline_reverse_resolver=None, single_flight=None,
+                 rate_limiter=None, request_policy=None, circuit_breaker=None, client_options=None,
+                 index_router=None, metrics=None, fast_start=None):
+        """
+        初始化异步Amazon Location Service客户端
+
+        location_client可以是原生异步客户端（方法为协程，例如aiobotocore客户端），
+        此时请求不占用线程；也可以是普通boto3客户端，此时请求在最多
+        max_concurrency个线程的线程池中执行。未提供时创建boto3客户端。
+
+        Args:
+            profile_name: AWS profile名称
+            region_name: AWS区域
+            location_client: 已创建的location客户端（可选）
+            max_concurrency: 同时进行的最大上游请求数
+            cache: 结果缓存（可选，例如geocode_cache.LRUTTLCache）
+            reverse_cache: 反向地理编码空间缓存（可选，例如spatial_cache.GeohashReverseCache）
+            offline_resolver: 离线地名库（可选，例如offline_gazetteer.OfflineGazetteer）
+            offline_reverse_resolver: 离线反向地理编码器（可选，例如offline_reverse_geocoder.OfflineReverseGeocoder）
+            single_flight: 请求合并器（可选，single_flight.AsyncSingleFlight），相同查询同时在途时只请求一次
+            rate_limiter: 自适应限流器（可选，rate_limiter.AdaptiveRateLimiter），根据限流错误调整请求速率并退避重试
+            request_policy: 请求策略（可选，request_policy.RequestPolicy），提供单次尝试超时、瞬时错误重试和对冲请求
+            circuit_breaker: 熔断器（可选，circuit_breaker.CircuitBreaker），上游故障时快速失败并返回降级结果
+            client_options: 创建客户端的连接参数（可选，见client_factory.make_client_config），
+                连接池默认不小于max_concurrency
+            index_router: 多索引路由器（可选，index_router.IndexRouter），按国家或坐标选择Place Index并故障转移
+            metrics: 指标集合（可选，metrics.GeocodeMetrics），记录各操作的延迟直方图和结果计数
+            fast_start: 快速启动（可选，默认读取环境变量GEOCODER_FAST_START），boto3客户端在第一次请求时创建
+        """
+        client_options = dict(client_options or {})
+        client_options.setdefault('max_pool_connections',
+                                  max(max_concurrency, DEFAULT_CLIENT_OPTIONS['max_pool_connections']))
+
+        # 复用同步版本的配置和结果构建逻辑，保证结果结构一致
+        self._service = AmazonLocationServicePOC(
+            profile_name=profile_name,
+            region_name=region_name,
+            location_client=location_client,
+            cache=cache,
+            reverse_cache=reverse_cache,
+            offline_resolver=offline_resolver,
+            offline_reverse_resolver=offline_reverse_resolver,
+            rate_limiter=rate_limiter,
+            request_policy=request_policy,
+            circuit_breaker=circuit_breaker,
+            client_options=client_options,
+            index_router=index_router,
+            metrics=metrics,
+            fast_start=fast_start
+        )
+        if metrics is not None and single_flight is not None:
+            self._service._register_collectors(metrics, single_flight=single_flight)
+        self.single_flight = single_flight
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # 未注入客户端时使用boto3客户端（非原生异步），不为判断而提前创建
+        self._native_async = inspect.iscoroutinefunction(
+            getattr(location_client, 'search_place_index_for_text', None)
+        )
+        self._executor = None if self._native_async else ThreadPoolExecutor(max_workers=max_concurrency)
+
+        logger.info("  异步模式: %s (最大并发 %d)", '原生协程' if self._native_async else '线程池', max_concurrency)
+
+    @property
+    def location_client(self):
+        return self._service.location_client
+
+    @property
+    def cache(self):
+        return self._service.cache
+
+    @property
+    def rate_limiter(self):
+        return self._service.rate_limiter
+
+    @property
+    def request_policy(self):
+        return self._service.request_policy
+
+    @property
+    def circuit_breaker(self):
+        return self._service.circuit_breaker
+
+    @property
+    def place_index_name(self) -> str:
+        return self._service.place_index_name
+
+    @place_index_name.setter
+    def place_index_name(self, value: str):
+        self._service.place_index_name = value
+
+    async def _call(self, operation: str, **params) -> Dict:
+        """在并发上限内调用location客户端，启用请求策略时按策略超时、重试和对冲"""
+        method = getattr(self.location_client, operation)
+        async with self._semaphore:
+            # 策略在并发槽位内执行，单次尝试超时不包含排队等待时间
+            if self.request_policy is None:
+                return await self._invoke(method, params)
+            return await self.request_policy.call_async(lambda: self._invoke(method, params), self.rate_limiter)
+
+    async def _invoke(self, method, params: Dict) -> Dict:
+        """执行一次客户端调用（原生协程或线程池）"""
+        if self._native_async:
+            return await method(**params)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: method(**params))
+
+    async def _call_upstream(self, operation: str, params: Dict) -> Dict:
+        """调用上游接口，启用自适应限流时按当前速率发出请求并重试限流错误，熔断器打开时抛出CircuitOpenError"""
+        call = lambda: self._call(operation, **params)
+        if self.rate_limiter is not None:
+            # 有请求策略时由策略在每次尝试和对冲前获取配额，限流器只处理限流反馈
+            call = partial(self.rate_limiter.call_async, call, acquire=self.request_policy is None)
+        if self.circuit_breaker is not None:
+            return await self.circuit_breaker.call_async(call)
+        return await call()
+
+    async def _routed_call(self, operation: str, params: Dict, country: Optional[str] = None) -> Dict:
+        """启用多索引路由时按候选索引依次调用上游，否则使用params中的索引"""
+        router = self._service.index_router
+        if router is None:
+            return await self._call_upstream(operation, params)
+
+        if operation == 'search_place_index_for_text':
+            candidates = router.route(country=country)
+        else:
+            longitude, latitude = params['Position']
+            candidates = router.route(position=(latitude, longitude))
+        return await router.call_async(
+            candidates, lambda index_name: self._call_upstream(operation, dict(params, IndexName=index_name))
+        )
+
+    async def _search(self, operation: str, params: Dict, country: Optional[str] = None) -> Dict:
+        """调用上游接口，启用请求合并时共享在途的相同请求"""
+        if self.single_flight is None:
+            return await self._routed_call(operation, params, country)
+        return await self.single_flight.do(
+            self._service._flight_key(operation, params),
+            lambda: self._routed_call(operation, params, country)
+        )
+
+    async def geocode_city(self, city_name: str, country: str = None, max_results: int = 1) -> Optional[Dict]:
+        """
+        异步地理编码
+
+        Args:
+            city_name: 城市名称
+            country: 国家名称（可选）
+            max_results: 最大结果数量
+
+        Returns:
+            地理编码结果字典
+        """
+        service = self._service
+        invalid = service._invalid_text_query(city_name, country)
+        if invalid is not None:
+            return invalid
+
+        query_text = build_query_text(city_name, country)
+        params = service._text_search_params(query_text, max_results)
+
+        cache_key, local_result = service._local_lookup_text(city_name, country, query_text, params, max_results)
+        if local_result is not None:
+            return local_result
+
+        try:
+            start_time = time.perf_counter()
+
+            response = await self._search('search_place_index_for_text', params, country)
+
+            response_time = time.perf_counter() - start_time
+
+            geocode_result = service._build_geocode_result(city_name, country, query_text, response, response_time)
+            service._cache_store(cache_key, geocode_result)
+            return service._record('text', 'success' if geocode_result['success'] else 'no_result', response_time,
+                                   result=geocode_result)
+
+        except botocore_exceptions.ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            return service._record('text', 'error', time.perf_counter() - start_time, e,
+                                   service._build_geocode_error(city_name, country, f"{error_code}: {error_message}"))
+        except CircuitOpenError:
+            return service._record('text', 'degraded', result=service._degraded_text_result(
+                city_name, country, query_text, max_results, cache_key))
+        except Exception as e:
+            return service._record('text', 'error', time.perf_counter() - start_time, e,
+                                   service._build_geocode_error(city_name, country, str(e)))
+
+    async def reverse_geocode(self, latitude: float, longitude: float) -> Optional[Dict]:
+        """
+        异步反向地理编码
+
+        Args:
+            latitude: 纬度
+            longitude: 经度
+
+        Returns:
+            反向地理编码结果
+        """
+        service = self._service
+        params = service._position_search_params(latitude, longitude)
+
+        cache_key, local_result = service._local_lookup_position(latitude, longitude, params)
+        if local_result is not None:
+            return local_result
+
+        try:
+            start_time = time.perf_counter()
+
+            response = await self._search('search_place_index_for_position', params)
+
+            response_time = time.perf_counter() - start_time
+
+            reverse_result = service._build_reverse_result(latitude, longitude, response, response_time)
+            service._cache_store_position(cache_key, latitude, longitude, reverse_result)
+            return service._record('position', 'success' if reverse_result['success'] else 'no_result',
+                                   response_time, result=reverse_result)
+
+        except CircuitOpenError:
+            return service._record('position', 'degraded',
+                                   result=service._degraded_reverse_result(latitude, longitude, cache_key))
+        except Exception as e:
+            return service._record('position', 'error', time.perf_counter() - start_time, e,
+                                   service._build_reverse_error(latitude, longitude, str(e)))
+
+    async def _geocode_limited(self, limiter: Optional[TokenBucket], city: str, country: str) -> Dict:
+        """按速率限制执行单个地理编码"""
+        if limiter is not None:
+            wait = limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        return await self.geocode_city(city, country)
+
+    async def batch_geocode(self, cities: List[tuple], requests_per_second: float = None,
+                            deduplicate: bool = False, compact: bool = False) -> List[Dict]:
+        """
+        异步批量地理编码
+
+        Args:
+            cities: 城市列表，格式为 [(city, country), ...]
+            requests_per_second: 每秒最大请求数（可选）
+            deduplicate: 是否先规范化并去重，相同查询只请求一次
+            compact: 是否逐条转换为紧凑记录，返回geocode_results.ResultBatch
+
+        Returns:
+            结果列表（与输入顺序一致）
+        """
+        if deduplicate:
+            plan = self._service._dedupe(cities)
+            unique_results = await self.batch_geocode(plan.unique, requests_per_second=requests_per_second,
+                                                      compact=compact)
+            return fan_out(plan, cities, unique_results)
+
+        logger.info("\n=== 异步批量地理编码 ===\n城市数量: %d\n最大并发: %d", len(cities), self.max_concurrency)
+
+        limiter = TokenBucket(requests_per_second) if requests_per_second else None
+        results = self._service._new_results(compact)
+
+        async def geocode_one(city, country):
+            result = await self._geocode_limited(limiter, city, country)
+            return results.compact(result) if compact else result
+
+        results.extend(await asyncio.gather(*(geocode_one(city, country) for city, country in cities)))
+
+        success_count = len([r for r in results if r['success']])
+        logger.info("\n异步批量处理完成: 成功 %d/%d 个城市", success_count, len(cities))
+        return results
+
+    async def iter_geocode(self, cities: Iterable[tuple],
+                           requests_per_second: float = None) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        流式批量地理编码，按完成顺序逐个产出结果
+
+        输入按需读取，同时挂起的任务数不超过max_concurrency，
+        因此适用于任意长度的输入迭代器。
+
+        Args:
+            cities: 城市迭代器，元素格式为 (city, country)
+            requests_per_second: 每秒最大请求数（可选）
+
+        Yields:
+            (输入序号, 结果字典)
+        """
+        limiter = TokenBucket(requests_per_second) if requests_per_second else None
+        pending = {}
+        city_iter = enumerate(cities)
+        exhausted = False
+
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.max_concurrency:
+                    try:
+                        index, (city, country) = next(city_iter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    task = asyncio.ensure_future(self._geocode_limited(limiter, city, country))
+                    pending[task] = index
+
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result()
+        finally:
+            # 调用方提前停止迭代时取消未完成的请求
+            for task in pending:
+                task.cancel()
+
+    async def get_place_index_info(self) -> Dict:
+        """异步获取Place Index信息"""
+        try:
+            response = await self._call('describe_place_index', IndexName=self.place_index_name)
+            return self._service._build_index_info(response)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def close(self):
+        """释放线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+
+async def run_async_demo():
+    """使用异步接口运行POC查询"""
+    configure_logging(queued=False)
+
+    async with AsyncLocationServicePOC(profile_name="oversea1", region_name="us-west-2") as service:
+        cities = [
+            ("北京", "中国"),
+            ("上海", "中国"),
+            ("New York", "United States"),
+            ("London", "United Kingdom"),
+            ("Tokyo", "Japan")
+        ]
+
+        batch_results = await service.batch_geocode(cities)
+
+        print(f"\n{'='*60}")
+        print("流式地理编码（按完成顺序）")
+        print(f"{'='*60}")
+        async for index, result in service.iter_geocode(cities):
+            status = "✓" if result['success'] else "✗"
+            print(f"{status} [{index}] {result['input_city']}")
+
+        reverse_result = await service.reverse_geocode(40.190632, 116.412144)
+        return batch_results, reverse_result
+
+
+if __name__ == "__main__":
+    asyncio.run(run_async_demo())
@@ -2,79 +2,171 @@
 """
 Amazon Location Service POC - 使用AWS CLI版本
 Profile: oversea1, Region: us-west-2
+
+默认在进程内把CLI命令分派给共享的botocore客户端（与 aws CLI 使用相同的参数名和输出格式），
+每次查询只有一次网络往返；dispatch="subprocess" 时为每条命令启动一个 aws 进程
 """
 
+import datetime
+import logging
+import re
+import shutil
 import subprocess
 import json
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 
+from client_factory import get_client
+from fast_start import LazyModule, fast_start_enabled
+from geocode_logging import configure_logging, log_request, logger, request_logger
+from geocode_results import (ResultBatch, build_aws_info, build_geocode_error, build_geocode_result,
+                             build_reverse_error, build_reverse_result)
+from rate_limiter import TokenBucket
+
+DISPATCH_MODES = ('inprocess', 'subprocess')
+
+# 进程内分派第一次执行命令时才加载botocore（此时共享客户端已创建）
+botocore = LazyModule('botocore')
+
+# CLI/botocore错误文本中的错误码: An error occurred (ThrottlingException) when calling ...
+_ERROR_CODE_PATTERN = re.compile(r'An error occurred \((\w+)\)')
+
+
+def _to_cli_output(value):
+    """把botocore响应转换为与 aws CLI JSON输出一致的结构（时间转ISO字符串，去掉ResponseMetadata）"""
+    if isinstance(value, dict):
+        return {k: _to_cli_output(v) for k, v in value.items() if k != 'ResponseMetadata'}
+    if isinstance(value, list):
+        return [_to_cli_output(v) for v in value]
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def _convert_cli_value(shape, value):
+    """按参数模型把CLI字符串参数转换为API参数类型"""
+    if not isinstance(value, str):
+        return value
+    type_name = shape.type_name
+    if type_name in ('integer', 'long'):
+        return int(value)
+    if type_name in ('float', 'double'):
+        return float(value)
+    if type_name == 'boolean':
+        return value.lower() == 'true'
+    if type_name == 'list':
+        return [_convert_cli_value(shape.member, item.strip()) for item in value.split(',')]
+    if type_name in ('structure', 'map'):
+        return json.loads(value)
+    return value
+
+
 class LocationServiceCLIPOC:
-    def __init__(self, profile_name="oversea1", region_name="us-west-2"):
+    def __init__(self, profile_name="oversea1", region_name="us-west-2", dispatch="inprocess",
+                 health_check=None, location_client=None, metrics=None, client_options=None, fast_start=None):
         """
         初始化Amazon Location Service CLI客户端
+        
+        Args:
+            profile_name: AWS profile名称
+            region_name: AWS区域
+            dispatch: 命令执行方式，"inprocess"（进程内botocore客户端）或 "subprocess"（每条命令启动aws进程）
+            health_check: 是否在初始化时检查Location Service可用性（一次list-place-indexes请求），
+                默认快速启动时不检查，否则检查
+            location_client: 已创建的location客户端（可选，仅inprocess模式，用于注入模拟端点）
+            metrics: 指标集合（可选，metrics.GeocodeMetrics），记录各操作的延迟直方图和结果计数
+            client_options: 进程内分派创建客户端的连接参数（可选，见client_factory.get_client），
+                例如 {'read_timeout': 5}
+            fast_start: 快速启动（可选，默认读取环境变量GEOCODER_FAST_START）：初始化时不检查aws CLI、
+                不发送健康检查请求，客户端在第一次命令时创建；aws CLI缺失时第一条子进程命令返回错误
         """
+        if dispatch not in DISPATCH_MODES:
+            raise ValueError(f"dispatch必须是 {DISPATCH_MODES} 之一")
+        
         self.profile_name = profile_name
         self.region_name = region_name
         self.place_index_name = "CityGeocodingIndex"
+        self.dispatch = dispatch
+        self._location_client = location_client
+        self._client_options = dict(client_options or {})
+        self.metrics = metrics
         
-        print(f"✓ 初始化Amazon Location Service CLI客户端")
-        print(f"  Profile: {profile_name}")
-        print(f"  Region: {region_name}")
-        print(f"  Place Index: {self.place_index_name}")
+        logger.info("✓ 初始化Amazon Location Service CLI客户端\n  Profile: %s\n  Region: %s\n  Place Index: %s\n  执行方式: %s",
+                    profile_name, region_name, self.place_index_name,
+                    '进程内分派' if dispatch == 'inprocess' else '子进程')
         
-        # 检查AWS CLI可用性
-        if not self._check_aws_cli():
+        fast_start = fast_start_enabled(fast_start)
+        if health_check is None:
+            health_check = not fast_start
+        
+        # 检查AWS CLI可用性（进程内分派不需要CLI）
+        if dispatch == 'subprocess' and not fast_start and not self._check_aws_cli():
             raise Exception("AWS CLI不可用")
         
         # 检查Location Service可用性
-        if not self._check_location_service():
+        if health_check and not self._check_location_service():
             raise Exception("Amazon Location Service不可用")
     
     def _check_aws_cli(self) -> bool:
-        """检查AWS CLI是否可用"""
-        try:
-            result = subprocess.run(['aws', '--version'], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                print(f"✓ AWS CLI可用: {result.stdout.strip()}")
-                return True
-            else:
-                print(f"✗ AWS CLI不可用: {result.stderr}")
-                return False
-        except Exception as e:
-            print(f"✗ AWS CLI检查失败: {e}")
-            return False
+        """检查AWS CLI是否可用（只查找可执行文件，不启动进程）"""
+        path = shutil.which('aws')
+        if path:
+            logger.info("✓ AWS CLI可用: %s", path)
+            return True
+        logger.error("✗ AWS CLI不可用: 未在PATH中找到aws")
+        return False
     
     def _check_location_service(self) -> bool:
         """检查Location Service是否可用"""
-        try:
-            cmd = [
-                'aws', 'location', 'list-place-indexes',
-                '--profile', self.profile_name,
-                '--region', self.region_name
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                print(f"✓ Amazon Location Service可用")
-                return True
-            else:
-                print(f"✗ Amazon Location Service不可用: {result.stderr}")
-                return False
-        except Exception as e:
-            print(f"✗ Location Service检查失败: {e}")
-            return False
+        result = self._run_aws_command('location', 'list-place-indexes', {'max-results': '1'})
+        if result['success']:
+            logger.info("✓ Amazon Location Service可用")
+            return True
+        logger.error("✗ Amazon Location Service不可用: %s", result['error'])
+        return False
+    
+    def _record(self, operation: str, outcome: str, seconds: float = None, error: str = None,
+                result: Dict = None) -> Optional[Dict]:
+        """
+        记录请求指标和请求日志（未启用指标、请求日志未开启时不做任何事），错误按CLI错误文本中的错误码计数
+        
+        Returns:
+            传入的结果，便于在return语句中使用
+        """
+        if self.metrics is not None:
+            if error is not None:
+                match = _ERROR_CODE_PATTERN.search(error)
+                error = match.group(1) if match else 'CommandError'
+            self.metrics.record_request(operation, outcome, seconds, error)
+        if result is not None:
+            log_request(operation, outcome, result, seconds)
+        return result
+    
+    def _get_client(self, service: str):
+        """获取进程内分派使用的客户端"""
+        if service == 'location' and self._location_client is not None:
+            return self._location_client
+        return get_client(service, self.profile_name, self.region_name, **self._client_options)
     
     def _run_aws_command(self, service: str, operation: str, parameters: Dict = None) -> Dict:
-        """执行AWS CLI命令"""
+        """
+        执行AWS CLI命令
+        
+        Returns:
+            成功时 {'success': True, 'data': CLI JSON输出, 'command': 命令}，
+            失败时 {'success': False, 'error': 错误信息, 'command': 命令}
+        """
         cmd = ['aws', service, operation, '--profile', self.profile_name, '--region', self.region_name]
         
         if parameters:
             for key, value in parameters.items():
                 cmd.extend([f'--{key}', str(value)])
         
+        if self.dispatch == 'inprocess':
+            return self._dispatch_inprocess(service, operation, parameters or {}, cmd)
+        
         try:
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
             
@@ -103,11 +195,45 @@ class LocationServiceCLIPOC:
                 'command': ' '.join(cmd)
             }
     
+    def _dispatch_inprocess(self, service: str, operation: str, parameters: Dict, cmd: List[str]) -> Dict:
+        """在进程内用botocore客户端执行CLI命令，返回与子进程方式相同结构的结果"""
+        try:
+            client = self._get_client(service)
+            method_name = operation.replace('-', '_')
+            if method_name not in client.meta.method_to_api_mapping:
+                raise ValueError(f"Invalid choice: '{operation}'")
+            operation_model = client.meta.service_model.operation_model(
+                client.meta.method_to_api_mapping[method_name]
+            )
+            members = operation_model.input_shape.members if operation_model.input_shape else {}
+            by_cli_name = {botocore.xform_name(name, '-'): name for name in members}
+            
+            params = {}
+            for key, value in parameters.items():
+                name = by_cli_name.get(key)
+                if name is None:
+                    raise ValueError(f"Unknown options: --{key}")
+                params[name] = _convert_cli_value(members[name], value)
+            
+            response = getattr(client, method_name)(**params)
+            return {
+                'success': True,
+                'data': _to_cli_output(response),
+                'command': ' '.join(cmd)
+            }
+        except Exception as e:
+            # ClientError的文本与CLI的stderr格式一致: An error occurred (Code) when calling ...
+            error = str(e)
+        
+        return {
+            'success': False,
+            'error': error,
+            'command': ' '.join(cmd)
+        }
+    
     def setup_place_index(self, data_source="Esri") -> bool:
         """创建Place Index"""
-        print(f"\n=== 设置Place Index ===")
-        print(f"索引名称: {self.place_index_name}")
-        print(f"数据源: {data_source}")
+        logger.info("\n=== 设置Place Index ===\n索引名称: %s\n数据源: %s", self.place_index_name, data_source)
         
         # 检查是否已存在
         check_result = self._run_aws_command('location', 'describe-place-index', {
@@ -115,14 +241,13 @@ class LocationServiceCLIPOC:
         })
         
         if check_result['success']:
-            print(f"✓ Place Index已存在")
             index_info = check_result['data']
-            print(f"  状态: {index_info.get('Status')}")
-            print(f"  数据源: {index_info.get('DataSource')}")
+            logger.info("✓ Place Index已存在\n  状态: %s\n  数据源: %s",
+                        index_info.get('Status'), index_info.get('DataSource'))
             return True
         
         # 创建新的Place Index
-        print("Place Index不存在，正在创建...")
+        logger.info("Place Index不存在，正在创建...")
         
         create_params = {
             'index-name': self.place_index_name,
@@ -134,12 +259,11 @@ class LocationServiceCLIPOC:
         create_result = self._run_aws_command('location', 'create-place-index', create_params)
         
         if create_result['success']:
-            print(f"✓ Place Index创建请求已提交")
             index_arn = create_result['data'].get('IndexArn')
-            print(f"  ARN: {index_arn}")
+            logger.info("✓ Place Index创建请求已提交\n  ARN: %s", index_arn)
             
             # 等待创建完成
-            print("等待索引创建完成...")
+            logger.info("等待索引创建完成...")
             max_attempts = 24
             for attempt in range(max_attempts):
                 time.sleep(5)
@@ -150,33 +274,31 @@ class LocationServiceCLIPOC:
                 
                 if status_result['success']:
                     status = status_result['data'].get('Status')
-                    print(f"  状态检查 {attempt + 1}/{max_attempts}: {status}")
+                    logger.info("  状态检查 %d/%d: %s", attempt + 1, max_attempts, status)
                     
                     if status == 'Active':
-                        print("✓ Place Index创建完成并已激活")
+                        logger.info("✓ Place Index创建完成并已激活")
                         return True
                     elif status == 'Failed':
-                        print("✗ Place Index创建失败")
+                        logger.error("✗ Place Index创建失败")
                         return False
                 else:
-                    print(f"  状态检查失败: {status_result['error']}")
+                    logger.warning("  状态检查失败: %s", status_result['error'])
             
-            print("✗ 等待超时，Place Index可能仍在创建中")
+            logger.error("✗ 等待超时，Place Index可能仍在创建中")
             return False
         else:
-            print(f"✗ 创建Place Index失败: {create_result['error']}")
+            logger.error("✗ 创建Place Index失败: %s", create_result['error'])
             return False
     
     def geocode_city(self, city_name: str, country: str = None) -> Dict:
         """地理编码查询"""
-        print(f"\n--- 查询城市: {city_name} ---")
-        
         # 构建查询文本
         query_text = city_name
         if country:
             query_text = f"{city_name}, {country}"
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # 构建搜索参数
         search_params = {
@@ -187,87 +309,41 @@ class LocationServiceCLIPOC:
         }
         
         result = self._run_aws_command('location', 'search-place-index-for-text', search_params)
-        response_time = time.time() - start_time
+        response_time = time.perf_counter() - start_time
         
         if result['success']:
             data = result['data']
-            results = data.get('Results', [])
             
-            if results:
-                place_result = results[0]
-                place = place_result['Place']
-                geometry = place['Geometry']['Point']
-                
-                geocode_result = {
-                    'success': True,
-                    'input_city': city_name,
-                    'input_country': country,
-                    'query_text': query_text,
-                    'coordinates': {
-                        'latitude': geometry[1],  # Location Service返回[lon, lat]
-                        'longitude': geometry[0]
-                    },
-                    'address': {
-                        'label': place.get('Label'),
-                        'country': place.get('Country'),
-                        'region': place.get('Region'),
-                        'sub_region': place.get('SubRegion'),
-                        'municipality': place.get('Municipality'),
-                        'postal_code': place.get('PostalCode')
-                    },
-                    'metadata': {
-                        'relevance': place_result.get('Relevance'),
-                        'place_id': place_result.get('PlaceId'),
-                        'data_source': data.get('Summary', {}).get('DataSource'),
-                        'response_time_seconds': response_time
-                    },
-                    'aws_info': {
-                        'profile': self.profile_name,
-                        'region': self.region_name,
-                        'place_index': self.place_index_name,
-                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
-                    }
-                }
-                
-                print(f"✓ 查询成功")
-                print(f"  坐标: ({geocode_result['coordinates']['latitude']:.6f}, {geocode_result['coordinates']['longitude']:.6f})")
-                print(f"  地址: {place.get('Label')}")
-                print(f"  相关性: {place_result.get('Relevance'):.2f}")
-                print(f"  响应时间: {response_time:.2f}秒")
-                
-                return geocode_result
+            if data.get('Results'):
+                geocode_result = build_geocode_result(city_name, country, query_text, data, response_time,
+                                                      self._aws_info())
+                return self._record('text', 'success', response_time, result=geocode_result)
             else:
-                print(f"✗ 未找到匹配结果")
-                return {
-                    'success': False,
-                    'input_city': city_name,
-                    'input_country': country,
-                    'error': '未找到匹配的城市',
-                    'response_time_seconds': response_time
-                }
+                return self._record('text', 'no_result', response_time, result=build_geocode_error(
+                    city_name, country, '未找到匹配的城市', self._aws_info(timestamp=False)))
         else:
-            print(f"✗ 查询失败: {result['error']}")
-            return {
-                'success': False,
-                'input_city': city_name,
-                'input_country': country,
-                'error': result['error'],
-                'response_time_seconds': response_time
-            }
+            return self._record('text', 'error', response_time, result['error'], build_geocode_error(
+                city_name, country, result['error'], self._aws_info(timestamp=False)))
     
-    def batch_geocode(self, cities: List[tuple], delay: float = 1.0) -> List[Dict]:
-        """批量地理编码"""
-        print(f"\n=== 批量地理编码 ===")
-        print(f"城市数量: {len(cities)}")
-        print(f"请求间隔: {delay}秒")
+    def _aws_info(self, timestamp: bool = True) -> Dict:
+        """结果中的aws_info字段"""
+        return build_aws_info(self.profile_name, self.region_name, self.place_index_name, timestamp)
+    
+    def batch_geocode(self, cities: List[tuple], delay: float = 1.0, compact: bool = False) -> List[Dict]:
+        """批量地理编码（compact为True时逐条转换为紧凑记录，返回geocode_results.ResultBatch）"""
+        logger.info("\n=== 批量地理编码 ===\n城市数量: %d\n请求间隔: %s秒", len(cities), delay)
         
-        results = []
+        results = ResultBatch(self.profile_name, self.region_name) if compact else []
         success_count = 0
+        log_progress = request_logger.isEnabledFor(logging.INFO)
         
         for i, (city, country) in enumerate(cities, 1):
-            print(f"\n[{i}/{len(cities)}] 处理: {city}")
+            if log_progress:
+                request_logger.info("\n[%d/%d] 处理: %s", i, len(cities), city)
             
             result = self.geocode_city(city, country)
+            if compact:
+                result = results.compact(result)
             results.append(result)
             
             if result['success']:
@@ -277,14 +353,50 @@ class LocationServiceCLIPOC:
             if i < len(cities):
                 time.sleep(delay)
         
-        print(f"\n批量处理完成: 成功 {success_count}/{len(cities)} 个城市")
+        logger.info("\n批量处理完成: 成功 %d/%d 个城市", success_count, len(cities))
+        return results
+    
+    def batch_geocode_parallel(self, cities: List[tuple], max_workers: int = 8,
+                               requests_per_second: float = 5.0, compact: bool = False) -> List[Dict]:
+        """
+        并行批量地理编码
+        
+        同时最多运行max_workers条命令（subprocess模式下即max_workers个aws进程，
+        每个进程的输出由各自的工作线程通过communicate读取，互不阻塞），
+        所有命令共享一个令牌桶按每秒请求数限流，代替固定的请求间隔。
+        
+        Args:
+            cities: 城市列表，格式为 [(city, country), ...]
+            max_workers: 同时运行的命令数
+            requests_per_second: 每秒最大启动命令数
+            compact: 是否在工作线程中逐条转换为紧凑记录，返回geocode_results.ResultBatch
+        
+        Returns:
+            结果列表（与输入顺序一致）
+        """
+        logger.info("\n=== 并行批量地理编码 ===\n城市数量: %d\n并行命令: %d\n速率限制: %s 请求/秒",
+                    len(cities), max_workers, requests_per_second)
+        
+        limiter = TokenBucket(requests_per_second)
+        results = ResultBatch(self.profile_name, self.region_name) if compact else []
+        
+        def geocode_one(item):
+            city, country = item
+            limiter.acquire()
+            result = self.geocode_city(city, country)
+            return results.compact(result) if compact else result
+        
+        # executor.map按输入顺序返回结果
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results.extend(executor.map(geocode_one, cities))
+        
+        success_count = len([r for r in results if r['success']])
+        logger.info("\n并行批量处理完成: 成功 %d/%d 个城市", success_count, len(cities))
         return results
     
     def reverse_geocode(self, latitude: float, longitude: float) -> Dict:
         """反向地理编码"""
-        print(f"\n--- 反向地理编码: ({latitude}, {longitude}) ---")
-        
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # 构建搜索参数
         search_params = {
@@ -295,75 +407,31 @@ class LocationServiceCLIPOC:
         }
         
         result = self._run_aws_command('location', 'search-place-index-for-position', search_params)
-        response_time = time.time() - start_time
+        response_time = time.perf_counter() - start_time
         
         if result['success']:
             data = result['data']
-            results = data.get('Results', [])
             
-            if results:
-                place_result = results[0]
-                place = place_result['Place']
-                
-                reverse_result = {
-                    'success': True,
-                    'input_coordinates': {
-                        'latitude': latitude,
-                        'longitude': longitude
-                    },
-                    'address': {
-                        'label': place.get('Label'),
-                        'country': place.get('Country'),
-                        'region': place.get('Region'),
-                        'sub_region': place.get('SubRegion'),
-                        'municipality': place.get('Municipality'),
-                        'neighborhood': place.get('Neighborhood'),
-                        'postal_code': place.get('PostalCode')
-                    },
-                    'metadata': {
-                        'relevance': place_result.get('Relevance'),
-                        'distance': place_result.get('Distance'),
-                        'place_id': place_result.get('PlaceId'),
-                        'response_time_seconds': response_time
-                    },
-                    'aws_info': {
-                        'profile': self.profile_name,
-                        'region': self.region_name,
-                        'place_index': self.place_index_name,
-                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
-                    }
-                }
-                
-                print(f"✓ 反向地理编码成功")
-                print(f"  地址: {place.get('Label')}")
-                print(f"  相关性: {place_result.get('Relevance'):.2f}")
-                print(f"  响应时间: {response_time:.2f}秒")
-                
-                return reverse_result
+            if data.get('Results'):
+                reverse_result = build_reverse_result(latitude, longitude, data, response_time, self._aws_info())
+                return self._record('position', 'success', response_time, result=reverse_result)
             else:
-                print(f"✗ 未找到地址信息")
-                return {
-                    'success': False,
-                    'input_coordinates': {'latitude': latitude, 'longitude': longitude},
-                    'error': '未找到地址信息',
-                    'response_time_seconds': response_time
-                }
+                return self._record('position', 'no_result', response_time, result=build_reverse_error(
+                    latitude, longitude, '未找到地址信息', self._aws_info(timestamp=False)))
         else:
-            print(f"✗ 反向地理编码失败: {result['error']}")
-            return {
-                'success': False,
-                'input_coordinates': {'latitude': latitude, 'longitude': longitude},
-                'error': result['error'],
-                'response_time_seconds': response_time
-            }
+            return self._record('position', 'error', response_time, result['error'], build_reverse_error(
+                latitude, longitude, result['error'], self._aws_info(timestamp=False)))
     
     def get_place_index_info(self) -> Dict:
         """获取Place Index信息"""
+        start_time = time.perf_counter()
         result = self._run_aws_command('location', 'describe-place-index', {
             'index-name': self.place_index_name
         })
+        response_time = time.perf_counter() - start_time
         
         if result['success']:
+            self._record('describe', 'success', response_time)
             data = result['data']
             return {
                 'success': True,
@@ -380,6 +448,7 @@ class LocationServiceCLIPOC:
                 }
             }
         else:
+            self._record('describe', 'error', response_time, result['error'])
             return {
                 'success': False,
                 'error': result['error']
@@ -387,25 +456,27 @@ class LocationServiceCLIPOC:
     
     def cleanup_resources(self) -> bool:
         """清理测试资源"""
-        print(f"\n=== 清理资源 ===")
+        logger.info("\n=== 清理资源 ===")
         
         result = self._run_aws_command('location', 'delete-place-index', {
             'index-name': self.place_index_name
         })
         
         if result['success']:
-            print(f"✓ 成功删除Place Index: {self.place_index_name}")
+            logger.info("✓ 成功删除Place Index: %s", self.place_index_name)
             return True
         else:
             if 'ResourceNotFoundException' in result['error']:
-                print(f"Place Index不存在，无需删除")
+                logger.info("Place Index不存在，无需删除")
                 return True
             else:
-                print(f"✗ 删除Place Index失败: {result['error']}")
+                logger.error("✗ 删除Place Index失败: %s", result['error'])
                 return False
 
 def run_location_service_cli_poc():
     """运行Amazon Location Service CLI POC测试"""
+    # 演示输出与print交错，使用同步输出保证顺序
+    configure_logging(queued=False)
     
     print("=" * 80)
     print("Amazon Location Service 城市地理编码 POC (AWS CLI版本)")
@@ -489,7 +560,7 @@ def run_location_service_cli_poc():
                 'place_index_name': location_service.place_index_name,
                 'test_timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime()),
                 'data_source': 'Esri',
-                'test_method': 'AWS CLI'
+                'test_method': f'AWS CLI ({location_service.dispatch})'
             },
             'place_index_info': index_info,
             'single_city_results': single_results,
@@ -502,6 +573,14 @@ def run_location_service_cli_poc():
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(all_results, f, ensure_ascii=False, indent=2, default=str)
         
+        # 批量结果另存为列式文件，便于分析任务内存映射读取
+        try:
+            from columnar_export import export_columnar
+            columnar_file = export_columnar(batch_results, "location_service_cli_batch_results")
+        except ImportError as e:
+            columnar_file = None
+            print(f"跳过列式导出: {e}")
+        
         print(f"\n{'='*60}")
         print("测试汇总")
         print(f"{'='*60}")
@@ -514,6 +593,8 @@ def run_location_service_cli_poc():
         print(f"批量查询: {batch_success}/{len(batch_results)} 成功")
         print(f"反向地理编码: {reverse_success}/{len(reverse_results)} 成功")
         print(f"测试结果已保存到: {output_file}")
+        if columnar_file:
+            print(f"批量结果列式文件: {columnar_file}")
         
         # 询问是否清理资源
         print(f"\n{'='*60}")
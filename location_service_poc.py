@@ -5,42 +5,144 @@ Amazon Location Service POC
 Profile: oversea1, Region: us-west-2
 """
 
-import boto3
 import json
+import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Dict, List, Optional
-from botocore.exceptions import ClientError, NoCredentialsError
+
+from batch_dedup import dedupe_cities, fan_out
+from circuit_breaker import CircuitOpenError
+from client_factory import get_client
+from fast_start import LazyModule, fast_start_enabled
+from geocode_cache import SQLiteCache, make_position_key, make_text_key
+from geocode_logging import configure_logging, log_request, logger, request_logger
+from geocode_results import (OFFLINE_PLACE_INDEX, VALIDATION_ERROR_CODE, ResultBatch, build_aws_info,
+                             build_geocode_error, build_geocode_result, build_query_text, build_reverse_error,
+                             build_reverse_result, text_query_error)
+from rate_limiter import TokenBucket
+
+# botocore只在创建客户端或处理其异常时才需要，导入本模块时不加载
+botocore_exceptions = LazyModule('botocore.exceptions')
 
 class AmazonLocationServicePOC:
-    def __init__(self, profile_name="oversea1", region_name="us-west-2"):
+    def __init__(self, profile_name="oversea1", region_name="us-west-2", location_client=None, cache=None,
+                 reverse_cache=None, offline_resolver=None, offline_reverse_resolver=None, single_flight=None,
+                 rate_limiter=None, request_policy=None, circuit_breaker=None, client_options=None,
+                 index_router=None, metrics=None, fast_start=None):
         """
         初始化Amazon Location Service客户端
         
         Args:
             profile_name: AWS profile名称
             region_name: AWS区域
+            location_client: 已创建的location客户端（可选，用于复用客户端或注入模拟客户端）
+            cache: 结果缓存（可选，例如geocode_cache.LRUTTLCache）
+            reverse_cache: 反向地理编码空间缓存（可选，例如spatial_cache.GeohashReverseCache）
+            offline_resolver: 离线地名库（可选，例如offline_gazetteer.OfflineGazetteer），
+                缓存未命中时查询（顺序与geocoder.make_geocoder相同），未命中时才请求Location Service；
+                命中结果的aws_info.place_index为 "offline"
+            offline_reverse_resolver: 离线反向地理编码器（可选，例如offline_reverse_geocoder.OfflineReverseGeocoder）
+            single_flight: 请求合并器（可选，single_flight.SingleFlight），相同查询同时在途时只请求一次
+            rate_limiter: 自适应限流器（可选，rate_limiter.AdaptiveRateLimiter），根据限流错误调整请求速率并退避重试；
+                启用时新建的客户端关闭botocore自带重试，限流错误直接反馈给限流器
+            request_policy: 请求策略（可选，request_policy.RequestPolicy），提供单次尝试超时、瞬时错误重试和对冲请求
+            circuit_breaker: 熔断器（可选，circuit_breaker.CircuitBreaker），上游故障时快速失败，
+                并尽量使用过期缓存或离线解析器返回降级结果（结果中degraded为True）
+            client_options: 创建客户端的连接参数（可选，见client_factory.make_client_config），
+                例如 {'max_pool_connections': 64, 'read_timeout': 5}
+            index_router: 多索引路由器（可选，index_router.IndexRouter），按国家或坐标选择Place Index，
+                失败或无结果时故障转移到备用索引；结果的aws_info.place_index为实际使用的索引
+            metrics: 指标集合（可选，metrics.GeocodeMetrics），记录各操作的延迟直方图和结果计数，
+                并在导出时读取缓存、请求合并、限流等组件的统计
+            fast_start: 快速启动（可选，默认读取环境变量GEOCODER_FAST_START）：初始化时不导入boto3、不创建客户端，
+                第一次请求时才创建；凭证或profile错误推迟到第一次请求时出现
         """
         self.profile_name = profile_name
         self.region_name = region_name
         self.place_index_name = "CityGeocodingIndex"
-        
+        self.cache = cache
+        self.reverse_cache = reverse_cache
+        self.offline_resolver = offline_resolver
+        self.offline_reverse_resolver = offline_reverse_resolver
+        self.single_flight = single_flight
+        self.rate_limiter = rate_limiter
+        self.request_policy = request_policy
+        self.circuit_breaker = circuit_breaker
+        self.index_router = index_router
+        self.metrics = metrics
+        if metrics is not None:
+            self._register_collectors(metrics)
+        
+        self._location_client = location_client
+        self._client_options = dict(client_options or {})
+        if rate_limiter is not None:
+            # 启用限流器时新建的客户端关闭botocore自带重试
+            self._client_options.setdefault('retries', {'mode': 'standard', 'max_attempts': 1})
+        
+        if fast_start_enabled(fast_start):
+            logger.info("✓ 快速启动Amazon Location Service (客户端在第一次请求时创建)\n"
+                        "  Profile: %s\n  Region: %s\n  Place Index: %s",
+                        profile_name, region_name, self.place_index_name)
+        else:
+            if location_client is None:
+                self._location_client = self._create_client()
+            logger.info("✓ 成功初始化Amazon Location Service\n  Profile: %s\n  Region: %s\n  Place Index: %s",
+                        profile_name, region_name, self.place_index_name)
+    
+    @property
+    def location_client(self):
+        """location客户端，未注入时在第一次访问时创建（进程内共享的客户端，复用连接池）"""
+        client = self._location_client
+        if client is None:
+            client = self._location_client = self._create_client()
+        return client
+    
+    @location_client.setter
+    def location_client(self, client):
+        self._location_client = client
+    
+    def _create_client(self):
+        """创建location客户端（get_client在锁内创建，并发的第一次请求得到同一个客户端）"""
         try:
-            # 创建会话和客户端
-            session = boto3.Session(profile_name=profile_name)
-            self.location_client = session.client('location', region_name=region_name)
-            
-            print(f"✓ 成功初始化Amazon Location Service")
-            print(f"  Profile: {profile_name}")
-            print(f"  Region: {region_name}")
-            print(f"  Place Index: {self.place_index_name}")
-            
-        except NoCredentialsError:
-            print(f"✗ 错误: 无法找到AWS凭证 (Profile: {profile_name})")
+            return get_client('location', self.profile_name, self.region_name, **self._client_options)
+        except botocore_exceptions.NoCredentialsError:
+            logger.error("✗ 错误: 无法找到AWS凭证 (Profile: %s)", self.profile_name)
             raise
         except Exception as e:
-            print(f"✗ 初始化失败: {e}")
+            logger.error("✗ 初始化失败: %s", e)
             raise
     
+    def _register_collectors(self, metrics, **components):
+        """把已启用组件的统计注册到指标集合"""
+        components = dict({
+            'cache': self.cache,
+            'reverse_cache': self.reverse_cache,
+            'single_flight': self.single_flight,
+            'rate_limiter': self.rate_limiter,
+            'request_policy': self.request_policy,
+            'circuit_breaker': self.circuit_breaker,
+            'index_router': self.index_router
+        }, **components)
+        for name, component in components.items():
+            if component is not None and hasattr(component, 'stats'):
+                metrics.register_collector(name, component.stats)
+    
+    def _record(self, operation: str, outcome: str, seconds: float = None, error: BaseException = None,
+                result: Dict = None) -> Optional[Dict]:
+        """
+        记录请求指标和请求日志（未启用指标、请求日志未开启时不做任何事）
+        
+        Returns:
+            传入的结果，便于在return语句中使用
+        """
+        if self.metrics is not None:
+            self.metrics.record_request(operation, outcome, seconds, error)
+        if result is not None:
+            log_request(operation, outcome, result, seconds)
+        return result
+    
     def setup_place_index(self, data_source="Esri"):
         """
         创建Place Index（地理编码索引）
@@ -48,9 +150,7 @@ class AmazonLocationServicePOC:
         Args:
             data_source: 数据源提供商 (Esri, HERE, Grab)
         """
-        print(f"\n=== 设置Place Index ===")
-        print(f"索引名称: {self.place_index_name}")
-        print(f"数据源: {data_source}")
+        logger.info("\n=== 设置Place Index ===\n索引名称: %s\n数据源: %s", self.place_index_name, data_source)
         
         try:
             # 检查索引是否已存在
@@ -58,14 +158,13 @@ class AmazonLocationServicePOC:
                 response = self.location_client.describe_place_index(
                     IndexName=self.place_index_name
                 )
-                print(f"✓ Place Index已存在")
-                print(f"  状态: {response.get('Status')}")
-                print(f"  数据源: {response.get('DataSource')}")
+                logger.info("✓ Place Index已存在\n  状态: %s\n  数据源: %s",
+                            response.get('Status'), response.get('DataSource'))
                 return True
                 
-            except ClientError as e:
+            except botocore_exceptions.ClientError as e:
                 if e.response['Error']['Code'] == 'ResourceNotFoundException':
-                    print("Place Index不存在，正在创建...")
+                    logger.info("Place Index不存在，正在创建...")
                 else:
                     raise
             
@@ -81,11 +180,10 @@ class AmazonLocationServicePOC:
                 }
             )
             
-            print(f"✓ 成功创建Place Index")
-            print(f"  ARN: {response.get('IndexArn')}")
+            logger.info("✓ 成功创建Place Index\n  ARN: %s", response.get('IndexArn'))
             
             # 等待索引创建完成
-            print("等待索引创建完成...")
+            logger.info("等待索引创建完成...")
             waiter = self.location_client.get_waiter('place_index_active')
             waiter.wait(
                 IndexName=self.place_index_name,
@@ -95,16 +193,16 @@ class AmazonLocationServicePOC:
                 }
             )
             
-            print("✓ Place Index创建完成并已激活")
+            logger.info("✓ Place Index创建完成并已激活")
             return True
             
-        except ClientError as e:
+        except botocore_exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
-            print(f"✗ 创建Place Index失败: {error_code} - {error_message}")
+            logger.error("✗ 创建Place Index失败: %s - %s", error_code, error_message)
             return False
         except Exception as e:
-            print(f"✗ 未知错误: {e}")
+            logger.error("✗ 未知错误: %s", e)
             return False
     
     def geocode_city(self, city_name: str, country: str = None, max_results: int = 1) -> Optional[Dict]:
@@ -119,145 +217,415 @@ class AmazonLocationServicePOC:
         Returns:
             地理编码结果字典
         """
-        print(f"\n--- 查询城市: {city_name} ---")
+        invalid = self._invalid_text_query(city_name, country)
+        if invalid is not None:
+            return invalid
         
         # 构建查询文本
-        query_text = city_name
-        if country:
-            query_text = f"{city_name}, {country}"
+        query_text = build_query_text(city_name, country)
+        params = self._text_search_params(query_text, max_results)
+        
+        cache_key, local_result = self._local_lookup_text(city_name, country, query_text, params, max_results)
+        if local_result is not None:
+            return local_result
         
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
             
-            response = self.location_client.search_place_index_for_text(
-                IndexName=self.place_index_name,
-                Text=query_text,
-                MaxResults=max_results,
-                Language='zh-CN'  # 优先中文结果
-            )
+            response = self._search_text(params, country)
             
-            response_time = time.time() - start_time
+            response_time = time.perf_counter() - start_time
             
-            if response.get('Results'):
-                result = response['Results'][0]
-                place = result['Place']
-                
-                geocode_result = {
-                    'success': True,
-                    'input_city': city_name,
-                    'input_country': country,
-                    'query_text': query_text,
-                    'coordinates': {
-                        'latitude': place['Geometry']['Point'][1],
-                        'longitude': place['Geometry']['Point'][0]
-                    },
-                    'address': {
-                        'label': place.get('Label'),
-                        'country': place.get('Country'),
-                        'region': place.get('Region'),
-                        'sub_region': place.get('SubRegion'),
-                        'municipality': place.get('Municipality'),
-                        'postal_code': place.get('PostalCode')
-                    },
-                    'metadata': {
-                        'relevance': result.get('Relevance'),
-                        'place_id': result.get('PlaceId'),
-                        'data_source': response.get('Summary', {}).get('DataSource'),
-                        'response_time_seconds': response_time
-                    },
-                    'aws_info': {
-                        'profile': self.profile_name,
-                        'region': self.region_name,
-                        'place_index': self.place_index_name,
-                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
-                    }
-                }
+            geocode_result = self._build_geocode_result(city_name, country, query_text, response, response_time)
+            self._cache_store(cache_key, geocode_result)
+            return self._record('text', 'success' if geocode_result['success'] else 'no_result', response_time,
+                                result=geocode_result)
                 
-                print(f"✓ 查询成功")
-                print(f"  坐标: ({geocode_result['coordinates']['latitude']:.6f}, {geocode_result['coordinates']['longitude']:.6f})")
-                print(f"  地址: {place.get('Label')}")
-                print(f"  相关性: {result.get('Relevance'):.2f}")
-                print(f"  响应时间: {response_time:.2f}秒")
-                
-                return geocode_result
-            else:
-                print(f"✗ 未找到匹配结果")
-                return {
-                    'success': False,
-                    'input_city': city_name,
-                    'input_country': country,
-                    'error': '未找到匹配的城市',
-                    'aws_info': {
-                        'profile': self.profile_name,
-                        'region': self.region_name,
-                        'place_index': self.place_index_name
-                    }
-                }
-                
-        except ClientError as e:
+        except botocore_exceptions.ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
-            print(f"✗ 查询失败: {error_code} - {error_message}")
-            
-            return {
-                'success': False,
-                'input_city': city_name,
-                'input_country': country,
-                'error': f"{error_code}: {error_message}",
-                'aws_info': {
-                    'profile': self.profile_name,
-                    'region': self.region_name,
-                    'place_index': self.place_index_name
-                }
-            }
+            return self._record('text', 'error', time.perf_counter() - start_time, e,
+                                self._build_geocode_error(city_name, country, f"{error_code}: {error_message}"))
+        except CircuitOpenError:
+            return self._record('text', 'degraded', result=self._degraded_text_result(
+                city_name, country, query_text, max_results, cache_key))
         except Exception as e:
-            print(f"✗ 未知错误: {e}")
-            return {
-                'success': False,
-                'input_city': city_name,
-                'input_country': country,
-                'error': str(e),
-                'aws_info': {
-                    'profile': self.profile_name,
-                    'region': self.region_name,
-                    'place_index': self.place_index_name
-                }
-            }
+            return self._record('text', 'error', time.perf_counter() - start_time, e,
+                                self._build_geocode_error(city_name, country, str(e)))
+    
+    def _invalid_text_query(self, city_name, country) -> Optional[Dict]:
+        """城市名称为空或参数类型不正确时返回失败结果（不查询离线库、缓存和上游），否则返回None"""
+        error = text_query_error(city_name, country)
+        if error is None:
+            return None
+        return self._record('text', 'error', error=VALIDATION_ERROR_CODE,
+                            result=self._build_geocode_error(city_name, country, error))
+    
+    def _text_search_params(self, query_text: str, max_results: int = 1) -> Dict:
+        """构建search_place_index_for_text请求参数"""
+        return {
+            'IndexName': self.place_index_name,
+            'Text': query_text,
+            'MaxResults': max_results,
+            'Language': 'zh-CN'  # 优先中文结果
+        }
+    
+    @staticmethod
+    def _flight_key(operation: str, params: Dict) -> str:
+        """构建请求合并键，与缓存键使用相同的规范化规则"""
+        if operation == 'search_place_index_for_text':
+            key = make_text_key(params['Text'], params.get('Language'), params['MaxResults'])
+        else:
+            longitude, latitude = params['Position']
+            key = make_position_key(latitude, longitude, params.get('Language'))
+        return f"{params['IndexName']}|{key}"
+    
+    def _call_upstream(self, operation: str, params: Dict) -> Dict:
+        """
+        调用location客户端
+        
+        启用请求策略时按策略超时、重试和对冲；启用自适应限流时
+        按当前速率发出请求并重试限流错误（每次实际发出的请求占用一次配额：
+        有请求策略时由策略在每次尝试和对冲前获取，限流器在外层只处理限流反馈）；
+        熔断器在最外层，打开时直接抛出CircuitOpenError。
+        """
+        method = getattr(self.location_client, operation)
+        call = lambda: method(**params)
+        if self.request_policy is not None:
+            call = partial(self.request_policy.call, call, self.rate_limiter)
+        if self.rate_limiter is not None:
+            call = partial(self.rate_limiter.call, call, acquire=self.request_policy is None)
+        if self.circuit_breaker is not None:
+            return self.circuit_breaker.call(call)
+        return call()
+    
+    def _routed_call(self, operation: str, params: Dict, country: Optional[str] = None) -> Dict:
+        """启用多索引路由时按候选索引依次调用上游，否则使用params中的索引"""
+        if self.index_router is None:
+            return self._call_upstream(operation, params)
+        
+        if operation == 'search_place_index_for_text':
+            candidates = self.index_router.route(country=country)
+        else:
+            longitude, latitude = params['Position']
+            candidates = self.index_router.route(position=(latitude, longitude))
+        return self.index_router.call(
+            candidates, lambda index_name: self._call_upstream(operation, dict(params, IndexName=index_name))
+        )
+    
+    def _search_text(self, params: Dict, country: Optional[str] = None) -> Dict:
+        """调用search_place_index_for_text，启用请求合并时共享在途的相同请求"""
+        if self.single_flight is None:
+            return self._routed_call('search_place_index_for_text', params, country)
+        return self.single_flight.do(
+            self._flight_key('search_place_index_for_text', params),
+            lambda: self._routed_call('search_place_index_for_text', params, country)
+        )
+    
+    def _search_position(self, params: Dict) -> Dict:
+        """调用search_place_index_for_position，启用请求合并时共享在途的相同请求"""
+        if self.single_flight is None:
+            return self._routed_call('search_place_index_for_position', params)
+        return self.single_flight.do(
+            self._flight_key('search_place_index_for_position', params),
+            lambda: self._routed_call('search_place_index_for_position', params)
+        )
+    
+    def _local_lookup_text(self, city_name: str, country: Optional[str], query_text: str, params: Dict,
+                           max_results: int = 1) -> tuple:
+        """
+        按与统一门面（geocoder.make_geocoder）相同的顺序查询本地结果：缓存 -> 离线地名库
+        
+        Returns:
+            (缓存键, 命中的结果)，未命中时结果为None
+        """
+        cache_key, cached = self._cache_lookup_text(city_name, country, params)
+        if cached is not None:
+            return cache_key, self._record('text', 'cache_hit', result=cached)
+        
+        offline_result = self._offline_lookup_text(city_name, country, query_text, max_results)
+        if offline_result is not None:
+            return cache_key, self._record('text', 'offline_hit', result=offline_result)
+        return cache_key, None
+    
+    def _local_lookup_position(self, latitude: float, longitude: float, params: Dict) -> tuple:
+        """
+        按与统一门面相同的顺序查询本地反向地理编码结果：缓存（空间网格缓存、结果缓存） -> 离线反向地理编码器
+        
+        Returns:
+            (缓存键, 命中的结果)，未命中时结果为None
+        """
+        cache_key, cached = self._cache_lookup_position(latitude, longitude, params)
+        if cached is not None:
+            return cache_key, self._record('position', 'cache_hit', result=cached)
+        
+        offline_result = self._offline_lookup_position(latitude, longitude)
+        if offline_result is not None:
+            return cache_key, self._record('position', 'offline_hit', result=offline_result)
+        return cache_key, None
+    
+    def _offline_lookup_text(self, city_name: str, country: Optional[str], query_text: str,
+                             max_results: int = 1) -> Optional[Dict]:
+        """查询离线地名库，命中返回地理编码结果，未启用或未命中返回None"""
+        if self.offline_resolver is None:
+            return None
+        
+        start_time = time.perf_counter()
+        response = self.offline_resolver.search(city_name, country, max_results)
+        if not response.get('Results'):
+            return None
+        
+        return self._build_geocode_result(city_name, country, query_text, dict(response, IndexName=OFFLINE_PLACE_INDEX),
+                                          time.perf_counter() - start_time)
+    
+    def _offline_lookup_position(self, latitude: float, longitude: float) -> Optional[Dict]:
+        """查询离线反向地理编码器，命中返回反向地理编码结果，未启用或附近没有城市时返回None"""
+        if self.offline_reverse_resolver is None:
+            return None
+        
+        start_time = time.perf_counter()
+        response = self.offline_reverse_resolver.search_position(latitude, longitude)
+        if not response.get('Results'):
+            return None
+        
+        return self._build_reverse_result(latitude, longitude, dict(response, IndexName=OFFLINE_PLACE_INDEX),
+                                          time.perf_counter() - start_time)
     
-    def batch_geocode(self, cities: List[tuple], delay: float = 0.5) -> List[Dict]:
+    def _cache_lookup_text(self, city_name: str, country: Optional[str], params: Dict) -> tuple:
+        """
+        查询正向地理编码缓存
+        
+        Returns:
+            (缓存键, 缓存结果)，未启用缓存时缓存键为None，未命中时缓存结果为None
+        """
+        if self.cache is None:
+            return None, None
+        
+        cache_key = make_text_key(params['Text'], params.get('Language'), params['MaxResults'])
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        
+        # 规范化后相同的查询共享缓存条目，输入字段按本次调用返回
+        return cache_key, dict(cached, input_city=city_name, input_country=country)
+    
+    def _cache_lookup_position(self, latitude: float, longitude: float, params: Dict) -> tuple:
+        """
+        查询反向地理编码缓存
+        
+        Returns:
+            (缓存键, 缓存结果)，未启用缓存时缓存键为None，未命中时缓存结果为None
+        """
+        cache_key = None
+        cached = None
+        
+        # 先查空间网格缓存，邻近坐标可以复用结果
+        if self.reverse_cache is not None:
+            cached = self.reverse_cache.lookup(latitude, longitude)
+        
+        if cached is None and self.cache is not None:
+            cache_key = make_position_key(latitude, longitude, params.get('Language'))
+            cached = self.cache.get(cache_key)
+        
+        if cached is None:
+            return cache_key, None
+        
+        return cache_key, dict(cached, input_coordinates={'latitude': latitude, 'longitude': longitude})
+    
+    def _degraded_text_result(self, city_name: str, country: Optional[str], query_text: str,
+                              max_results: int, cache_key: Optional[str]) -> Dict:
+        """上游不可用时的降级结果：依次尝试过期缓存、不限国家的离线查询，都没有时返回失败"""
+        if cache_key is not None:
+            stale = self.cache.get_stale(cache_key)
+            if stale is not None:
+                return dict(stale, input_city=city_name, input_country=country,
+                            degraded=True, degraded_source='stale_cache')
+        
+        if self.offline_resolver is not None and country:
+            response = self.offline_resolver.search(city_name, None, max_results)
+            if response.get('Results'):
+                result = self._build_geocode_result(city_name, country, query_text,
+                                                    dict(response, IndexName=OFFLINE_PLACE_INDEX), 0.0)
+                return dict(result, degraded=True, degraded_source='offline')
+        
+        return dict(self._build_geocode_error(city_name, country, '熔断器已打开，上游暂不可用'), degraded=True)
+    
+    def _degraded_reverse_result(self, latitude: float, longitude: float, cache_key: Optional[str]) -> Dict:
+        """上游不可用时的反向地理编码降级结果：依次尝试过期缓存、不限距离的离线最近城市"""
+        if cache_key is not None:
+            stale = self.cache.get_stale(cache_key)
+            if stale is not None:
+                return dict(stale, input_coordinates={'latitude': latitude, 'longitude': longitude},
+                            degraded=True, degraded_source='stale_cache')
+        
+        if self.offline_reverse_resolver is not None:
+            response = self.offline_reverse_resolver.search_position(latitude, longitude, limit_distance=False)
+            if response.get('Results'):
+                result = self._build_reverse_result(latitude, longitude, dict(response, IndexName=OFFLINE_PLACE_INDEX),
+                                                    0.0)
+                return dict(result, degraded=True, degraded_source='offline')
+        
+        return dict(self._build_reverse_error(latitude, longitude, '熔断器已打开，上游暂不可用'), degraded=True)
+    
+    def _cache_store(self, cache_key: Optional[str], result: Dict):
+        """写入缓存；只缓存成功结果和“未找到”结果，请求错误不缓存"""
+        if cache_key is not None:
+            self.cache.set(cache_key, result, negative=not result['success'])
+    
+    def _cache_store_position(self, cache_key: Optional[str], latitude: float, longitude: float, result: Dict):
+        """写入反向地理编码结果到缓存和空间网格缓存"""
+        self._cache_store(cache_key, result)
+        if self.reverse_cache is not None:
+            self.reverse_cache.store(latitude, longitude, result)
+    
+    def _position_search_params(self, latitude: float, longitude: float) -> Dict:
+        """构建search_place_index_for_position请求参数"""
+        return {
+            'IndexName': self.place_index_name,
+            'Position': [longitude, latitude],  # 注意：Location Service使用[lon, lat]格式
+            'MaxResults': 1,
+            'Language': 'zh-CN'
+        }
+    
+    def _aws_info(self, timestamp: bool = True, place_index_name: str = None) -> Dict:
+        """结果中的aws_info字段"""
+        return build_aws_info(self.profile_name, self.region_name, place_index_name or self.place_index_name,
+                              timestamp)
+    
+    def _build_geocode_result(self, city_name: str, country: Optional[str], query_text: str,
+                              response: Dict, response_time: float) -> Dict:
+        """根据search_place_index_for_text响应构建地理编码结果"""
+        if response.get('Results'):
+            return build_geocode_result(city_name, country, query_text, response, response_time,
+                                        self._aws_info(place_index_name=response.get('IndexName')))
+        else:
+            return self._build_geocode_error(city_name, country, '未找到匹配的城市')
+    
+    def _build_geocode_error(self, city_name: str, country: Optional[str], error: str) -> Dict:
+        """构建地理编码失败结果"""
+        return build_geocode_error(city_name, country, error, self._aws_info(timestamp=False))
+    
+    def batch_geocode(self, cities: List[tuple], delay: float = 0.5, deduplicate: bool = False,
+                      compact: bool = False) -> List[Dict]:
         """
         批量地理编码
         
         Args:
             cities: 城市列表，格式为 [(city, country), ...]
-            delay: 请求间隔
+            delay: 请求间隔（启用自适应限流时忽略，由限流器控制速率）
+            deduplicate: 是否先规范化并去重，相同查询只请求一次
+            compact: 是否逐条转换为紧凑记录，返回geocode_results.ResultBatch（aws_info每批只保存一份，
+                记录可按字典方式读取，to_dict/to_dicts转换为原结构）
         
         Returns:
             结果列表
         """
-        print(f"\n=== 批量地理编码 ===")
-        print(f"城市数量: {len(cities)}")
-        print(f"请求间隔: {delay}秒")
+        if deduplicate:
+            plan = self._dedupe(cities)
+            return fan_out(plan, cities, self.batch_geocode(plan.unique, delay=delay, compact=compact))
+        
+        logger.info("\n=== 批量地理编码 ===\n城市数量: %d", len(cities))
+        if self.rate_limiter is None:
+            logger.info("请求间隔: %s秒", delay)
+        else:
+            logger.info("自适应限流: 初始 %.1f 请求/秒", self.rate_limiter.rate)
         
-        results = []
+        results = self._new_results(compact)
         success_count = 0
+        log_progress = request_logger.isEnabledFor(logging.INFO)
         
         for i, (city, country) in enumerate(cities, 1):
-            print(f"\n[{i}/{len(cities)}] 处理: {city}")
+            if log_progress:
+                request_logger.info("\n[%d/%d] 处理: %s", i, len(cities), city)
             
             result = self.geocode_city(city, country)
+            if compact:
+                result = results.compact(result)
             results.append(result)
             
             if result['success']:
                 success_count += 1
             
             # 避免请求过于频繁
-            if i < len(cities):
+            if i < len(cities) and self.rate_limiter is None:
                 time.sleep(delay)
         
-        print(f"\n批量处理完成: 成功 {success_count}/{len(cities)} 个城市")
+        logger.info("\n批量处理完成: 成功 %d/%d 个城市", success_count, len(cities))
+        self._log_rate_limiter_stats()
         return results
     
+    def batch_geocode_concurrent(self, cities: List[tuple], max_workers: int = 8,
+                                 requests_per_second: float = 10.0, deduplicate: bool = False,
+                                 compact: bool = False) -> List[Dict]:
+        """
+        并发批量地理编码
+        
+        所有工作线程共享同一个boto3客户端（客户端是线程安全的），
+        使用令牌桶按每秒请求数限流，代替固定的请求间隔；
+        启用自适应限流时由限流器控制速率，忽略requests_per_second。
+        
+        Args:
+            cities: 城市列表，格式为 [(city, country), ...]
+            max_workers: 并发线程数
+            requests_per_second: 每秒最大请求数
+            deduplicate: 是否先规范化并去重，相同查询只请求一次
+            compact: 是否在工作线程中逐条转换为紧凑记录，返回geocode_results.ResultBatch
+        
+        Returns:
+            结果列表（与输入顺序一致）
+        """
+        if deduplicate:
+            plan = self._dedupe(cities)
+            unique_results = self.batch_geocode_concurrent(
+                plan.unique, max_workers=max_workers, requests_per_second=requests_per_second, compact=compact
+            )
+            return fan_out(plan, cities, unique_results)
+        
+        logger.info("\n=== 并发批量地理编码 ===\n城市数量: %d\n并发线程: %d", len(cities), max_workers)
+        if self.rate_limiter is None:
+            logger.info("速率限制: %s 请求/秒", requests_per_second)
+        else:
+            logger.info("自适应限流: 初始 %.1f 请求/秒", self.rate_limiter.rate)
+        
+        limiter = TokenBucket(requests_per_second) if self.rate_limiter is None else None
+        results = self._new_results(compact)
+        
+        def geocode_one(item):
+            city, country = item
+            if limiter is not None:
+                limiter.acquire()
+            result = self.geocode_city(city, country)
+            return results.compact(result) if compact else result
+        
+        # executor.map按输入顺序返回结果
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results.extend(executor.map(geocode_one, cities))
+        
+        success_count = len([r for r in results if r['success']])
+        logger.info("\n并发批量处理完成: 成功 %d/%d 个城市", success_count, len(cities))
+        self._log_rate_limiter_stats()
+        return results
+    
+    def _new_results(self, compact: bool) -> List:
+        """批量结果容器：紧凑模式为共享aws_info的ResultBatch，否则为普通列表"""
+        return ResultBatch(self.profile_name, self.region_name) if compact else []
+    
+    def _log_rate_limiter_stats(self):
+        """记录自适应限流统计"""
+        if self.rate_limiter is None:
+            return
+        stats = self.rate_limiter.stats()
+        logger.info("自适应限流: 当前速率 %.1f 请求/秒, 限流 %d 次, 重试 %d 次",
+                    stats['current_rate'], stats['throttles'], stats['retries'])
+    
+    @staticmethod
+    def _dedupe(cities: List[tuple]):
+        """规范化并去重批量查询，记录节省的请求数"""
+        plan = dedupe_cities(cities)
+        logger.info("\n=== 批量查询去重 ===\n输入行数: %d\n唯一查询: %d\n节省请求: %d",
+                    plan.rows, len(plan.unique), plan.saved_requests)
+        return plan
+    
     def reverse_geocode(self, latitude: float, longitude: float) -> Optional[Dict]:
         """
         反向地理编码（坐标转地址）
@@ -269,124 +637,108 @@ class AmazonLocationServicePOC:
         Returns:
             反向地理编码结果
         """
-        print(f"\n--- 反向地理编码: ({latitude}, {longitude}) ---")
+        params = self._position_search_params(latitude, longitude)
+        
+        cache_key, local_result = self._local_lookup_position(latitude, longitude, params)
+        if local_result is not None:
+            return local_result
         
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
             
-            response = self.location_client.search_place_index_for_position(
-                IndexName=self.place_index_name,
-                Position=[longitude, latitude],  # 注意：Location Service使用[lon, lat]格式
-                MaxResults=1,
-                Language='zh-CN'
-            )
+            response = self._search_position(params)
             
-            response_time = time.time() - start_time
+            response_time = time.perf_counter() - start_time
             
-            if response.get('Results'):
-                result = response['Results'][0]
-                place = result['Place']
-                
-                reverse_result = {
-                    'success': True,
-                    'input_coordinates': {
-                        'latitude': latitude,
-                        'longitude': longitude
-                    },
-                    'address': {
-                        'label': place.get('Label'),
-                        'country': place.get('Country'),
-                        'region': place.get('Region'),
-                        'sub_region': place.get('SubRegion'),
-                        'municipality': place.get('Municipality'),
-                        'neighborhood': place.get('Neighborhood'),
-                        'postal_code': place.get('PostalCode')
-                    },
-                    'metadata': {
-                        'relevance': result.get('Relevance'),
-                        'distance': result.get('Distance'),
-                        'place_id': result.get('PlaceId'),
-                        'response_time_seconds': response_time
-                    },
-                    'aws_info': {
-                        'profile': self.profile_name,
-                        'region': self.region_name,
-                        'place_index': self.place_index_name,
-                        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
-                    }
-                }
-                
-                print(f"✓ 反向地理编码成功")
-                print(f"  地址: {place.get('Label')}")
-                print(f"  相关性: {result.get('Relevance'):.2f}")
-                print(f"  响应时间: {response_time:.2f}秒")
-                
-                return reverse_result
-            else:
-                print(f"✗ 未找到地址信息")
-                return {
-                    'success': False,
-                    'input_coordinates': {'latitude': latitude, 'longitude': longitude},
-                    'error': '未找到地址信息'
-                }
+            reverse_result = self._build_reverse_result(latitude, longitude, response, response_time)
+            self._cache_store_position(cache_key, latitude, longitude, reverse_result)
+            return self._record('position', 'success' if reverse_result['success'] else 'no_result', response_time,
+                                result=reverse_result)
                 
+        except CircuitOpenError:
+            return self._record('position', 'degraded',
+                                result=self._degraded_reverse_result(latitude, longitude, cache_key))
         except Exception as e:
-            print(f"✗ 反向地理编码失败: {e}")
-            return {
-                'success': False,
-                'input_coordinates': {'latitude': latitude, 'longitude': longitude},
-                'error': str(e)
-            }
+            return self._record('position', 'error', time.perf_counter() - start_time, e,
+                                self._build_reverse_error(latitude, longitude, str(e)))
+    
+    def _build_reverse_result(self, latitude: float, longitude: float,
+                              response: Dict, response_time: float) -> Dict:
+        """根据search_place_index_for_position响应构建反向地理编码结果"""
+        if response.get('Results'):
+            return build_reverse_result(latitude, longitude, response, response_time,
+                                        self._aws_info(place_index_name=response.get('IndexName')))
+        else:
+            return self._build_reverse_error(latitude, longitude, '未找到地址信息')
+    
+    def _build_reverse_error(self, latitude: float, longitude: float, error: str) -> Dict:
+        """构建反向地理编码失败结果"""
+        return build_reverse_error(latitude, longitude, error, self._aws_info(timestamp=False))
     
     def get_place_index_info(self) -> Dict:
         """获取Place Index信息"""
+        start_time = time.perf_counter()
         try:
             response = self.location_client.describe_place_index(
                 IndexName=self.place_index_name
             )
-            return {
-                'success': True,
-                'index_info': {
-                    'name': response.get('IndexName'),
-                    'arn': response.get('IndexArn'),
-                    'status': response.get('Status'),
-                    'data_source': response.get('DataSource'),
-                    'description': response.get('Description'),
-                    'create_time': response.get('CreateTime').isoformat() if response.get('CreateTime') else None,
-                    'update_time': response.get('UpdateTime').isoformat() if response.get('UpdateTime') else None,
-                    'pricing_plan': response.get('PricingPlan'),
-                    'tags': response.get('Tags', {})
-                }
-            }
+            self._record('describe', 'success', time.perf_counter() - start_time)
+            return self._build_index_info(response)
         except Exception as e:
+            self._record('describe', 'error', time.perf_counter() - start_time, e)
             return {
                 'success': False,
                 'error': str(e)
             }
     
+    @staticmethod
+    def _build_index_info(response: Dict) -> Dict:
+        """根据describe_place_index响应构建索引信息"""
+        return {
+            'success': True,
+            'index_info': {
+                'name': response.get('IndexName'),
+                'arn': response.get('IndexArn'),
+                'status': response.get('Status'),
+                'data_source': response.get('DataSource'),
+                'description': response.get('Description'),
+                'create_time': response.get('CreateTime').isoformat() if response.get('CreateTime') else None,
+                'update_time': response.get('UpdateTime').isoformat() if response.get('UpdateTime') else None,
+                'pricing_plan': response.get('PricingPlan'),
+                'tags': response.get('Tags', {})
+            }
+        }
+    
     def cleanup_resources(self):
         """清理测试资源"""
-        print(f"\n=== 清理资源 ===")
+        logger.info("\n=== 清理资源 ===")
         
         try:
             self.location_client.delete_place_index(
                 IndexName=self.place_index_name
             )
-            print(f"✓ 成功删除Place Index: {self.place_index_name}")
+            logger.info("✓ 成功删除Place Index: %s", self.place_index_name)
             return True
-        except ClientError as e:
+        except botocore_exceptions.ClientError as e:
             if e.response['Error']['Code'] == 'ResourceNotFoundException':
-                print(f"Place Index不存在，无需删除")
+                logger.info("Place Index不存在，无需删除")
                 return True
             else:
-                print(f"✗ 删除Place Index失败: {e}")
+                logger.error("✗ 删除Place Index失败: %s", e)
                 return False
         except Exception as e:
-            print(f"✗ 清理资源时出错: {e}")
+            logger.error("✗ 清理资源时出错: %s", e)
             return False
 
-def run_location_service_poc():
-    """运行Amazon Location Service POC测试"""
+def run_location_service_poc(cache_path: str = None):
+    """
+    运行Amazon Location Service POC测试
+    
+    Args:
+        cache_path: 持久化缓存文件路径（可选），指定后复用之前运行的查询结果
+    """
+    # 演示输出与print交错，使用同步输出保证顺序
+    configure_logging(queued=False)
     
     print("=" * 80)
     print("Amazon Location Service 城市地理编码 POC")
@@ -399,7 +751,8 @@ def run_location_service_poc():
         # 初始化服务
         location_service = AmazonLocationServicePOC(
             profile_name="oversea1",
-            region_name="us-west-2"
+            region_name="us-west-2",
+            cache=SQLiteCache(cache_path) if cache_path else None
         )
         
         # 设置Place Index
@@ -487,6 +840,14 @@ def run_location_service_poc():
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(all_results, f, ensure_ascii=False, indent=2, default=str)
         
+        # 批量结果另存为列式文件，便于分析任务内存映射读取
+        try:
+            from columnar_export import export_columnar
+            columnar_file = export_columnar(batch_results, "location_service_batch_results")
+        except ImportError as e:
+            columnar_file = None
+            print(f"跳过列式导出: {e}")
+        
         print(f"\n{'='*60}")
         print("测试汇总")
         print(f"{'='*60}")
@@ -498,7 +859,12 @@ def run_location_service_poc():
         print(f"单个城市查询: {single_success}/{len(single_results)} 成功")
         print(f"批量查询: {batch_success}/{len(batch_results)} 成功")
         print(f"反向地理编码: {reverse_success}/{len(reverse_results)} 成功")
+        if location_service.cache is not None:
+            cache_stats = location_service.cache.stats()
+            print(f"缓存命中: {cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}")
         print(f"测试结果已保存到: {output_file}")
+        if columnar_file:
+            print(f"批量结果列式文件: {columnar_file}")
         
         # 询问是否清理资源
         print(f"\n{'='*60}")
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+地理编码指标
+按操作（text / position / describe）记录单调时钟延迟直方图，按结果（success、no_result、cache_hit、
+offline_hit、degraded、error）、错误码和限流计数；缓存、请求合并、限流器等组件的统计在导出时才读取，
+不在请求路径上增加开销。支持导出Prometheus文本格式和JSON快照
+"""
+
+import bisect
+import json
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+from rate_limiter import THROTTLING_ERROR_CODES
+
+# 延迟直方图桶上界（秒）
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _error_code(error) -> str:
+    """ClientError取错误码，其他异常取类名；已经是错误码字符串时原样返回"""
+    if isinstance(error, str):
+        return error
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code')
+        if code:
+            return code
+    return type(error).__name__
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    escaped = (f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return '{' + ','.join(escaped) + '}'
+
+
+class Histogram:
+    def __init__(self, bounds: Sequence[float] = DEFAULT_LATENCY_BUCKETS, lock: threading.Lock = None):
+        """
+        固定桶直方图，记录只做一次二分查找和计数
+
+        Args:
+            bounds: 递增的桶上界，最后隐含 +Inf 桶
+            lock: 保护计数的锁（可与所属指标集合共用，一次请求只加一次锁）
+        """
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = lock or threading.Lock()
+
+    def observe(self, value: float):
+        """记录一个观测值"""
+        with self._lock:
+            self._observe_locked(value)
+
+    def _observe_locked(self, value: float):
+        """记录一个观测值（调用方持有锁）"""
+        self._counts[bisect.bisect_left(self.bounds, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def quantile(self, q: float, counts: List[int] = None) -> float:
+        """按桶内线性插值估计分位数"""
+        counts = counts if counts is not None else list(self._counts)
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                if index == len(self.bounds):
+                    return lower
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def snapshot(self) -> Dict:
+        """返回计数、总和、累计桶计数和估计的p50/p95/p99"""
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+            count = self._count
+        cumulative = []
+        running = 0
+        for bound, bucket in zip(self.bounds + (float('inf'),), counts):
+            running += bucket
+            cumulative.append((bound, running))
+        return {
+            'count': count,
+            'sum': total_sum,
+            'buckets': cumulative,
+            'p50': self.quantile(0.50, counts),
+            'p95': self.quantile(0.95, counts),
+            'p99': self.quantile(0.99, counts)
+        }
+
+
+class GeocodeMetrics:
+    def __init__(self, latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS, namespace: str = 'geocoder'):
+        """
+        初始化指标集合
+
+        Args:
+            latency_buckets: 延迟直方图桶上界（秒）
+            namespace: 导出的指标名前缀
+        """
+        self.latency_buckets = tuple(latency_buckets)
+        self.namespace = namespace
+        self._latency: Dict[str, Histogram] = {}
+        self._requests: Dict[tuple, int] = {}
+        self._errors: Dict[tuple, int] = {}
+        self._throttles: Dict[str, int] = {}
+        self._collectors: Dict[str, Callable[[], Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _histogram_locked(self, operation: str) -> Histogram:
+        """获取操作的直方图（调用方持有锁）"""
+        histogram = self._latency.get(operation)
+        if histogram is None:
+            histogram = self._latency[operation] = Histogram(self.latency_buckets, self._lock)
+        return histogram
+
+    def record_request(self, operation: str, outcome: str, seconds: Optional[float] = None,
+                       error=None):
+        """
+        记录一次请求
+
+        Args:
+            operation: 操作（text、position、describe）
+            outcome: 结果（success、no_result、cache_hit、offline_hit、degraded、error）
+            seconds: 上游请求耗时（秒，单调时钟），缓存/离线命中时为None
+            error: 请求失败时的异常或错误码，按错误码计数，限流错误另计
+        """
+        with self._lock:
+            if seconds is not None:
+                self._histogram_locked(operation)._observe_locked(seconds)
+            key = (operation, outcome)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if error is not None:
+                code = _error_code(error)
+                key = (operation, code)
+                self._errors[key] = self._errors.get(key, 0) + 1
+                if code in THROTTLING_ERROR_CODES:
+                    self._throttles[operation] = self._throttles.get(operation, 0) + 1
+
+    def register_collector(self, name: str, collect: Callable[[], Dict]):
+        """注册组件统计（例如cache.stats），导出时调用"""
+        self._collectors[name] = collect
+
+    def _component_samples(self) -> List[tuple]:
+        """读取组件统计并展开为 (指标名, 标签, 值)，非数值字段忽略"""
+        samples = []
+        for component, collect in list(self._collectors.items()):
+            for key, value in collect().items():
+                name = f"{component}_{key}"
+                if isinstance(value, dict):
+                    for sub_key, sub_value in value.items():
+                        if isinstance(sub_value, dict):
+                            # 例如index_router的 {'indexes': {索引名: {...}}}
+                            for field, field_value in sub_value.items():
+                                if isinstance(field_value, (int, float)):
+                                    samples.append((f"{name}_{field}", {'name': sub_key}, field_value))
+                        elif isinstance(sub_value, (int, float)):
+                            samples.append((f"{name}_{sub_key}", {}, sub_value))
+                elif isinstance(value, (int, float)):
+                    samples.append((name, {}, value))
+        return [(re.sub(r'[^a-zA-Z0-9_]', '_', name), labels, float(value)) for name, labels, value in samples]
+
+    def snapshot(self) -> Dict:
+        """返回JSON可序列化的指标快照"""
+        with self._lock:
+            requests = dict(self._requests)
+            errors = dict(self._errors)
+            throttles = dict(self._throttles)
+            operations = list(self._latency.items())
+
+        latency = {}
+        for operation, histogram in operations:
+            data = histogram.snapshot()
+            data['buckets'] = [[_format_value(bound), count] for bound, count in data['buckets']]
+            latency[operation] = data
+
+        components = {}
+        for name, labels, value in self._component_samples():
+            key = f"{name}{{{labels['name']}}}" if labels else name
+            components[key] = value
+
+        return {
+            'latency_seconds': latency,
+            'requests': [{'operation': op, 'outcome': outcome, 'count': count}
+                         for (op, outcome), count in sorted(requests.items())],
+            'errors': [{'operation': op, 'code': code, 'count': count}
+                       for (op, code), count in sorted(errors.items())],
+            'throttles': throttles,
+            'components': components
+        }
+
+    def to_json(self, indent: int = None) -> str:
+        """导出JSON快照"""
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=indent)
+
+    def to_prometheus(self) -> str:
+        """导出Prometheus文本格式"""
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            requests = sorted(self._requests.items())
+            errors = sorted(self._errors.items())
+            throttles = sorted(self._throttles.items())
+            operations = sorted(self._latency.items())
+
+        lines.append(f"# HELP {ns}_request_duration_seconds 上游请求延迟")
+        lines.append(f"# TYPE {ns}_request_duration_seconds histogram")
+        for operation, histogram in operations:
+            data = histogram.snapshot()
+            for bound, count in data['buckets']:
+                labels = _format_labels({'operation': operation, 'le': _format_value(bound)})
+                lines.append(f"{ns}_request_duration_seconds_bucket{labels} {count}")
+            labels = _format_labels({'operation': operation})
+            lines.append(f"{ns}_request_duration_seconds_sum{labels} {_format_value(data['sum'])}")
+            lines.append(f"{ns}_request_duration_seconds_count{labels} {data['count']}")
+
+        lines.append(f"# HELP {ns}_requests_total 按结果统计的请求数")
+        lines.append(f"# TYPE {ns}_requests_total counter")
+        for (operation, outcome), count in requests:
+            lines.append(f"{ns}_requests_total{_format_labels({'operation': operation, 'outcome': outcome})} {count}")
+
+        lines.append(f"# HELP {ns}_errors_total 按错误码统计的失败请求数")
+        lines.append(f"# TYPE {ns}_errors_total counter")
+        for (operation, code), count in errors:
+            lines.append(f"{ns}_errors_total{_format_labels({'operation': operation, 'code': code})} {count}")
+
+        lines.append(f"# HELP {ns}_throttles_total 限流错误数")
+        lines.append(f"# TYPE {ns}_throttles_total counter")
+        for operation, count in throttles:
+            lines.append(f"{ns}_throttles_total{_format_labels({'operation': operation})} {count}")
+
+        declared = set()
+        # 同名指标的样本必须相邻
+        for name, labels, value in sorted(self._component_samples(), key=lambda sample: sample[0]):
+            metric = f"{ns}_{name}"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+离线城市地名库
+从GeoNames格式的城市数据（TSV/CSV）加载，作为地理编码的第一级解析器：
+常见城市直接在本地解析，未命中时才请求Amazon Location Service
+"""
+
+import csv
+import os
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from geocode_cache import normalize_query_text
+
+# GeoNames城市数据（cities15000.txt等）的列顺序
+GEONAMES_COLUMNS = [
+    'geonameid', 'name', 'asciiname', 'alternatenames', 'latitude', 'longitude',
+    'feature_class', 'feature_code', 'country_code', 'cc2', 'admin1_code', 'admin2_code',
+    'admin3_code', 'admin4_code', 'population', 'elevation', 'dem', 'timezone', 'modification_date'
+]
+
+# 国家别名: ISO2 -> (ISO3, 名称和别名)
+COUNTRIES = {
+    'CN': ('CHN', ['中国', '中华人民共和国', 'China', "People's Republic of China", 'PRC']),
+    'HK': ('HKG', ['香港', '中国香港', 'Hong Kong']),
+    'TW': ('TWN', ['台湾', '臺灣', '中国台湾', 'Taiwan']),
+    'US': ('USA', ['美国', '美國', 'United States', 'United States of America', 'USA', 'America']),
+    'GB': ('GBR', ['英国', '英國', 'United Kingdom', 'UK', 'Great Britain', 'England']),
+    'FR': ('FRA', ['法国', '法國', 'France']),
+    'DE': ('DEU', ['德国', '德國', 'Germany']),
+    'JP': ('JPN', ['日本', 'Japan']),
+    'KR': ('KOR', ['韩国', '韓國', 'South Korea', 'Korea']),
+    'SG': ('SGP', ['新加坡', 'Singapore']),
+    'TH': ('THA', ['泰国', '泰國', 'Thailand']),
+    'MY': ('MYS', ['马来西亚', '馬來西亞', 'Malaysia']),
+    'ID': ('IDN', ['印度尼西亚', '印尼', 'Indonesia']),
+    'VN': ('VNM', ['越南', 'Vietnam', 'Viet Nam']),
+    'PH': ('PHL', ['菲律宾', 'Philippines']),
+    'MM': ('MMR', ['缅甸', '緬甸', 'Myanmar', 'Burma']),
+    'KH': ('KHM', ['柬埔寨', 'Cambodia']),
+    'LA': ('LAO', ['老挝', '寮國', 'Laos', "Lao People's Democratic Republic", 'Lao PDR']),
+    'BN': ('BRN', ['文莱', '汶萊', 'Brunei', 'Brunei Darussalam']),
+    'TL': ('TLS', ['东帝汶', '東帝汶', 'Timor-Leste', 'East Timor', 'Timor Leste']),
+    'IN': ('IND', ['印度', 'India']),
+    'AU': ('AUS', ['澳大利亚', '澳洲', 'Australia']),
+    'CA': ('CAN', ['加拿大', 'Canada']),
+    'RU': ('RUS', ['俄罗斯', 'Russia', 'Russian Federation']),
+    'IT': ('ITA', ['意大利', 'Italy']),
+    'ES': ('ESP', ['西班牙', 'Spain']),
+    'BR': ('BRA', ['巴西', 'Brazil']),
+    'MX': ('MEX', ['墨西哥', 'Mexico']),
+}
+
+_COUNTRY_ALIASES = {}
+for _iso2, (_iso3, _names) in COUNTRIES.items():
+    for _alias in [_iso2, _iso3] + _names:
+        _COUNTRY_ALIASES[normalize_query_text(_alias)] = _iso2
+
+
+def normalize_country(country: Optional[str]) -> Optional[str]:
+    """将国家名称/代码规范化为ISO2代码，无法识别时返回规范化后的原文"""
+    if not country:
+        return None
+    normalized = normalize_query_text(country)
+    return _COUNTRY_ALIASES.get(normalized, normalized.upper() if len(normalized) == 2 else normalized)
+
+
+def _is_indexed_alias(name: str) -> bool:
+    """只索引英文（ASCII）和中文别名，避免GeoNames中大量其他语言别名撑大索引"""
+    if name.isascii():
+        return True
+    return any('\u3400' <= ch <= '\u9fff' or '\uf900' <= ch <= '\ufaff' for ch in name)
+
+
+class OfflineGazetteer:
+    def __init__(self, data_source: str = "GeoNames"):
+        """
+        初始化空的离线地名库
+
+        城市数据按列存储在紧凑数组中，索引为 规范化名称|国家 -> 行号（按人口降序）。
+
+        Args:
+            data_source: 结果中返回的数据源名称
+        """
+        self.data_source = data_source
+        self._geoname_ids = array('q')
+        self._latitudes = array('d')
+        self._longitudes = array('d')
+        self._populations = array('q')
+        self._names: List[str] = []
+        self._countries: List[str] = []
+        self._regions: List[Optional[str]] = []
+        self._index: Dict[str, object] = {}  # key -> 行号 或 行号元组
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @classmethod
+    def from_file(cls, path: str, admin1_path: str = None, delimiter: str = None,
+                  min_population: int = 0) -> 'OfflineGazetteer':
+        """
+        从城市数据文件加载地名库
+
+        支持两种格式:
+        - GeoNames原始格式（无表头，制表符分隔，列见GEONAMES_COLUMNS）
+        - 带表头的CSV/TSV，至少包含name、latitude、longitude、country_code列
+
+        Args:
+            path: 城市数据文件路径
+            admin1_path: GeoNames admin1CodesASCII.txt格式的一级行政区名称文件（可选）
+            delimiter: 分隔符，默认按扩展名判断（.csv为逗号，其他为制表符）
+            min_population: 只加载人口不少于该值的城市
+        """
+        gazetteer = cls()
+
+        admin1_names = {}
+        if admin1_path:
+            with open(admin1_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) >= 2:
+                        admin1_names[parts[0]] = parts[1]
+
+        if delimiter is None:
+            delimiter = ',' if path.lower().endswith('.csv') else '\t'
+
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            first_line = f.readline()
+            f.seek(0)
+            has_header = 'latitude' in first_line.lower().split(delimiter)
+            if has_header:
+                reader = csv.DictReader(f, delimiter=delimiter)
+            else:
+                reader = csv.DictReader(f, fieldnames=GEONAMES_COLUMNS, delimiter=delimiter,
+                                        quoting=csv.QUOTE_NONE)
+
+            for row in reader:
+                population = int(row.get('population') or 0)
+                if population < min_population:
+                    continue
+
+                country_code = (row.get('country_code') or '').upper()
+                region = row.get('region') or admin1_names.get(f"{country_code}.{row.get('admin1_code')}")
+                gazetteer.add_city(
+                    name=row['name'],
+                    latitude=float(row['latitude']),
+                    longitude=float(row['longitude']),
+                    country_code=country_code,
+                    region=region,
+                    population=population,
+                    geoname_id=int(row.get('geonameid') or 0),
+                    aliases=[row.get('asciiname') or ''] + (row.get('alternatenames') or '').split(',')
+                )
+
+        return gazetteer
+
+    def add_city(self, name: str, latitude: float, longitude: float, country_code: str,
+                 region: str = None, population: int = 0, geoname_id: int = 0, aliases: List[str] = None):
+        """添加城市并建立名称索引"""
+        row = len(self._names)
+        self._geoname_ids.append(geoname_id)
+        self._latitudes.append(latitude)
+        self._longitudes.append(longitude)
+        self._populations.append(population)
+        self._names.append(name)
+        self._countries.append(country_code)
+        self._regions.append(region)
+
+        keys = set()
+        for alias in [name] + (aliases or []):
+            if alias and _is_indexed_alias(alias):
+                normalized = normalize_query_text(alias)
+                keys.add(f"{normalized}|{country_code}")
+                keys.add(f"{normalized}|")
+        for key in keys:
+            self._add_to_index(key, row)
+
+    def _add_to_index(self, key: str, row: int):
+        """将行号加入索引，同名城市按人口降序排列"""
+        existing = self._index.get(key)
+        if existing is None:
+            self._index[key] = row
+            return
+
+        rows = list(existing) if isinstance(existing, tuple) else [existing]
+        rows.append(row)
+        rows.sort(key=lambda r: self._populations[r], reverse=True)
+        self._index[key] = tuple(rows)
+
+    def lookup(self, city_name: str, country: str = None, max_results: int = 1) -> List[int]:
+        """
+        按城市名称和国家查找
+
+        Returns:
+            匹配的行号列表（按人口降序）
+        """
+        key = f"{normalize_query_text(city_name)}|{normalize_country(country) or ''}"
+        rows = self._index.get(key)
+        if rows is None:
+            return []
+        if isinstance(rows, int):
+            return [rows]
+        return list(rows[:max_results])
+
+    @property
+    def latitudes(self) -> array:
+        """所有城市的纬度（按行号）"""
+        return self._latitudes
+
+    @property
+    def longitudes(self) -> array:
+        """所有城市的经度（按行号）"""
+        return self._longitudes
+
+    def place(self, row: int) -> Dict:
+        """构建Location Service格式的Place"""
+        country_code = self._countries[row]
+        name = self._names[row]
+        region = self._regions[row]
+        iso3 = COUNTRIES.get(country_code, (country_code,))[0]
+        label = ', '.join(part for part in (name, region, iso3) if part)
+        return {
+            'Label': label,
+            'Geometry': {'Point': [self._longitudes[row], self._latitudes[row]]},
+            'Country': iso3,
+            'Region': region,
+            'SubRegion': None,
+            'Municipality': name,
+            'PostalCode': None
+        }
+
+    def place_id(self, row: int) -> str:
+        """城市的PlaceId"""
+        return f"geonames:{self._geoname_ids[row]}"
+
+    def search(self, city_name: str, country: str = None, max_results: int = 1) -> Dict:
+        """
+        离线查询，返回与search_place_index_for_text相同结构的响应
+
+        Args:
+            city_name: 城市名称
+            country: 国家名称或代码（可选）
+            max_results: 最大结果数量
+        """
+        rows = self.lookup(city_name, country, max_results)
+        return {
+            'Summary': {'Text': city_name, 'MaxResults': max_results, 'DataSource': self.data_source},
+            'Results': [
+                {
+                    'Place': self.place(row),
+                    'Relevance': 1.0,
+                    'PlaceId': self.place_id(row)
+                }
+                for row in rows
+            ]
+        }
+
+    def search_place_index_for_text(self, IndexName: str = None, Text: str = '',
+                                    MaxResults: int = 1, Language: str = None, **kwargs) -> Dict:
+        """兼容location客户端接口，查询文本格式为 "城市, 国家" 或 "城市"，可直接替代location_client使用"""
+        city_name, _, country = Text.rpartition(',')
+        if not city_name:
+            city_name, country = Text, None
+        return self.search(city_name, country.strip() if country else None, MaxResults)
+
+
+def load_sample_gazetteer() -> OfflineGazetteer:
+    """加载随项目提供的示例城市数据（data/cities_sample.tsv）"""
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    return OfflineGazetteer.from_file(
+        os.path.join(data_dir, 'cities_sample.tsv'),
+        admin1_path=os.path.join(data_dir, 'admin1_sample.tsv')
+    )
+
+
+if __name__ == "__main__":
+    gazetteer = load_sample_gazetteer()
+    print(f"✓ 已加载 {len(gazetteer)} 个城市")
+
+    for city, country in [("北京", "中国"), ("New York", "United States"), ("Tokyo", "Japan")]:
+        start = time.perf_counter()
+        response = gazetteer.search(city, country)
+        elapsed = time.perf_counter() - start
+        if response['Results']:
+            place = response['Results'][0]['Place']
+            print(f"  {city}: {place['Label']} {place['Geometry']['Point']} ({elapsed * 1e6:.1f}微秒)")
+        else:
+            print(f"  {city}: 未找到")
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+离线反向地理编码
+基于离线地名库的城市坐标构建KD树，回答“这个坐标在哪个城市附近”，无需网络请求
+支持对经纬度数组进行向量化批量查询（需要NumPy）
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy为可选依赖，只有离线反向地理编码需要
+    np = None
+
+from geocode_results import OFFLINE_PLACE_INDEX, build_aws_info, build_reverse_result
+from offline_gazetteer import OfflineGazetteer
+
+EARTH_RADIUS_METERS = 6371008.8
+
+
+def _to_unit_vectors(latitudes, longitudes):
+    """经纬度（度）转换为单位球面上的三维坐标"""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def _chord_to_meters(chord):
+    """单位球弦长转换为大圆距离（米），与haversine公式等价"""
+    return 2.0 * EARTH_RADIUS_METERS * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+class OfflineReverseGeocoder:
+    def __init__(self, gazetteer: OfflineGazetteer, leaf_size: int = 128,
+                 max_distance_meters: float = 50000.0, chunk_size: int = 2048, probe_leaves: int = 8):
+        """
+        初始化离线反向地理编码器
+
+        城市坐标转换为单位球面三维坐标后构建KD树（三维欧氏弦长与大圆距离单调对应，
+        因此跨越180度经线和两极时也能得到正确的最近城市）。
+        查询时先向量化地沿树下降到所属叶子；最近距离球越过划分平面的少数查询，
+        再按包围盒距离顺序检查其他叶子，直到不可能找到更近的城市。
+
+        Args:
+            gazetteer: 离线地名库
+            leaf_size: 叶子节点的最大城市数
+            max_distance_meters: 最近城市超过该距离时视为未命中（返回空结果，交给Location Service处理）
+            chunk_size: 批量查询时每次处理的点数（控制内存占用）
+            probe_leaves: 先按部分排序检查的最近叶子数
+        """
+        if np is None:
+            raise ImportError("离线反向地理编码需要NumPy: pip install numpy")
+        if len(gazetteer) == 0:
+            raise ValueError("地名库为空")
+
+        self.gazetteer = gazetteer
+        self.max_distance_meters = max_distance_meters
+        self.chunk_size = chunk_size
+        self.probe_leaves = probe_leaves
+
+        points = _to_unit_vectors(np.frombuffer(gazetteer.latitudes, dtype=np.float64),
+                                  np.frombuffer(gazetteer.longitudes, dtype=np.float64))
+        leaves = []
+        nodes = []  # (划分维度, 划分值, 左子节点, 右子节点, 叶子编号)
+        self._build(points, np.arange(len(points)), leaf_size, leaves, nodes)
+
+        # 按叶子顺序重排城市，每个叶子对应 [start, end) 区间
+        self._rows = np.concatenate(leaves)
+        self._points = points[self._rows]
+        bounds = np.cumsum([0] + [len(leaf) for leaf in leaves])
+        self._leaf_start = bounds[:-1]
+        self._leaf_end = bounds[1:]
+        self._leaf_lo = np.array([points[leaf].min(axis=0) for leaf in leaves])
+        self._leaf_hi = np.array([points[leaf].max(axis=0) for leaf in leaves])
+        self.leaf_count = len(leaves)
+
+        node_array = np.array(nodes, dtype=np.float64)
+        self._node_dim = node_array[:, 0].astype(np.int64)
+        self._node_split = node_array[:, 1]
+        self._node_left = node_array[:, 2].astype(np.int64)
+        self._node_right = node_array[:, 3].astype(np.int64)
+        self._node_leaf = node_array[:, 4].astype(np.int64)
+
+    def _build(self, points, rows, leaf_size: int, leaves: list, nodes: list) -> int:
+        """按跨度最大的维度在中位数处递归划分，返回节点编号"""
+        node = len(nodes)
+        if len(rows) <= leaf_size:
+            nodes.append((0, 0.0, -1, -1, len(leaves)))
+            leaves.append(rows)
+            return node
+
+        nodes.append(None)
+        subset = points[rows]
+        dim = int(np.argmax(subset.max(axis=0) - subset.min(axis=0)))
+        half = len(rows) // 2
+        split = np.argpartition(subset[:, dim], half)
+        split_value = float(subset[split[half], dim])
+        left = self._build(points, rows[split[:half]], leaf_size, leaves, nodes)
+        right = self._build(points, rows[split[half:]], leaf_size, leaves, nodes)
+        nodes[node] = (dim, split_value, left, right, -1)
+        return node
+
+    def _query_chunk(self, queries) -> Tuple:
+        """查询一批三维坐标的最近城市，返回(行号, 弦长)"""
+        count = len(queries)
+        everyone = np.arange(count)
+
+        # 1. 沿KD树下降到查询点所在的叶子，同时记录到划分平面的最小距离
+        node = np.zeros(count, dtype=np.int64)
+        margin = np.full(count, np.inf)
+        internal = self._node_leaf[node] < 0
+        while internal.any():
+            idx = everyone[internal]
+            current = node[idx]
+            offset = queries[idx, self._node_dim[current]] - self._node_split[current]
+            margin[idx] = np.minimum(margin[idx], np.abs(offset))
+            node[idx] = np.where(offset < 0, self._node_left[current], self._node_right[current])
+            internal = self._node_leaf[node] < 0
+
+        best_dist = np.full(count, np.inf)
+        best_index = np.zeros(count, dtype=np.int64)
+        own_leaf = self._node_leaf[node][:, None]
+        self._scan_leaves(queries, everyone, own_leaf, np.zeros((count, 1)), best_dist, best_index)
+
+        # 2. 最近距离球完全落在所属划分区域内的查询已经确定；其余查询检查其他叶子
+        unsure = everyone[best_dist >= margin ** 2]
+        if len(unsure) == 0:
+            return self._rows[best_index], np.sqrt(best_dist)
+
+        subset = queries[unsure]
+        nearest = np.clip(subset[:, None, :], self._leaf_lo[None, :, :], self._leaf_hi[None, :, :])
+        box_dist = ((nearest - subset[:, None, :]) ** 2).sum(axis=-1)
+        box_dist[np.arange(len(unsure)), own_leaf[unsure, 0]] = np.inf  # 所属叶子已检查
+
+        # 大多数查询只需检查最近的几个叶子，先部分排序；仍未确定的查询再完整排序
+        first = min(self.probe_leaves, self.leaf_count)
+        if first < self.leaf_count:
+            leaf_order = np.argpartition(box_dist, first - 1, axis=1)[:, :first]
+            sorted_box_dist = np.take_along_axis(box_dist, leaf_order, axis=1)
+            resort = np.argsort(sorted_box_dist, axis=1)
+            leaf_order = np.take_along_axis(leaf_order, resort, axis=1)
+            sorted_box_dist = np.take_along_axis(sorted_box_dist, resort, axis=1)
+        else:
+            leaf_order = np.argsort(box_dist, axis=1)
+            sorted_box_dist = np.take_along_axis(box_dist, leaf_order, axis=1)
+
+        subset_dist = best_dist[unsure]
+        subset_index = best_index[unsure]
+        pending = self._scan_leaves(subset, np.arange(len(unsure)), leaf_order, sorted_box_dist,
+                                    subset_dist, subset_index)
+
+        if len(pending) and first < self.leaf_count:
+            leaf_order = np.argsort(box_dist[pending], axis=1)
+            sorted_box_dist = np.take_along_axis(box_dist[pending], leaf_order, axis=1)
+            pending_dist = subset_dist[pending]
+            pending_index = subset_index[pending]
+            self._scan_leaves(subset[pending], np.arange(len(pending)), leaf_order, sorted_box_dist,
+                              pending_dist, pending_index)
+            subset_dist[pending] = pending_dist
+            subset_index[pending] = pending_index
+
+        best_dist[unsure] = subset_dist
+        best_index[unsure] = subset_index
+        return self._rows[best_index], np.sqrt(best_dist)
+
+    def _scan_leaves(self, queries, active, leaf_order, sorted_box_dist, best_dist, best_index):
+        """
+        按包围盒距离顺序检查叶子，更新最近城市
+
+        只有包围盒距离小于当前最优距离的查询需要继续检查下一个叶子。
+
+        Returns:
+            检查完所有给定叶子后仍未确定的查询
+        """
+        for k in range(leaf_order.shape[1]):
+            active = active[sorted_box_dist[active, k] < best_dist[active]]
+            if len(active) == 0:
+                break
+
+            leaves = leaf_order[active, k]
+            starts = self._leaf_start[leaves]
+            lengths = self._leaf_end[leaves] - starts
+            width = int(lengths.max())
+            offsets = np.arange(width)
+            valid = offsets[None, :] < lengths[:, None]
+            candidates = np.where(valid, starts[:, None] + offsets[None, :], starts[:, None])
+
+            dist = ((self._points[candidates] - queries[active, None, :]) ** 2).sum(axis=-1)
+            dist[~valid] = np.inf
+            local = np.argmin(dist, axis=1)
+            local_dist = dist[np.arange(len(active)), local]
+
+            improved = local_dist < best_dist[active]
+            best_dist[active[improved]] = local_dist[improved]
+            best_index[active[improved]] = candidates[np.arange(len(active)), local][improved]
+        else:
+            # 给定叶子已全部检查，但下一个叶子仍可能更近
+            if leaf_order.shape[1] < self.leaf_count:
+                return active[sorted_box_dist[active, -1] < best_dist[active]]
+            return active[:0]
+
+        return active
+
+    def query(self, latitudes, longitudes) -> Tuple:
+        """
+        向量化批量查询最近城市
+
+        Args:
+            latitudes: 纬度数组
+            longitudes: 经度数组
+
+        Returns:
+            (地名库行号数组, 距离数组（米）)
+        """
+        queries = _to_unit_vectors(latitudes, longitudes).reshape(-1, 3)
+        rows = np.empty(len(queries), dtype=np.int64)
+        chords = np.empty(len(queries), dtype=np.float64)
+
+        for start in range(0, len(queries), self.chunk_size):
+            end = start + self.chunk_size
+            rows[start:end], chords[start:end] = self._query_chunk(queries[start:end])
+
+        return rows, _chord_to_meters(chords)
+
+    def search_position(self, latitude: float, longitude: float, limit_distance: bool = True) -> Dict:
+        """
+        离线查询单个坐标，返回与search_place_index_for_position相同结构的响应
+
+        Args:
+            limit_distance: 为False时忽略max_distance_meters，总是返回最近城市（用于上游不可用时降级）
+        """
+        rows, distances = self.query([latitude], [longitude])
+        return self._build_response(latitude, longitude, int(rows[0]), float(distances[0]), limit_distance)
+
+    def search_place_index_for_position(self, IndexName: str = None, Position: List[float] = None,
+                                        MaxResults: int = 1, Language: str = None, **kwargs) -> Dict:
+        """兼容location客户端接口（Position为[经度, 纬度]）"""
+        longitude, latitude = Position
+        return self.search_position(latitude, longitude)
+
+    def _build_response(self, latitude: float, longitude: float, row: int, distance: float,
+                        limit_distance: bool = True, place: Dict = None) -> Dict:
+        """构建Location Service格式的响应，超出最大距离时结果为空（place为已构建的城市地点，可选）"""
+        summary = {'Position': [longitude, latitude], 'MaxResults': 1,
+                   'DataSource': self.gazetteer.data_source}
+        if limit_distance and self.max_distance_meters is not None and distance > self.max_distance_meters:
+            return {'Summary': summary, 'Results': []}
+
+        return {
+            'Summary': summary,
+            'Results': [{
+                'Place': place if place is not None else self.gazetteer.place(row),
+                'Distance': distance,
+                'Relevance': 1.0,
+                'PlaceId': self.gazetteer.place_id(row)
+            }]
+        }
+
+    def batch_reverse_geocode(self, latitudes, longitudes, profile_name: str = None,
+                              region_name: str = None) -> List[Optional[Dict]]:
+        """
+        批量离线反向地理编码
+
+        Args:
+            latitudes: 纬度数组
+            longitudes: 经度数组
+            profile_name: 结果aws_info中的profile（可选）
+            region_name: 结果aws_info中的区域（可选）
+
+        Returns:
+            与reverse_geocode离线命中时相同结构的结果（aws_info.place_index为 "offline"），超出最大距离的点为None
+        """
+        start_time = time.perf_counter()
+        rows, distances = self.query(latitudes, longitudes)
+        response_time = (time.perf_counter() - start_time) / max(len(rows), 1)
+
+        places = {}
+        results = []
+        for latitude, longitude, row, distance in zip(latitudes, longitudes, rows.tolist(), distances.tolist()):
+            if self.max_distance_meters is not None and distance > self.max_distance_meters:
+                results.append(None)
+                continue
+
+            place = places.get(row)
+            if place is None:
+                place = places[row] = self.gazetteer.place(row)
+            latitude, longitude = float(latitude), float(longitude)
+            response = self._build_response(latitude, longitude, row, distance, limit_distance=False, place=place)
+            results.append(build_reverse_result(latitude, longitude, response, response_time,
+                                                build_aws_info(profile_name, region_name, OFFLINE_PLACE_INDEX)))
+        return results
+
+if __name__ == "__main__":
+    from offline_gazetteer import load_sample_gazetteer
+
+    geocoder = OfflineReverseGeocoder(load_sample_gazetteer(), leaf_size=4)
+    print(f"✓ 已构建KD树: {len(geocoder.gazetteer)} 个城市, {geocoder.leaf_count} 个叶子节点")
+
+    for lat, lon in [(40.190632, 116.412144), (31.231271, 121.470015), (22.544574, 114.054543)]:
+        response = geocoder.search_position(lat, lon)
+        if response['Results']:
+            result = response['Results'][0]
+            print(f"  ({lat}, {lon}): {result['Place']['Label']} 距离 {result['Distance'] / 1000:.1f}公里")
+        else:
+            print(f"  ({lat}, {lon}): 附近没有城市")
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+请求速率限制
+基于令牌桶算法，按“每秒请求数”控制对Amazon Location Service的调用频率；
+AdaptiveRateLimiter根据限流错误（ThrottlingException）反馈按AIMD自动调整速率
+"""
+
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from fast_start import LazyModule
+
+# asyncio只在异步接口中使用，同步调用方不为它付出导入开销
+asyncio = LazyModule('asyncio')
+
+# 表示请求被限流的错误码
+THROTTLING_ERROR_CODES = frozenset([
+    'ThrottlingException', 'Throttling', 'TooManyRequestsException',
+    'RequestLimitExceeded', 'ProvisionedThroughputExceededException', 'SlowDown'
+])
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """判断异常是否为限流错误（botocore ClientError）"""
+    response = getattr(error, 'response', None)
+    if not isinstance(response, dict):
+        return False
+    return response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 令牌补充速率（每秒请求数）
+            capacity: 桶容量，即允许的最大突发请求数（默认等于rate，至少为1）
+        """
+        if rate <= 0:
+            raise ValueError("rate必须大于0")
+
+        self.rate = float(rate)
+        self._fixed_capacity = bool(capacity)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """按经过的时间补充令牌"""
+        elapsed = now - self._last
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last = now
+
+    def set_rate(self, rate: float):
+        """调整令牌补充速率（未指定容量时容量随速率调整）"""
+        if rate <= 0:
+            raise ValueError("rate必须大于0")
+        with self._lock:
+            # 先按旧速率结算已经过的时间
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            if not self._fixed_capacity:
+                self.capacity = max(1.0, self.rate)
+                self._tokens = min(self._tokens, self.capacity)
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        预留令牌但不等待（允许余额为负）
+
+        Args:
+            tokens: 需要的令牌数量
+
+        Returns:
+            调用方在发出请求前需要等待的秒数
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        获取令牌，令牌不足时阻塞等待
+
+        先在锁内预留令牌，再在锁外休眠，
+        这样多个线程排队等待时不会互相阻塞锁。
+        asyncio代码应使用 await asyncio.sleep(bucket.reserve())。
+
+        Args:
+            tokens: 需要的令牌数量
+
+        Returns:
+            实际等待的秒数
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """非阻塞获取令牌，令牌不足时立即返回False"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, initial_rate: float = 10.0, min_rate: float = 1.0, max_rate: float = 100.0,
+                 additive_increase: float = 1.0, multiplicative_decrease: float = 0.5,
+                 decrease_cooldown: float = 1.0, max_retries: int = 5,
+                 base_backoff: float = 0.2, max_backoff: float = 10.0):
+        """
+        初始化AIMD自适应限流器
+
+        请求成功时速率加性增加（约每秒增加additive_increase），
+        收到限流错误时速率乘性减少；同一冷却期内的多次限流只减速一次，
+        避免并发在途请求同时被限流时速率一下子降到下限。
+        被限流的请求按“全抖动”指数退避重试。
+
+        Args:
+            initial_rate: 初始每秒请求数
+            min_rate: 速率下限
+            max_rate: 速率上限
+            additive_increase: 每秒加性增加的请求数
+            multiplicative_decrease: 限流时速率乘以的系数（0~1）
+            decrease_cooldown: 两次减速之间的最短间隔（秒）
+            max_retries: 限流错误的最大重试次数
+            base_backoff: 退避基准时间（秒）
+            max_backoff: 单次退避的最长时间（秒）
+        """
+        if not 0 < multiplicative_decrease < 1:
+            raise ValueError("multiplicative_decrease必须在0和1之间")
+
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.decrease_cooldown = decrease_cooldown
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._rate = min(max(float(initial_rate), self.min_rate), self.max_rate)
+        self._bucket = TokenBucket(self._rate)
+        self._last_decrease = float('-inf')
+        self._lock = threading.Lock()
+
+        self.successes = 0
+        self.throttles = 0
+        self.retries = 0
+        self.rate_decreases = 0
+
+    @property
+    def rate(self) -> float:
+        """当前每秒请求数"""
+        return self._rate
+
+    def reserve(self) -> float:
+        """预留一次请求配额，返回需要等待的秒数"""
+        return self._bucket.reserve()
+
+    def acquire(self) -> float:
+        """获取一次请求配额，配额不足时阻塞等待"""
+        return self._bucket.acquire()
+
+    def try_acquire(self) -> bool:
+        """配额充足时获取一次配额并返回True，否则立即返回False"""
+        return self._bucket.try_acquire()
+
+    def on_success(self):
+        """请求成功: 加性增加速率"""
+        with self._lock:
+            self.successes += 1
+            rate = min(self.max_rate, self._rate + self.additive_increase / self._rate)
+            if rate != self._rate:
+                self._rate = rate
+                self._bucket.set_rate(rate)
+
+    def on_throttle(self):
+        """请求被限流: 乘性减少速率（冷却期内只减一次）"""
+        with self._lock:
+            self.throttles += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_cooldown:
+                return
+            self._last_decrease = now
+            self.rate_decreases += 1
+            self._rate = max(self.min_rate, self._rate * self.multiplicative_decrease)
+            self._bucket.set_rate(self._rate)
+
+    def _count(self, counter: str):
+        """线程安全地累加统计计数"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def backoff(self, attempt: int) -> float:
+        """第attempt次重试前的等待时间（全抖动指数退避）"""
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def call(self, fn: Callable[[], Any], acquire: bool = True) -> Any:
+        """
+        按当前速率调用fn，限流错误时调整速率并退避重试
+
+        Args:
+            fn: 实际发出请求的函数
+            acquire: 调用fn前是否获取配额；fn自己按尝试获取配额时（例如RequestPolicy.call传入了本限流器）
+                传False，此时只处理限流反馈和退避重试
+
+        Returns:
+            fn的返回值；非限流错误或重试次数用尽时抛出异常
+        """
+        attempt = 0
+        while True:
+            if acquire:
+                self.acquire()
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_throttling_error(e):
+                    raise
+                self.on_throttle()
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                self._count('retries')
+            else:
+                self.on_success()
+                return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]], acquire: bool = True) -> Any:
+        """call的asyncio版本，fn为返回协程的函数"""
+        attempt = 0
+        while True:
+            if acquire:
+                await asyncio.sleep(self.reserve())
+            try:
+                result = await fn()
+            except Exception as e:
+                if not is_throttling_error(e):
+                    raise
+                self.on_throttle()
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+                attempt += 1
+                self._count('retries')
+            else:
+                self.on_success()
+                return result
+
+    def stats(self) -> Dict:
+        """返回限流统计信息"""
+        with self._lock:
+            return {
+                'current_rate': self._rate,
+                'successes': self.successes,
+                'throttles': self.throttles,
+                'retries': self.retries,
+                'rate_decreases': self.rate_decreases
+            }
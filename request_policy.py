@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+请求超时、重试与对冲策略
+为Location客户端调用提供单次尝试超时、瞬时错误的有限重试，以及对冲请求：
+请求耗时超过近期p95延迟仍未返回时再发出一个相同请求，取先返回的结果，降低尾延迟
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fast_start import LazyModule
+
+# asyncio只在异步接口中使用，同步调用方不为它付出导入开销
+asyncio = LazyModule('asyncio')
+botocore_exceptions = LazyModule('botocore.exceptions')
+
+# 可以安全重试的服务端错误码
+TRANSIENT_ERROR_CODES = frozenset([
+    'InternalServerException', 'InternalServerError', 'InternalFailure',
+    'ServiceUnavailable', 'ServiceUnavailableException', 'RequestTimeout', 'RequestTimeoutException'
+])
+
+
+class AttemptTimeoutError(TimeoutError):
+    """单次尝试超过attempt_timeout仍未返回"""
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """判断异常是否为可重试的瞬时错误（超时、连接错误、5xx）；限流错误由rate_limiter处理"""
+    if isinstance(error, TimeoutError):
+        return True
+    # botocore尚未导入时不可能抛出botocore的连接错误，不为判断而导入它
+    if botocore_exceptions.loaded and isinstance(
+            error, (botocore_exceptions.ConnectionError, botocore_exceptions.HTTPClientError)):
+        return True
+    response = getattr(error, 'response', None)
+    if not isinstance(response, dict):
+        return False
+    if response.get('Error', {}).get('Code') in TRANSIENT_ERROR_CODES:
+        return True
+    status = response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    return isinstance(status, int) and status >= 500
+
+
+class RequestPolicy:
+    def __init__(self, attempt_timeout: Optional[float] = None, max_retries: int = 2,
+                 base_backoff: float = 0.05, max_backoff: float = 2.0,
+                 hedge: bool = False, hedge_quantile: float = 0.95, initial_hedge_delay: float = 0.5,
+                 min_hedge_delay: float = 0.005, latency_window: int = 1000, min_samples: int = 20,
+                 max_workers: int = 128):
+        """
+        初始化请求策略
+
+        Args:
+            attempt_timeout: 单次尝试超时（秒），None表示不限制
+            max_retries: 瞬时错误和超时的最大重试次数
+            base_backoff: 重试退避基准时间（秒），按全抖动指数退避
+            max_backoff: 单次退避的最长时间（秒）
+            hedge: 是否启用对冲请求
+            hedge_quantile: 对冲延迟取近期成功请求延迟的分位数
+            initial_hedge_delay: 样本不足min_samples时使用的对冲延迟（秒）
+            min_hedge_delay: 对冲延迟下限（秒）
+            latency_window: 用于计算分位数的最近延迟样本数
+            min_samples: 开始使用分位数前需要的样本数
+            max_workers: 执行超时/对冲尝试的线程数（超时的尝试会继续占用线程直到返回）
+        """
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+
+        self._latencies = deque(maxlen=latency_window)
+        self._new_samples = 0
+        self._hedge_delay = initial_hedge_delay
+        self._lock = threading.Lock()
+        self._executor = None
+
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedges_skipped = 0
+        self.hedge_wins = 0
+
+    def _record_latency(self, latency: float):
+        """记录成功请求的延迟，每积累一批新样本重新计算对冲延迟"""
+        with self._lock:
+            self._latencies.append(latency)
+            self._new_samples += 1
+            if len(self._latencies) >= self.min_samples and self._new_samples >= 32:
+                self._new_samples = 0
+                ordered = sorted(self._latencies)
+                index = min(len(ordered) - 1, int(len(ordered) * self.hedge_quantile))
+                self._hedge_delay = max(self.min_hedge_delay, ordered[index])
+
+    @property
+    def hedge_delay(self) -> float:
+        """当前对冲延迟（秒）"""
+        return self._hedge_delay
+
+    def backoff(self, attempt: int) -> float:
+        """第attempt次重试前的等待时间（全抖动指数退避）"""
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _count(self, counter: str):
+        """线程安全地累加统计计数"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def call(self, fn: Callable[[], Any], rate_limiter=None) -> Any:
+        """
+        按策略调用fn
+
+        Args:
+            fn: 实际发出请求的函数（对冲时可能被并发调用两次）
+            rate_limiter: 限流器（可选，rate_limiter.TokenBucket或AdaptiveRateLimiter）。每次尝试（包括重试）
+                发出前获取一个令牌，等待令牌的时间不计入单次尝试超时；对冲请求只在有空闲令牌时发出
+
+        Returns:
+            fn的返回值；非瞬时错误或重试次数用尽时抛出最后一次的异常
+        """
+        self._count('calls')
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(fn, rate_limiter)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                self._count('retries')
+
+    def _attempt(self, fn: Callable[[], Any], rate_limiter=None) -> Any:
+        """执行一次尝试（含可能的对冲请求）"""
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        self._count('attempts')
+        start = time.monotonic()
+
+        if self.attempt_timeout is None and not self.hedge:
+            result = fn()
+            self._record_latency(time.monotonic() - start)
+            return result
+
+        executor = self._get_executor()
+        primary = executor.submit(fn)
+        pending = {primary}
+        deadline = start + self.attempt_timeout if self.attempt_timeout is not None else None
+        hedge_at = start + self._hedge_delay if self.hedge else None
+        last_error = None
+
+        while pending:
+            wake_times = [t for t in (deadline, hedge_at) if t is not None]
+            timeout = max(0.0, min(wake_times) - time.monotonic()) if wake_times else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is not primary:
+                        self._count('hedge_wins')
+                    self._record_latency(time.monotonic() - start)
+                    return future.result()
+                last_error = error
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline and pending:
+                for other in pending:
+                    other.cancel()
+                self._count('timeouts')
+                raise AttemptTimeoutError(f"请求超过 {self.attempt_timeout:.3f} 秒未返回")
+            if hedge_at is not None and now >= hedge_at and pending:
+                hedge_at = None
+                if self._hedge_allowed(rate_limiter):
+                    self._count('hedges')
+                    pending = pending | {executor.submit(fn)}
+
+        raise last_error
+
+    def _hedge_allowed(self, rate_limiter) -> bool:
+        """对冲请求是额外负载：限流器没有空闲令牌时不发出，不为它等待"""
+        if rate_limiter is None or rate_limiter.try_acquire():
+            return True
+        self._count('hedges_skipped')
+        return False
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]], rate_limiter=None) -> Any:
+        """call的asyncio版本，fn为返回协程的函数"""
+        self._count('calls')
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt_async(fn, rate_limiter)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+                attempt += 1
+                self._count('retries')
+
+    async def _attempt_async(self, fn: Callable[[], Awaitable[Any]], rate_limiter=None) -> Any:
+        """执行一次异步尝试（含可能的对冲请求）"""
+        if rate_limiter is not None:
+            wait = rate_limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        self._count('attempts')
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        if self.attempt_timeout is None and not self.hedge:
+            result = await fn()
+            self._record_latency(loop.time() - start)
+            return result
+
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        deadline = start + self.attempt_timeout if self.attempt_timeout is not None else None
+        hedge_at = start + self._hedge_delay if self.hedge else None
+        last_error = None
+
+        try:
+            while pending:
+                wake_times = [t for t in (deadline, hedge_at) if t is not None]
+                timeout = max(0.0, min(wake_times) - loop.time()) if wake_times else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        if task is not primary:
+                            self._count('hedge_wins')
+                        self._record_latency(loop.time() - start)
+                        return task.result()
+                    last_error = error
+
+                now = loop.time()
+                if deadline is not None and now >= deadline and pending:
+                    self._count('timeouts')
+                    raise AttemptTimeoutError(f"请求超过 {self.attempt_timeout:.3f} 秒未返回")
+                if hedge_at is not None and now >= hedge_at and pending:
+                    hedge_at = None
+                    if self._hedge_allowed(rate_limiter):
+                        self._count('hedges')
+                        pending = pending | {asyncio.ensure_future(fn())}
+
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict:
+        """返回策略统计信息"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'attempts': self.attempts,
+                'retries': self.retries,
+                'timeouts': self.timeouts,
+                'hedges': self.hedges,
+                'hedges_skipped': self.hedges_skipped,
+                'hedge_wins': self.hedge_wins,
+                'hedge_delay': self._hedge_delay
+            }
+
+    def close(self):
+        """释放线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -4,11 +4,12 @@ Amazon Location Service 设置脚本
 用于创建和配置必要的资源
 """
 
-import boto3
 import json
 import time
 from botocore.exceptions import ClientError
 
+from client_factory import get_client
+
 def setup_location_service(profile_name="oversea1", region_name="us-west-2"):
     """设置Amazon Location Service资源"""
     
@@ -17,9 +18,8 @@ def setup_location_service(profile_name="oversea1", region_name="us-west-2"):
     print("=" * 60)
     
     try:
-        # 创建会话和客户端
-        session = boto3.Session(profile_name=profile_name)
-        location_client = session.client('location', region_name=region_name)
+        # 获取共享客户端
+        location_client = get_client('location', profile_name, region_name)
         
         print(f"✓ AWS会话创建成功")
         print(f"  Profile: {profile_name}")
@@ -44,6 +44,12 @@ def setup_location_service(profile_name="oversea1", region_name="us-west-2"):
                 'name': 'CityGeocodingIndex-HERE',
                 'data_source': 'Here',
                 'description': '使用HERE数据源的城市地理编码索引'
+            },
+            {
+                # Grab数据源仅在ap-southeast-1可用；index_router只在该区域（或传入的已创建索引包含Grab时）优先使用Grab
+                'name': 'CityGeocodingIndex-Grab',
+                'data_source': 'Grab',
+                'description': '使用Grab数据源的东南亚城市地理编码索引'
             }
         ]
         
@@ -144,7 +150,7 @@ def setup_location_service(profile_name="oversea1", region_name="us-west-2"):
                 'setup_timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())
             },
             'created_indexes': created_indexes,
-            'available_data_sources': ['Esri', 'Here'],
+            'available_data_sources': ['Esri', 'Here', 'Grab'],
             'pricing_plan': 'RequestBasedUsage'
         }
         
@@ -167,9 +173,8 @@ def check_permissions(profile_name="oversea1", region_name="us-west-2"):
     print("\n=== 权限检查 ===")
     
     try:
-        session = boto3.Session(profile_name=profile_name)
-        location_client = session.client('location', region_name=region_name)
-        iam_client = session.client('iam', region_name=region_name)
+        location_client = get_client('location', profile_name, region_name)
+        iam_client = get_client('iam', profile_name, region_name)
         
         required_permissions = [
             'location:CreatePlaceIndex',
@@ -217,8 +222,7 @@ def cleanup_resources(profile_name="oversea1", region_name="us-west-2"):
     print("\n=== 资源清理 ===")
     
     try:
-        session = boto3.Session(profile_name=profile_name)
-        location_client = session.client('location', region_name=region_name)
+        location_client = get_client('location', profile_name, region_name)
         
         # 获取所有Place Index
         response = location_client.list_place_indexes()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+请求合并（single-flight）
+相同的查询同时在途时只向上游发出一次请求，所有调用方共享同一个响应，
+缓存为空时（例如刚部署后）可以避免大量重复的计费请求
+"""
+
+import asyncio
+import threading
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """初始化线程版请求合并器"""
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        执行fn，相同key已有在途请求时等待并共享其结果
+
+        Args:
+            key: 请求键（相同键的请求会被合并）
+            fn: 实际发出请求的函数
+
+        Returns:
+            fn的返回值；fn抛出的异常会传递给所有等待的调用方
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self) -> Dict:
+        """返回合并统计信息"""
+        with self._lock:
+            return {
+                'upstream_calls': self.leaders,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls)
+            }
+
+
+class _AsyncCall:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        """初始化asyncio版请求合并器（只能在同一个事件循环中使用）"""
+        self._calls: Dict[str, _AsyncCall] = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _finished(self, key: str, call: _AsyncCall, task: asyncio.Task):
+        """共享任务结束时移除在途记录"""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # 标记异常已读取，没有等待方时不产生警告
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行协程函数fn，相同key已有在途请求时等待并共享其结果
+
+        请求在独立的任务中执行，所有调用方（包括发起请求的调用方）通过shield等待，
+        任一调用方被取消都不会取消共享请求；只有所有调用方都已取消时才取消请求
+
+        Args:
+            key: 请求键（相同键的请求会被合并）
+            fn: 返回协程的函数，实际发出请求
+
+        Returns:
+            fn的返回值；fn抛出的异常会传递给所有等待的调用方
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            self.coalesced += 1
+        else:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(partial(self._finished, key, call))
+            self.leaders += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def stats(self) -> Dict:
+        """返回合并统计信息"""
+        return {
+            'upstream_calls': self.leaders,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._calls)
+        }
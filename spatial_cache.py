@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+反向地理编码空间缓存
+按geohash网格量化坐标，邻近的GPS点复用同一个反向地理编码结果
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_METERS = 6371008.8
+METERS_PER_DEGREE = 111320.0
+# 容差查询最多向外搜索的网格圈数（每个方向），即最多(2*3+1)^2=49个网格
+MAX_NEIGHBOR_RINGS = 3
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = 7) -> str:
+    """
+    计算坐标的geohash
+
+    Args:
+        latitude: 纬度
+        longitude: 经度
+        precision: geohash长度（6约为1.2km×0.6km，7约为153m×153m，8约为38m×19m）
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """返回指定精度下网格的(纬度跨度, 经度跨度)，单位为度"""
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """计算两点之间的大圆距离（米）"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def precision_for_tolerance(tolerance_meters: float, max_rings: int = MAX_NEIGHBOR_RINGS) -> int:
+    """返回搜索圈数不超过max_rings时可用的最高geohash精度（按赤道处的网格尺寸计算）"""
+    for precision in range(12, 0, -1):
+        cell_lat, cell_lon = geohash_cell_size(precision)
+        if tolerance_meters <= max_rings * min(cell_lat, cell_lon) * METERS_PER_DEGREE:
+            return precision
+    return 1
+
+
+class GeohashReverseCache:
+    def __init__(self, precision: int = 7, tolerance_meters: float = None,
+                 max_cells: int = 100000, max_points_per_cell: int = 8):
+        """
+        初始化geohash网格反向地理编码缓存
+
+        Args:
+            precision: geohash精度（网格大小）
+            tolerance_meters: 距离容差（米）。为空时查询点落在已缓存的网格内即命中；
+                指定后查询点所在网格未命中时，再返回相邻网格中容差范围内最近的已缓存点。
+                容差超过MAX_NEIGHBOR_RINGS圈网格时抛出ValueError，应改用更低的精度
+            max_cells: 最大网格数，超出时淘汰最久未使用的网格
+            max_points_per_cell: 每个网格保留的最大缓存点数
+        """
+        cell_lat, cell_lon = geohash_cell_size(precision)
+        if tolerance_meters is not None:
+            if tolerance_meters <= 0:
+                raise ValueError(f"tolerance_meters必须大于0: {tolerance_meters}")
+            if tolerance_meters > MAX_NEIGHBOR_RINGS * min(cell_lat, cell_lon) * METERS_PER_DEGREE:
+                raise ValueError(
+                    f"容差{tolerance_meters}米超过precision={precision}下{MAX_NEIGHBOR_RINGS}圈网格的搜索范围，"
+                    f"请使用precision<={precision_for_tolerance(tolerance_meters)}"
+                )
+        self.precision = precision
+        self.tolerance_meters = tolerance_meters
+        self.max_cells = max_cells
+        self.max_points_per_cell = max_points_per_cell
+        self.cell_lat, self.cell_lon = cell_lat, cell_lon
+        self._cells = OrderedDict()  # geohash -> [(lat, lon, 结果), ...]
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _neighbor_cells(self, latitude: float, longitude: float, cell: str) -> Set[str]:
+        """返回覆盖容差范围的相邻网格（不包括查询点所在网格cell）"""
+        lat_rings = math.ceil(self.tolerance_meters / (self.cell_lat * METERS_PER_DEGREE))
+        cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+        # 高纬度处经度方向的网格变窄，圈数截断到上限：超出部分只会少命中，不会返回错误结果
+        lon_rings = min(math.ceil(self.tolerance_meters / (self.cell_lon * METERS_PER_DEGREE * cos_lat)),
+                        MAX_NEIGHBOR_RINGS)
+
+        cells = set()
+        for i in range(-lat_rings, lat_rings + 1):
+            lat = latitude + i * self.cell_lat
+            if lat < -90.0 or lat > 90.0:
+                continue
+            for j in range(-lon_rings, lon_rings + 1):
+                lon = (longitude + j * self.cell_lon + 180.0) % 360.0 - 180.0
+                cells.add(geohash_encode(lat, lon, self.precision))
+        cells.discard(cell)
+        return cells
+
+    def _nearest(self, latitude: float, longitude: float, points: list) -> Tuple[Optional[Dict], float]:
+        """返回points中容差范围内最近的缓存结果及其距离"""
+        best = None
+        best_distance = self.tolerance_meters
+        for point_lat, point_lon, result in points:
+            distance = haversine_meters(latitude, longitude, point_lat, point_lon)
+            if distance <= best_distance:
+                best, best_distance = result, distance
+        return best, best_distance
+
+    def lookup(self, latitude: float, longitude: float) -> Optional[Dict]:
+        """查询缓存，命中返回已缓存的反向地理编码结果"""
+        # 网格编码在锁外完成，锁内只做字典查找和距离比较
+        cell = geohash_encode(latitude, longitude, self.precision)
+        neighbors = None if self.tolerance_meters is None else self._neighbor_cells(latitude, longitude, cell)
+
+        with self._lock:
+            points = self._cells.get(cell)
+            if points:
+                self._cells.move_to_end(cell)
+                self.hits += 1
+                if neighbors is None:
+                    return points[0][2]
+                best, _ = self._nearest(latitude, longitude, points)
+                return best if best is not None else points[0][2]
+
+            if neighbors:
+                best = None
+                best_distance = self.tolerance_meters
+                best_cell = None
+                for neighbor in neighbors:
+                    points = self._cells.get(neighbor)
+                    if points:
+                        result, distance = self._nearest(latitude, longitude, points)
+                        if result is not None and distance <= best_distance:
+                            best, best_distance, best_cell = result, distance, neighbor
+                if best is not None:
+                    self._cells.move_to_end(best_cell)
+                    self.hits += 1
+                    return best
+
+            self.misses += 1
+            return None
+
+    def store(self, latitude: float, longitude: float, result: Dict):
+        """缓存反向地理编码结果（只缓存成功结果）"""
+        if not result.get('success'):
+            return
+
+        cell = geohash_encode(latitude, longitude, self.precision)
+        with self._lock:
+            points = self._cells.get(cell)
+            if points is None:
+                points = self._cells[cell] = []
+            self._cells.move_to_end(cell)
+            if len(points) < self.max_points_per_cell:
+                points.append((latitude, longitude, result))
+
+            while len(self._cells) > self.max_cells:
+                self._cells.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存（保留计数）"""
+        with self._lock:
+            self._cells.clear()
+
+    def stats(self) -> Dict:
+        """返回缓存统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'precision': self.precision,
+                'tolerance_meters': self.tolerance_meters,
+                'cells': len(self._cells),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
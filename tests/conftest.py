@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 模块位于仓库根目录（未打包），测试直接从根目录导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,20 @@
+"""统一地理编码门面与服务版本的输入校验一致性"""
+
+import pytest
+
+from fake_location_client import FakeLocationClient
+from geocoder import CacheBackend, FakeBackend, Geocoder
+from location_service_poc import AmazonLocationServicePOC
+
+
+@pytest.mark.parametrize('city, country', [(None, "China"), ("  ", "China"), ("Tokyo", 5)])
+def test_invalid_city_matches_service_error(city, country):
+    fake = FakeBackend()
+    geocoder = Geocoder([CacheBackend(), fake], profile_name="oversea1", region_name="us-west-2")
+
+    result = geocoder.geocode(city, country)
+    expected = AmazonLocationServicePOC(location_client=FakeLocationClient()).geocode_city(city, country)
+
+    assert result == expected
+    assert fake.location_client.total_calls == 0
+    assert all(stats['calls'] == 0 for stats in geocoder.stats().values())
@@ -0,0 +1,169 @@
+"""AsyncLocationServicePOC 与同步版本的结果结构一致性、并发上限和单条错误隔离"""
+
+import asyncio
+
+import pytest
+from botocore.exceptions import ClientError
+
+from fake_location_client import AsyncFakeLocationClient, FakeLocationClient
+from location_service_async import AsyncLocationServicePOC
+from location_service_poc import AmazonLocationServicePOC
+
+CITIES = [
+    ("北京", "中国"),
+    ("上海", "中国"),
+    ("New York", "United States"),
+    ("London", "United Kingdom"),
+    ("Tokyo", "Japan"),
+]
+
+# 每次调用都不同的字段，比较时排除
+_VOLATILE = {('metadata', 'response_time_seconds'), ('aws_info', 'timestamp')}
+
+
+class FailingFakeLocationClient(FakeLocationClient):
+    """对指定查询文本抛出服务端错误的同步模拟客户端"""
+
+    def __init__(self, failing_texts, **kwargs):
+        super().__init__(**kwargs)
+        self.failing_texts = set(failing_texts)
+
+    def search_place_index_for_text(self, IndexName, Text, **kwargs):
+        if Text in self.failing_texts:
+            raise ClientError({'Error': {'Code': 'InternalServerException', 'Message': 'boom'}},
+                              'SearchPlaceIndexForText')
+        return super().search_place_index_for_text(IndexName=IndexName, Text=Text, **kwargs)
+
+
+class FailingAsyncFakeLocationClient(AsyncFakeLocationClient):
+    """对指定查询文本抛出服务端错误的异步模拟客户端"""
+
+    def __init__(self, failing_texts, **kwargs):
+        super().__init__(**kwargs)
+        self._client = FailingFakeLocationClient(failing_texts)
+
+
+def _stable(result):
+    """去掉每次调用都会变化的字段"""
+    return {
+        key: {k: v for k, v in value.items() if (key, k) not in _VOLATILE} if isinstance(value, dict) else value
+        for key, value in result.items()
+    }
+
+
+def _schema(value):
+    """返回嵌套字典的键结构"""
+    if isinstance(value, dict):
+        return {key: _schema(item) for key, item in value.items()}
+    return type(value).__name__ if value is not None else None
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def _with_service(coroutine_factory, **kwargs):
+    async with AsyncLocationServicePOC(**kwargs) as service:
+        return await coroutine_factory(service)
+
+
+@pytest.mark.parametrize('city, country', CITIES)
+def test_geocode_matches_sync_result(city, country):
+    sync_result = AmazonLocationServicePOC(location_client=FakeLocationClient()).geocode_city(city, country)
+    async_result = _run(_with_service(lambda service: service.geocode_city(city, country),
+                                      location_client=AsyncFakeLocationClient()))
+
+    assert _schema(async_result) == _schema(sync_result)
+    assert _stable(async_result) == _stable(sync_result)
+
+
+def test_reverse_geocode_matches_sync_result():
+    sync_result = AmazonLocationServicePOC(location_client=FakeLocationClient()).reverse_geocode(35.68, 139.75)
+    async_result = _run(_with_service(lambda service: service.reverse_geocode(35.68, 139.75),
+                                      location_client=AsyncFakeLocationClient()))
+
+    assert _schema(async_result) == _schema(sync_result)
+    assert _stable(async_result) == _stable(sync_result)
+
+
+def test_error_result_matches_sync_result():
+    failing = ["Atlantis, Nowhere"]
+    sync_result = AmazonLocationServicePOC(
+        location_client=FailingFakeLocationClient(failing)).geocode_city("Atlantis", "Nowhere")
+    async_result = _run(_with_service(lambda service: service.geocode_city("Atlantis", "Nowhere"),
+                                      location_client=FailingAsyncFakeLocationClient(failing)))
+
+    assert async_result['success'] is False
+    assert _stable(async_result) == _stable(sync_result)
+
+
+def test_thread_pool_client_matches_native_result():
+    """非协程客户端走线程池，结果与原生协程客户端一致"""
+    native = _run(_with_service(lambda service: service.geocode_city("Tokyo", "Japan"),
+                                location_client=AsyncFakeLocationClient()))
+    threaded = _run(_with_service(lambda service: service.geocode_city("Tokyo", "Japan"),
+                                  location_client=FakeLocationClient()))
+
+    assert _stable(threaded) == _stable(native)
+
+
+def test_batch_respects_max_concurrency():
+    client = AsyncFakeLocationClient(latency=0.01)
+    cities = [(f"City{i}", "Testland") for i in range(30)]
+
+    results = _run(_with_service(lambda service: service.batch_geocode(cities),
+                                 location_client=client, max_concurrency=4))
+
+    assert len(results) == len(cities)
+    assert client.total_calls == len(cities)
+    assert client.max_in_flight == 4
+
+
+def test_iter_geocode_respects_max_concurrency():
+    client = AsyncFakeLocationClient(latency=0.01)
+    cities = [(f"City{i}", "Testland") for i in range(30)]
+
+    async def collect(service):
+        return [item async for item in service.iter_geocode(iter(cities))]
+
+    results = _run(_with_service(collect, location_client=client, max_concurrency=3))
+
+    assert sorted(index for index, _ in results) == list(range(len(cities)))
+    assert client.max_in_flight == 3
+
+
+def test_batch_isolates_per_item_errors():
+    client = FailingAsyncFakeLocationClient(["Atlantis, Nowhere"], latency=0.001)
+    cities = [("Tokyo", "Japan"), ("Atlantis", "Nowhere"), ("London", "United Kingdom")]
+
+    results = _run(_with_service(lambda service: service.batch_geocode(cities), location_client=client))
+
+    assert [result['success'] for result in results] == [True, False, True]
+    assert [result['input_city'] for result in results] == ["Tokyo", "Atlantis", "London"]
+    assert 'InternalServerException' in results[1]['error']
+
+
+@pytest.mark.parametrize('city, country', [(None, "China"), ("  ", None), ("Tokyo", 5)])
+def test_invalid_city_returns_error_result(city, country):
+    client = AsyncFakeLocationClient()
+    sync_result = AmazonLocationServicePOC(location_client=FakeLocationClient()).geocode_city(city, country)
+    async_result = _run(_with_service(lambda service: service.geocode_city(city, country), location_client=client))
+
+    assert async_result['success'] is False
+    assert async_result == sync_result
+    assert client.total_calls == 0
+
+
+def test_deduplicated_batch_keeps_invalid_rows():
+    cities = [(None, "中国"), ("北京", "中国"), ("  ", "中国"), ("北京", "中国"), (None, "中国")]
+    service = AmazonLocationServicePOC(location_client=FakeLocationClient())
+    expected = service.batch_geocode(cities, delay=0)
+
+    sequential = service.batch_geocode(cities, delay=0, deduplicate=True)
+    concurrent = service.batch_geocode_concurrent(cities, max_workers=2, deduplicate=True)
+    async_results = _run(_with_service(lambda s: s.batch_geocode(cities, deduplicate=True),
+                                       location_client=AsyncFakeLocationClient()))
+
+    for results in (sequential, concurrent, async_results):
+        assert [_stable(result) for result in results] == [_stable(result) for result in expected]
+        assert [result['success'] for result in results] == [False, True, False, True, False]